@@ -42,7 +42,6 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_q',
-    'django_crontab',
     'captcha',
     # Project apps
     'users.apps.UsersConfig',
@@ -167,12 +166,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ---------------------------------------------------------------------------
 # Django-Q (async task queue backed by ORM)
 # ---------------------------------------------------------------------------
+# Scheduled jobs hold a cache lease for at most this long (a crashed run frees it on expiry).
+JOB_LEASE_SECONDS = config('JOB_LEASE_SECONDS', cast=int, default=30 * 60)
+# Triggered job runs get a per-task timeout of JOB_LEASE_SECONDS; retry must
+# outlast it or the broker redelivers runs that are still going.
 Q_CLUSTER = {
     'name': 'birthday_reminder',
     'workers': 4,
     'recycle': 500,
     'timeout': 60,
-    'retry': 90,
+    'retry': JOB_LEASE_SECONDS + 60,
     'queue_limit': 50,
     'bulk': 10,
     'orm': 'default',
@@ -181,7 +184,7 @@ Q_CLUSTER = {
 # ---------------------------------------------------------------------------
 # Email configuration (SMTP: Brevo/Gmail/others)
 # ---------------------------------------------------------------------------
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'reminders.mail_backend.CircuitBreakerEmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', cast=str, default='smtp-relay.brevo.com')
 _email_port_raw = config('EMAIL_PORT', cast=str, default='587').strip()
 try:
@@ -197,6 +200,27 @@ EMAIL_FROM_NAME = config('EMAIL_FROM_NAME', cast=str, default='Reminder App')
 DEFAULT_FROM_EMAIL = f"{EMAIL_FROM_NAME} <{EMAIL_FROM}>"
 EMAIL_SUBJECT_PREFIX = config('EMAIL_SUBJECT_PREFIX', cast=str, default='[Reminder App]')
 EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', cast=int, default=5)
+# Messages sent per SMTP session by the batch jobs before the connection is recycled.
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', cast=int, default=50)
+# SMTP workers used by the reminder job; each worker holds its own connection.
+REMINDER_CONCURRENCY = config('REMINDER_CONCURRENCY', cast=int, default=4)
+REMINDER_MAX_CONCURRENCY = 16
+# Local hour (in each user's profile time zone) at which the hourly job sends reminders.
+REMINDER_DELIVERY_HOUR = config('REMINDER_DELIVERY_HOUR', cast=int, default=8)
+# Events processed per chunk before logs and status flags are flushed in bulk.
+REMINDER_FLUSH_SIZE = config('REMINDER_FLUSH_SIZE', cast=int, default=200)
+
+# Email outbox drained by reminders.outbox.drain_outbox
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', cast=int, default=100)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', cast=int, default=5)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 60
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 6 * 60 * 60
+# Previously failed emails re-attempted per drain run, after fresh mail has gone out.
+EMAIL_RETRY_BUDGET = config('EMAIL_RETRY_BUDGET', cast=int, default=50)
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 10 * 60  # seconds before a crashed worker's claim is released
+# Shared SMTP circuit breaker (state kept in the default cache).
+SMTP_CIRCUIT_FAILURE_THRESHOLD = config('SMTP_CIRCUIT_FAILURE_THRESHOLD', cast=int, default=5)
+SMTP_CIRCUIT_COOLDOWN_SECONDS = config('SMTP_CIRCUIT_COOLDOWN_SECONDS', cast=int, default=60)
 
 # Validate required mail settings at startup.
 _required_email_settings = {
@@ -227,6 +251,10 @@ SUPABASE_URL = config('SUPABASE_URL')
 SUPABASE_KEY = config('SUPABASE_KEY')
 SUPABASE_SERVICE_KEY = config('SUPABASE_SERVICE_KEY')
 SUPABASE_JWT_SECRET = config('SUPABASE_JWT_SECRET')
+# Paths sent per storage remove() call by the media reaper (Supabase accepts up to 1000).
+STORAGE_REMOVE_BATCH_SIZE = config('STORAGE_REMOVE_BATCH_SIZE', cast=int, default=1000)
+# remove() calls the media reaper keeps in flight at once.
+STORAGE_REMOVE_CONCURRENCY = config('STORAGE_REMOVE_CONCURRENCY', cast=int, default=4)
 
 # ---------------------------------------------------------------------------
 # Media upload constraints
@@ -257,6 +285,12 @@ ALLOWED_MEDIA_TYPES = [
     *ALLOWED_AUDIO_TYPES,
 ]
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
+# Uploads above this size are spooled to a temporary file and streamed to storage from disk.
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', cast=int, default=2 * 1024 * 1024)
+# Files of one event form uploaded to storage at the same time.
+MEDIA_UPLOAD_CONCURRENCY = config('MEDIA_UPLOAD_CONCURRENCY', cast=int, default=4)
+# Images the background rendition job processes per run.
+MEDIA_RENDITION_BATCH_SIZE = config('MEDIA_RENDITION_BATCH_SIZE', cast=int, default=100)
 
 # ---------------------------------------------------------------------------
 # Verification & security
@@ -381,15 +415,22 @@ SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000').rstrip('/')
 SHARE_VALIDATION_BASE_URL = os.environ.get('SHARE_VALIDATION_BASE_URL', SITE_URL).rstrip('/')
 SHARE_TOKEN_EXPIRY_DAYS = 3
 REMINDER_CRON_SECRET = config('REMINDER_CRON_SECRET', default='')
-HEALTH_CHECK_SMTP_TIMEOUT = config('HEALTH_CHECK_SMTP_TIMEOUT', cast=int, default=5)
 HEALTH_CHECK_STRICT_SMTP = config('HEALTH_CHECK_STRICT_SMTP', cast=bool, default=False)
 
 # ---------------------------------------------------------------------------
-# Cron jobs (django-crontab)
-# ---------------------------------------------------------------------------
-CRONJOBS = [
-    ('0 8 * * *', 'reminders.cron.daily_reminder_job'),
-    ('0 9 * * *', 'reminders.cron.daily_deletion_notification_job'),
-    ('0 10 * * *', 'reminders.cron.daily_media_cleanup_job'),
-    ('30 0 * * *', 'reminders.cron.daily_recurring_events_job'),
-]
\ No newline at end of file
+# Resident scheduler (`manage.py run_scheduler`)
+# ---------------------------------------------------------------------------
+# (JobRun ledger name or None, callable, interval seconds, jitter seconds,
+# optional 'HH:MM' wall-clock anchor in TIME_ZONE).  Anchored jobs run within
+# the jitter either side of each slot.  Jobs with a ledger name resume their
+# cadence from the last recorded run, so restarting the daemon does not
+# re-run the daily jobs.
+SCHEDULER_JOBS = [
+    ('send_reminders', 'reminders.cron.hourly_reminder_job', 60 * 60, 60, '00:00'),
+    ('deletion_notifications', 'reminders.cron.daily_deletion_notification_job', 24 * 60 * 60, 10 * 60, '09:00'),
+    ('media_cleanup', 'reminders.cron.daily_media_cleanup_job', 24 * 60 * 60, 10 * 60, '10:00'),
+    ('recurring_events', 'reminders.cron.daily_recurring_events_job', 24 * 60 * 60, 10 * 60, '00:30'),
+    (None, 'reminders.cron.outbox_drain_job', 5 * 60, 30),
+    (None, 'reminders.cron.storage_tombstone_job', 5 * 60, 30),
+    (None, 'reminders.cron.media_rendition_job', 15 * 60, 60),
+]
@@ -1,12 +1,15 @@
-from unittest.mock import patch
+from unittest.mock import PropertyMock, patch
 
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from reminders.circuit_breaker import smtp_breaker
+
 
 class HealthCheckTests(TestCase):
     def setUp(self):
         self.client = Client()
+        smtp_breaker.reset()
 
     @patch('core.views.settings.EMAIL_HOST_USER', '')
     @patch('core.views.settings.EMAIL_HOST_PASSWORD', '')
@@ -33,34 +36,33 @@ class HealthCheckTests(TestCase):
         self.assertEqual(payload['checks']['supabase'], 'failed')
         self.assertEqual(payload['checks']['smtp'], 'skipped')
 
-    @patch('core.views.get_connection')
     @patch('core.views.settings.EMAIL_HOST_PASSWORD', 'dummy-pass')
     @patch('core.views.settings.EMAIL_HOST_USER', 'dummy-user')
-    def test_health_check_reports_smtp_ok_when_connection_opens(self, mock_connection):
-        mock_connection.return_value.open.return_value = True
-
+    def test_health_check_reports_smtp_ok_when_circuit_closed(self):
         response = self.client.get(reverse('health_check'))
 
         self.assertEqual(response.status_code, 200)
         payload = response.json()
         self.assertEqual(payload['checks']['smtp'], 'ok')
+        self.assertEqual(payload['checks']['smtp_circuit'], 'closed')
 
-    @patch('core.views.get_connection', side_effect=Exception('smtp down'))
+    @patch('reminders.circuit_breaker.CircuitBreaker.state', new_callable=PropertyMock, return_value='open')
     @patch('core.views.settings.HEALTH_CHECK_STRICT_SMTP', False)
     @patch('core.views.settings.EMAIL_HOST_PASSWORD', 'dummy-pass')
     @patch('core.views.settings.EMAIL_HOST_USER', 'dummy-user')
-    def test_health_check_does_not_fail_on_smtp_error_by_default(self, _mock_get):
+    def test_health_check_does_not_fail_on_open_circuit_by_default(self, _mock_state):
         response = self.client.get(reverse('health_check'))
 
         self.assertEqual(response.status_code, 200)
         payload = response.json()
         self.assertEqual(payload['checks']['smtp'], 'failed')
+        self.assertEqual(payload['checks']['smtp_circuit'], 'open')
 
-    @patch('core.views.get_connection', side_effect=Exception('smtp down'))
+    @patch('reminders.circuit_breaker.CircuitBreaker.state', new_callable=PropertyMock, return_value='open')
     @patch('core.views.settings.HEALTH_CHECK_STRICT_SMTP', True)
     @patch('core.views.settings.EMAIL_HOST_PASSWORD', 'dummy-pass')
     @patch('core.views.settings.EMAIL_HOST_USER', 'dummy-user')
-    def test_health_check_fails_when_strict_smtp_check_enabled(self, _mock_get):
+    def test_health_check_fails_on_open_circuit_when_strict_smtp_check_enabled(self, _mock_state):
         response = self.client.get(reverse('health_check'))
 
         self.assertEqual(response.status_code, 500)
@@ -6,15 +6,15 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.mail import get_connection
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_protect
 from django_ratelimit.decorators import ratelimit
 
+from reminders.circuit_breaker import smtp_breaker
 from reminders.models import Event
-from reminders.utils import send_upcoming_reminders
+from reminders.utils import send_local_time_reminders
 
 logger = logging.getLogger('app_logger')
 User = get_user_model()
@@ -47,18 +47,19 @@ def health_check(request):
         checks['database'] = 'failed'
         status_code = 500
 
-    # SMTP health is useful for observability, but is non-fatal by default
-    # so a third-party outage does not mark the app as down.
+    # SMTP health comes from the shared circuit breaker rather than a fresh
+    # connection per probe.  It is non-fatal by default so a third-party
+    # outage does not mark the app as down.
     if not getattr(settings, 'EMAIL_HOST_USER', '') or not getattr(settings, 'EMAIL_HOST_PASSWORD', ''):
         checks['smtp'] = 'skipped'
     else:
-        try:
-            connection = get_connection(timeout=getattr(settings, 'HEALTH_CHECK_SMTP_TIMEOUT', 5))
-            connection.open()
-            connection.close()
+        circuit = smtp_breaker.state
+        checks['smtp_circuit'] = circuit
+        if circuit == smtp_breaker.CLOSED:
             checks['smtp'] = 'ok'
-        except Exception as e:
-            logger.error(f"SMTP health check failed: {e}")
+        elif circuit == smtp_breaker.HALF_OPEN:
+            checks['smtp'] = 'degraded'
+        else:
             checks['smtp'] = 'failed'
             if getattr(settings, 'HEALTH_CHECK_STRICT_SMTP', False):
                 status_code = 500
@@ -79,7 +80,7 @@ def admin_tools(request):
         action = request.POST.get('action')
         if action == 'trigger_reminders':
             try:
-                result = send_upcoming_reminders()
+                result = send_local_time_reminders()
                 messages.success(request, f"Sent {result['sent_count']} of {result['total_events']} reminders")
             except Exception as e:
                 messages.error(request, f"Reminder trigger failed: {e}")
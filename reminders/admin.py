@@ -1,24 +1,31 @@
 # reminders/admin.py
+from django.conf import settings
 from django.contrib import admin
 from django_q.tasks import async_task
-from .models import Event, ReminderLog, EventMedia, Reflection
+from .models import EmailOutbox, Event, EventOccurrence, JobRun, ReminderLog, EventMedia, Reflection
 from django.utils.html import format_html
 
 @admin.action(description='Send Reminder Emails Manually')
 def send_reminders_now(modeladmin, request, queryset):
-    async_task('reminders.tasks.send_reminder_emails')
+    async_task('reminders.tasks.send_reminder_emails', timeout=settings.JOB_LEASE_SECONDS)
     modeladmin.message_user(request, "Reminder emails task has been queued.")
 
 @admin.action(description='Process Recurring Events Manually')
 def check_recurring_now(modeladmin, request, queryset):
-    async_task('reminders.tasks.check_recurring_events')
+    async_task('reminders.tasks.check_recurring_events', timeout=settings.JOB_LEASE_SECONDS)
     modeladmin.message_user(request, "Recurring events task has been queued.")
 
+class EventOccurrenceInline(admin.TabularInline):
+    model = EventOccurrence
+    extra = 0
+    readonly_fields = ('year', 'date', 'notified')
+
 class EventAdmin(admin.ModelAdmin):
     list_display = ('name', 'event_type', 'date', 'user', 'remind_days_before', 'notified', 'is_recurring', 'is_archived')
     list_filter = ('event_type', 'notified', 'is_recurring', 'is_archived', 'user')
     search_fields = ('name', 'user__username')
     actions = [send_reminders_now, check_recurring_now]
+    inlines = [EventOccurrenceInline]
 
 class ReminderLogAdmin(admin.ModelAdmin):
     list_display = ('user', 'event', 'colored_status', 'message', 'timestamp')
@@ -36,7 +43,7 @@ class EventMediaAdmin(admin.ModelAdmin):
     search_fields = ('event__name',)
 
 class ReflectionAdmin(admin.ModelAdmin):
-    list_display = ('event', 'user', 'note_preview', 'created_at', 'updated_at')
+    list_display = ('event', 'year', 'user', 'note_preview', 'created_at', 'updated_at')
     list_filter = ('created_at', 'user')
     search_fields = ('note', 'event__name', 'user__username')
 
@@ -44,7 +51,19 @@ class ReflectionAdmin(admin.ModelAdmin):
         return obj.note[:50] + '...' if len(obj.note) > 50 else obj.note
     note_preview.short_description = 'Note'
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('to_email', 'subject')
+
+class JobRunAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'started_at', 'duration_seconds', 'rows_scanned', 'rows_acted', 'holder')
+    list_filter = ('name', 'status')
+    readonly_fields = [field.name for field in JobRun._meta.fields]
+
 admin.site.register(Event, EventAdmin)
 admin.site.register(ReminderLog, ReminderLogAdmin)
 admin.site.register(EventMedia, EventMediaAdmin)
-admin.site.register(Reflection, ReflectionAdmin)
\ No newline at end of file
+admin.site.register(Reflection, ReflectionAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
+admin.site.register(JobRun, JobRunAdmin)
@@ -0,0 +1,95 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('app_logger')
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of contacting a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker whose state lives in the cache.
+
+    Keeping the state in the configured cache (Redis in production) means web
+    workers, django-q workers and cron processes all trip and recover
+    together.  The circuit opens after ``failure_threshold`` consecutive
+    failures, rejects calls for ``cooldown`` seconds, then half-opens and lets
+    exactly one caller probe the dependency: a success closes the circuit, a
+    failure opens it for another cool-down.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, cooldown=None):
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self.failures_key = f'circuit:{name}:failures'
+        self.open_until_key = f'circuit:{name}:open_until'
+        self.probe_key = f'circuit:{name}:probe'
+
+    @property
+    def failure_threshold(self):
+        return self._failure_threshold or getattr(settings, 'SMTP_CIRCUIT_FAILURE_THRESHOLD', 5)
+
+    @property
+    def cooldown(self):
+        return self._cooldown or getattr(settings, 'SMTP_CIRCUIT_COOLDOWN_SECONDS', 60)
+
+    @property
+    def state(self):
+        open_until = cache.get(self.open_until_key)
+        if open_until is None:
+            return self.CLOSED
+        if time.time() < open_until:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def is_open(self):
+        return self.state == self.OPEN
+
+    def allow_request(self):
+        """Return True if the caller may contact the dependency right now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        # Half-open: only the caller that wins the add() gets to probe
+        return cache.add(self.probe_key, 1, timeout=self.cooldown)
+
+    def record_success(self):
+        if cache.get(self.open_until_key) is not None:
+            logger.info(f"Circuit '{self.name}' closed after a successful probe")
+        cache.delete_many([self.failures_key, self.open_until_key, self.probe_key])
+
+    def record_failure(self):
+        if self.state != self.CLOSED:
+            self._trip()
+            return
+        cache.add(self.failures_key, 0, timeout=None)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            # Key evicted between add() and incr()
+            cache.set(self.failures_key, 1, timeout=None)
+            failures = 1
+        if failures >= self.failure_threshold:
+            self._trip()
+
+    def _trip(self):
+        cache.set(self.open_until_key, time.time() + self.cooldown, timeout=None)
+        cache.delete(self.probe_key)
+        logger.warning(f"Circuit '{self.name}' opened for {self.cooldown}s after repeated failures")
+
+    def reset(self):
+        cache.delete_many([self.failures_key, self.open_until_key, self.probe_key])
+
+
+smtp_breaker = CircuitBreaker('smtp')
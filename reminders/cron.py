@@ -1,30 +1,40 @@
 import logging
-from .utils import send_upcoming_reminders, send_deletion_notifications, cleanup_expired_media
+from django.conf import settings
+from .utils import send_local_time_reminders, send_deletion_notifications, cleanup_expired_media
+from .jobs import DELETION_NOTICE_JOB, MEDIA_CLEANUP_JOB, RECURRING_EVENTS_JOB, REMINDER_JOB, run_job
+from .models import JobRun
+from .outbox import drain_outbox
+from .renditions import backfill_renditions
+from .storage_reaper import drain_tombstones
+from .supabase_helpers import get_service_supabase_client
 from .tasks import check_recurring_events as _check_recurring
 
 logger = logging.getLogger('app_logger')
 
-def daily_reminder_job():
+def hourly_reminder_job(concurrency=None):
+    """Send reminders to the users whose local delivery hour has been reached."""
     try:
-        logger.info("Starting daily reminder job...")
-        result = send_upcoming_reminders()
-        logger.info(f"Daily reminder job completed: Sent {result['sent_count']} of {result['total_events']} reminders")
+        run = run_job(REMINDER_JOB, send_local_time_reminders, concurrency=concurrency, acted='sent_count')
+        if run.status == JobRun.STATUS_SUCCEEDED and run.result['total_events']:
+            logger.info(f"Hourly reminder job completed: Sent {run.result['sent_count']} of {run.result['total_events']} reminders")
     except Exception as e:
-        logger.error(f"Error in daily reminder job: {str(e)}")
+        logger.error(f"Error in hourly reminder job: {str(e)}")
 
 def daily_deletion_notification_job():
     try:
         logger.info("Starting daily deletion notification job...")
-        result = send_deletion_notifications()
-        logger.info(f"Daily deletion notification job completed: Sent {result['sent_count']} of {result['total_events']} notifications")
+        run = run_job(DELETION_NOTICE_JOB, send_deletion_notifications, acted='sent_count')
+        if run.status == JobRun.STATUS_SUCCEEDED:
+            logger.info(f"Daily deletion notification job completed: Sent {run.result['sent_count']} of {run.result['total_events']} notifications")
     except Exception as e:
         logger.error(f"Error in daily deletion notification job: {str(e)}")
 
 def daily_media_cleanup_job():
     try:
         logger.info("Starting daily media cleanup job...")
-        result = cleanup_expired_media()
-        logger.info(f"Daily media cleanup job completed: Deleted media for {result['deleted_count']} of {result['total_events']} events")
+        run = run_job(MEDIA_CLEANUP_JOB, cleanup_expired_media, acted='deleted_count')
+        if run.status == JobRun.STATUS_SUCCEEDED:
+            logger.info(f"Daily media cleanup job completed: Deleted media for {run.result['deleted_count']} of {run.result['total_events']} events")
     except Exception as e:
         logger.error(f"Error in daily media cleanup job: {str(e)}")
 
@@ -32,7 +42,38 @@ def daily_recurring_events_job():
     """Create next-year copies of recurring events whose date has passed."""
     try:
         logger.info("Starting daily recurring events job...")
-        result = _check_recurring()
-        logger.info(f"Daily recurring events job completed: {result}")
+        run = run_job(RECURRING_EVENTS_JOB, _check_recurring, acted='rolled_count')
+        if run.status == JobRun.STATUS_SUCCEEDED:
+            logger.info(f"Daily recurring events job completed: {run.result}")
     except Exception as e:
-        logger.error(f"Error in daily recurring events job: {str(e)}")
\ No newline at end of file
+        logger.error(f"Error in daily recurring events job: {str(e)}")
+
+def outbox_drain_job():
+    """Send queued emails that are due, including scheduled retries."""
+    try:
+        result = drain_outbox()
+        if any(result.values()):
+            logger.info(f"Outbox drain job completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in outbox drain job: {str(e)}")
+
+def storage_tombstone_job():
+    """Remove storage objects left behind by user-facing deletes."""
+    try:
+        result = drain_tombstones()
+        if any(result.values()):
+            logger.info(f"Storage tombstone job completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in storage tombstone job: {str(e)}")
+
+def media_rendition_job():
+    """Generate missing slideshow renditions for existing images, a batch per run."""
+    try:
+        supabase = get_service_supabase_client()
+        if supabase is None:
+            return
+        result = backfill_renditions(supabase, limit=settings.MEDIA_RENDITION_BATCH_SIZE)
+        if any(result.values()):
+            logger.info(f"Media rendition job completed: {result}")
+    except Exception as e:
+        logger.error(f"Error in media rendition job: {str(e)}")
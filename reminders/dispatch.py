@@ -0,0 +1,59 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .email_utils import BatchEmailSender
+
+logger = logging.getLogger('app_logger')
+
+
+def resolve_concurrency(concurrency=None):
+    """Clamp a requested worker count to ``1..REMINDER_MAX_CONCURRENCY``.
+
+    ``None`` falls back to the ``REMINDER_CONCURRENCY`` setting.
+    """
+    if concurrency is None:
+        concurrency = getattr(settings, 'REMINDER_CONCURRENCY', 1)
+    try:
+        concurrency = int(concurrency)
+    except (TypeError, ValueError):
+        concurrency = 1
+    return max(1, min(concurrency, getattr(settings, 'REMINDER_MAX_CONCURRENCY', 16)))
+
+
+def send_concurrently(messages, concurrency=None):
+    """Send *messages* with a bounded pool of workers.
+
+    Each worker thread owns its own :class:`BatchEmailSender`, so one slow or
+    failing recipient only holds up its own SMTP session.  Workers never touch
+    the database; callers render messages up front and record outcomes
+    afterwards.  Returns per-message results in input order (see
+    :meth:`BatchEmailSender.send`).
+    """
+    messages = list(messages)
+    workers = min(resolve_concurrency(concurrency), len(messages))
+    if workers <= 1:
+        with BatchEmailSender() as sender:
+            return sender.send_many(messages)
+
+    local = threading.local()
+    senders = []
+    senders_lock = threading.Lock()
+
+    def _send(message):
+        sender = getattr(local, 'sender', None)
+        if sender is None:
+            sender = local.sender = BatchEmailSender()
+            with senders_lock:
+                senders.append(sender)
+        return sender.send(message)
+
+    logger.info(f"Dispatching {len(messages)} emails with {workers} workers")
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='email-dispatch') as pool:
+            return list(pool.map(_send, messages))
+    finally:
+        for sender in senders:
+            sender.close()
@@ -0,0 +1,71 @@
+"""Cached rendering layer for transactional emails.
+
+The batch jobs render thousands of emails per run, so everything that does
+not depend on the recipient is computed once per process: compiled
+templates, the subject prefix and footer, and the header/badge blocks for
+each event type.  Plain-text bodies come from dedicated ``.txt`` templates
+rather than stripping tags out of the rendered HTML.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+
+@lru_cache(maxsize=None)
+def compiled_template(name):
+    """Return the compiled template *name*, loading it at most once per process."""
+    return get_template(name)
+
+
+def render(name, context):
+    return compiled_template(name).render(context)
+
+
+@lru_cache(maxsize=None)
+def common_blocks():
+    """Fragments shared by every reminder email regardless of event type."""
+    context = {'subject_prefix': settings.EMAIL_SUBJECT_PREFIX}
+    return {
+        **context,
+        'footer_html': mark_safe(render('emails/partials/reminder_footer.html', context)),
+        'footer_text': render('emails/partials/reminder_footer.txt', context),
+    }
+
+
+@lru_cache(maxsize=None)
+def static_blocks(event_type, event_type_label):
+    """Recipient-independent fragments shared by every reminder of one event type."""
+    context = {
+        **common_blocks(),
+        'event_type': event_type,
+        'event_type_label': event_type_label,
+    }
+    return {
+        **context,
+        'header_html': mark_safe(render('emails/partials/reminder_header.html', context)),
+    }
+
+
+def primary_media(event):
+    """Return the event's first media item, reusing prefetched ``media`` when present.
+
+    Mirrors ``event.media.first()`` without the extra query per email.
+    """
+    items = list(event.media.all())
+    return min(items, key=lambda media: media.pk) if items else None
+
+
+def clear_caches():
+    compiled_template.cache_clear()
+    common_blocks.cache_clear()
+    static_blocks.cache_clear()
+
+
+@receiver(setting_changed)
+def _clear_on_setting_change(setting, **kwargs):
+    if setting in ('TEMPLATES', 'EMAIL_SUBJECT_PREFIX'):
+        clear_caches()
@@ -1,10 +1,11 @@
 import logging
+import smtplib
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
-from tenacity import retry, stop_after_attempt, wait_fixed
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .circuit_breaker import CircuitOpenError
+from .email_rendering import common_blocks, primary_media, render, static_blocks
 
 logger = logging.getLogger('app_logger')
 
@@ -27,49 +28,51 @@ def _get_user_email(user):
 class ReminderEmailService:
     """Send transactional emails via configured Django SMTP backend.
 
-    NOTE: These methods intentionally re-raise exceptions so that the
-    ``@retry`` decorator from tenacity can detect failures and retry.
-    The caller (utils.py) is responsible for creating ReminderLog entries.
+    NOTE: The ``send_*`` methods make a single attempt and re-raise on
+    failure.  Retries are scheduled by the email outbox (see outbox.py)
+    rather than slept through inline, and the caller is responsible for
+    creating ReminderLog entries.
     """
 
     @staticmethod
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-    def send_reminder_email(user, event, custom_template=None, subject=None, extra_context=None):
-        """Send an upcoming-event reminder email.
+    def build_reminder_email(user, event, custom_template=None, subject=None, extra_context=None):
+        """Render an upcoming-event reminder without sending it.
 
-        Returns True on success.  Raises on failure so tenacity retries.
+        Returns an ``EmailMultiAlternatives`` ready for a connection, or None
+        when the user or event is missing.
         """
         if not user or not getattr(user, 'email', None):
-            logger.error("send_reminder_email: user is missing or has no email.")
-            return False
+            logger.error("build_reminder_email: user is missing or has no email.")
+            return None
         if not event:
-            logger.error("send_reminder_email: event is missing.")
-            return False
+            logger.error("build_reminder_email: event is missing.")
+            return None
 
         user_email = _get_user_email(user)
         username = getattr(user, 'username', 'User')
         event_name = getattr(event, 'name', 'Unknown Event')
+        static = static_blocks(event.event_type, event.get_event_type_display())
 
         context = {
+            **static,
             'user': user,
             'username': username,
             'event': event,
-            'subject_prefix': settings.EMAIL_SUBJECT_PREFIX,
             'remind_days_before': event.remind_days_before,
+            'primary_media': primary_media(event),
         }
         if extra_context:
             context.update(extra_context)
 
-        template = custom_template or 'emails/email_reminder.html'
-        html_content = render_to_string(template, context)
+        html_content = render(custom_template or 'emails/email_reminder.html', context)
+        text_content = render('emails/email_reminder_plain.txt', context)
 
         days = event.remind_days_before
         subject = subject or (
-            f"{settings.EMAIL_SUBJECT_PREFIX} Reminder: {event_name} is in "
+            f"{static['subject_prefix']} Reminder: {event_name} is in "
             f"{days} day{'s' if days != 1 else ''}!"
         )
 
-        text_content = strip_tags(html_content)
         msg = EmailMultiAlternatives(
             subject=subject,
             body=text_content,
@@ -77,34 +80,75 @@ class ReminderEmailService:
             to=[user_email],
         )
         msg.attach_alternative(html_content, 'text/html')
-        msg.send(fail_silently=False)
-
-        logger.info(f"Reminder email sent to {user_email} for event '{event_name}'")
-        return True
+        return msg
 
     @staticmethod
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-    def send_deletion_notification(user, event):
-        """Notify a user that media for an expired event will be cleaned up.
+    def build_reminder_digest(user, events):
+        """Render one reminder email listing every event in *events* for *user*.
 
-        Returns True on success.  Raises on failure so tenacity retries.
+        Returns an ``EmailMultiAlternatives`` or None when the user or events
+        are missing.
         """
         if not user or not getattr(user, 'email', None):
-            logger.error("send_deletion_notification: user is missing or has no email.")
+            logger.error("build_reminder_digest: user is missing or has no email.")
+            return None
+        if not events:
+            logger.error("build_reminder_digest: no events to include.")
+            return None
+
+        static = common_blocks()
+        entries = [
+            {
+                'event': event,
+                'event_type_label': event.get_event_type_display(),
+                'primary_media': primary_media(event),
+            }
+            for event in sorted(events, key=lambda event: (event.date, event.name))
+        ]
+        context = {**static, 'user': user, 'username': getattr(user, 'username', 'User'), 'entries': entries}
+
+        msg = EmailMultiAlternatives(
+            subject=f"{static['subject_prefix']} Reminder: {len(entries)} events coming up",
+            body=render('emails/reminder_digest.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[_get_user_email(user)],
+        )
+        msg.attach_alternative(render('emails/reminder_digest.html', context), 'text/html')
+        return msg
+
+    @staticmethod
+    def send_reminder_email(user, event, custom_template=None, subject=None, extra_context=None):
+        """Send an upcoming-event reminder email.
+
+        Returns True on success.  Raises on failure without retrying.
+        """
+        msg = ReminderEmailService.build_reminder_email(user, event, custom_template, subject, extra_context)
+        if msg is None:
             return False
+        msg.send(fail_silently=False)
+
+        logger.info(f"Reminder email sent to {msg.to[0]} for event '{event.name}'")
+        return True
+
+    @staticmethod
+    def build_deletion_notification(user, event):
+        """Render the media-deletion notice for an expired event without sending it."""
+        if not user or not getattr(user, 'email', None):
+            logger.error("build_deletion_notification: user is missing or has no email.")
+            return None
         if not event:
-            logger.error("send_deletion_notification: event is missing.")
-            return False
+            logger.error("build_deletion_notification: event is missing.")
+            return None
 
         user_email = _get_user_email(user)
         username = getattr(user, 'username', 'User')
         event_name = getattr(event, 'name', 'Unknown Event')
         event_type = event.get_event_type_display() if hasattr(event, 'get_event_type_display') else 'Event'
 
-        context = {'user': user, 'username': username, 'event': event}
+        context = {'user': user, 'username': username, 'event': event, 'primary_media': primary_media(event)}
 
-        html_content = render_to_string('emails/media_reminder.html', context)
-        text_content = render_to_string('emails/email_reminder.txt', context)
+        html_content = render('emails/media_reminder.html', context)
+        text_content = render('emails/email_reminder.txt', context)
 
         msg = EmailMultiAlternatives(
             subject=f"Media Deletion Notice for {event_name}'s {event_type}",
@@ -113,7 +157,142 @@ class ReminderEmailService:
             to=[user_email],
         )
         msg.attach_alternative(html_content, 'text/html')
+        return msg
+
+    @staticmethod
+    def send_deletion_notification(user, event):
+        """Notify a user that media for an expired event will be cleaned up.
+
+        Returns True on success.  Raises on failure without retrying.
+        """
+        msg = ReminderEmailService.build_deletion_notification(user, event)
+        if msg is None:
+            return False
         msg.send(fail_silently=False)
 
-        logger.info(f"Deletion notification sent to {user_email} for event '{event_name}'")
-        return True
\ No newline at end of file
+        logger.info(f"Deletion notification sent to {msg.to[0]} for event '{event.name}'")
+        return True
+
+    @staticmethod
+    def build_auto_share_email(event, share_url, password, expires_days=3):
+        """Render the greeting-card share email sent to an event's recipient."""
+        if not event or not event.recipient_email:
+            logger.error("build_auto_share_email: event is missing or has no recipient email.")
+            return None
+
+        context = {
+            'recipient_name': event.name,
+            'sender_name': event.user.username,
+            'event_type': event.get_event_type_display(),
+            'share_url': share_url,
+            'password': password,
+            'expires_days': expires_days,
+        }
+        msg = EmailMultiAlternatives(
+            subject=f"Greeting Card for {event.name}'s {event.get_event_type_display()}",
+            body='',  # Plain text body is empty as the card link lives in the HTML
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[event.recipient_email],
+        )
+        msg.attach_alternative(render('emails/auto_share_card.html', context), 'text/html')
+        return msg
+
+    @staticmethod
+    def build_media_removed_notice(user, event):
+        """Render the plain-text notice sent when media is removed from a past event."""
+        if not user or not getattr(user, 'email', None):
+            logger.error("build_media_removed_notice: user is missing or has no email.")
+            return None
+        return EmailMultiAlternatives(
+            subject=f"Media Removed from Past Event: {event.name}",
+            body=f"Media was removed from your past event '{event.name}' dated {event.date}.",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
+        )
+
+
+class BatchEmailSender:
+    """Push many messages through a single SMTP session.
+
+    Opening a connection costs a TCP connect, TLS handshake and AUTH, so the
+    batch jobs share one connection instead of paying that per message.  The
+    session is recycled every ``chunk_size`` messages (relays cap messages per
+    session) and re-opened transparently if the server drops it mid-batch.
+
+    Use as a context manager so the connection is always closed::
+
+        with BatchEmailSender() as sender:
+            for msg in messages:
+                sender.send(msg)
+    """
+
+    RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+    def __init__(self, connection=None, chunk_size=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self.chunk_size = max(1, chunk_size or getattr(settings, 'EMAIL_BATCH_SIZE', 50))
+        self._sent_in_session = 0
+        self._is_open = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def open(self):
+        if not self._is_open:
+            self.connection.open()
+            self._is_open = True
+            self._sent_in_session = 0
+
+    def close(self):
+        if self._is_open:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing SMTP connection: {e}")
+            self._is_open = False
+
+    def reconnect(self):
+        self.close()
+        self.open()
+
+    def _deliver(self, messages):
+        if self._sent_in_session >= self.chunk_size:
+            self.reconnect()
+        self.open()
+        try:
+            sent = self.connection.send_messages(messages)
+        except self.RECONNECT_ERRORS as e:
+            logger.warning(f"SMTP session dropped mid-batch ({e}); reconnecting")
+            self.reconnect()
+            sent = self.connection.send_messages(messages)
+        self._sent_in_session += len(messages)
+        return sent
+
+    def send(self, message):
+        """Send one message over the shared session.
+
+        Returns True on success and False on failure.  Returns None when the
+        SMTP circuit breaker refused the attempt, so callers can tell a message
+        that was never tried apart from one the relay rejected.
+        """
+        if message is None:
+            return False
+        try:
+            self._deliver([message])
+            return True
+        except CircuitOpenError:
+            self.close()
+            return None
+        except Exception as e:
+            logger.error(f"Failed to send email to {', '.join(message.to)}: {e}")
+            # Leave the session in a clean state for the next message
+            self.close()
+            return False
+
+    def send_many(self, messages):
+        """Send *messages* in order and return a list of per-message success flags."""
+        return [self.send(message) for message in messages]
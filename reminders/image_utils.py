@@ -0,0 +1,94 @@
+"""Pillow helpers for the images derived from uploaded photos."""
+import base64
+from io import BytesIO
+
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+# Square thumbnail edge in pixels; list grids draw it at 40-44 CSS px, so this covers 2x screens
+THUMBNAIL_SIZE = 96
+# Widths of the responsive slideshow renditions; originals are never upscaled
+RENDITION_WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+# Longest edge of the inline blurred preview painted before the photo loads
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 50
+
+
+class ImageProcessingError(ValueError):
+    """The upload could not be decoded as an image (e.g. SVG or a corrupt file)."""
+
+
+# EXIF orientations that swap width and height
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def open_image(source, min_width=None):
+    """Open *source* (a path or binary file object) upright and in an RGB-compatible mode.
+
+    Returns ``(image, (width, height))`` where the size is the upright size
+    of the original.  With *min_width*, JPEGs are decoded at the smallest
+    DCT scale that still leaves the upright image that wide, so a large
+    photo never has to be held in memory at full resolution.
+    """
+    try:
+        image = Image.open(source)
+        rotated = image.getexif().get(ExifTags.Base.Orientation) in _ROTATED_ORIENTATIONS
+        size = image.size[::-1] if rotated else image.size
+        if min_width:
+            image.draft(None, (1, min_width) if rotated else (min_width, 1))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ImageProcessingError(str(e)) from e
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image, size
+
+
+def encode_webp(image, quality=WEBP_QUALITY):
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def make_thumbnail(image, size=THUMBNAIL_SIZE):
+    """Return ``(webp_bytes, width, height)`` for a centre-cropped square thumbnail."""
+    thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    return encode_webp(thumb), thumb.width, thumb.height
+
+
+def make_width_renditions(image, original_width, widths=RENDITION_WIDTHS):
+    """Yield ``(webp_bytes, width, height)`` for each of *widths* narrower than the original.
+
+    *image* may be a reduced decode of an original *original_width* pixels
+    wide.  Widths are produced largest first, each resized from the
+    previous one, so the decoded image is only resampled once.
+    """
+    current = image
+    for width in sorted(widths, reverse=True):
+        if width >= original_width:
+            continue
+        height = max(1, round(image.height * width / image.width))
+        current = current.resize((width, height), Image.Resampling.LANCZOS)
+        yield encode_webp(current), width, height
+
+
+def make_placeholder(image, size=PLACEHOLDER_SIZE):
+    """Return ``(data_uri, '#rrggbb')``: a tiny WebP preview and the image's dominant colour."""
+    preview = image.copy()
+    preview.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    data_uri = 'data:image/webp;base64,' + base64.b64encode(encode_webp(preview, PLACEHOLDER_QUALITY)).decode('ascii')
+
+    palette = preview.convert('RGB').quantize(colors=4)
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3:index * 3 + 3]
+    return data_uri, f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def derived_path(path, label):
+    """Bucket path of the *label* rendition of the file at *path*.
+
+    Deterministic, so media rows that share an original also share its renditions.
+    """
+    folder, _, name = path.rpartition('/')
+    stem = name.rsplit('.', 1)[0]
+    return f"{folder}/renditions/{stem}-{label}.webp" if folder else f"renditions/{stem}-{label}.webp"
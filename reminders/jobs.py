@@ -0,0 +1,170 @@
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import JobRun
+
+logger = logging.getLogger('app_logger')
+
+# Lease names shared by every entry point (cron, commands, endpoints) that runs the same work
+REMINDER_JOB = 'send_reminders'
+AUTO_SHARE_JOB = 'auto_share_cards'
+DELETION_NOTICE_JOB = 'deletion_notifications'
+MEDIA_CLEANUP_JOB = 'media_cleanup'
+RECURRING_EVENTS_JOB = 'recurring_events'
+
+
+class JobLease:
+    """Cache-backed lease that lets only one process run a job at a time.
+
+    The lease is taken with an atomic ``cache.add`` so it works across web
+    workers, django-q workers and cron processes sharing the Redis cache.  It
+    expires on its own after ``ttl`` seconds, so a crashed holder never blocks
+    the job for longer than that.
+    """
+
+    def __init__(self, name, ttl=None):
+        self.key = f'job-lease:{name}'
+        self.ttl = ttl or getattr(settings, 'JOB_LEASE_SECONDS', 30 * 60)
+        self.token = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    def acquire(self):
+        return cache.add(self.key, self.token, timeout=self.ttl)
+
+    def holder(self):
+        return cache.get(self.key)
+
+    def renew(self):
+        """Push the lease expiry out by another ``ttl``; return False if it is no longer ours."""
+        if cache.get(self.key) != self.token:
+            return False
+        return bool(cache.touch(self.key, self.ttl))
+
+    def release(self):
+        # Only drop the lease if it is still ours (it may have expired and been re-taken)
+        if cache.get(self.key) == self.token:
+            cache.delete(self.key)
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired (or was taken over) before the run finished."""
+
+
+class _LeaseHeartbeat(threading.Thread):
+    """Renew *lease* every third of its ttl until stopped, so long runs keep it."""
+
+    def __init__(self, lease):
+        super().__init__(name=f'{lease.key}-heartbeat', daemon=True)
+        self.lease = lease
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(max(self.lease.ttl / 3, 1)):
+            if not self.lease.renew():
+                self.lost = True
+                logger.error(f"Lease {self.lease.key} was lost while the job was still running")
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _finish(run, started, status, result=None, error=''):
+    run.status = status
+    run.finished_at = timezone.now()
+    run.duration_seconds = round(time.monotonic() - started, 3)
+    run.error = error
+    if result is not None:
+        run.result = result if isinstance(result, dict) else {'value': str(result)}
+    run.save(update_fields=['status', 'finished_at', 'duration_seconds', 'rows_scanned', 'rows_acted', 'result', 'error'])
+
+
+def run_job(name, func, *args, scanned='total_events', acted=None, lease_seconds=None, run=None, **kwargs):
+    """Run ``func(*args, **kwargs)`` under the *name* lease and record it in the ledger.
+
+    *run* is an existing ``queued`` :class:`JobRun` to fill in, e.g. one
+    created by a trigger endpoint before handing the work to django-q.  If
+    the task is redelivered after *run* already finished it is returned as
+    is without running *func* again.
+    If another process holds a live lease the job is not run at all: a new
+    ``skipped`` :class:`JobRun` is recorded and returned straight away, and
+    *run* is left untouched.  The lease is renewed in the background while
+    *func* runs; if it was lost anyway the run is marked failed and
+    :class:`LeaseLost` is raised, since another process may have done the
+    same work.
+    Otherwise the run's start and end time, duration and outcome are stored,
+    with the *scanned* and *acted* keys of a dict result copied into
+    ``rows_scanned`` / ``rows_acted`` (an int result is taken as the rows
+    acted on).  Exceptions are recorded and re-raised.
+    Returns the :class:`JobRun`.
+    """
+    lease = JobLease(name, lease_seconds)
+    if not lease.acquire():
+        holder = lease.holder() or ''
+        logger.info(f"Job '{name}' skipped: lease held by {holder or 'another process'}")
+        # The skip gets its own row; a caller's queued run is left as it was
+        now = timezone.now()
+        return JobRun.objects.create(
+            name=name, status=JobRun.STATUS_SKIPPED, holder=holder,
+            started_at=now, finished_at=now, duration_seconds=0,
+        )
+
+    if run is None:
+        run = JobRun.objects.create(name=name, holder=lease.token)
+    else:
+        run.holder = lease.token
+        run.started_at = timezone.now()
+        # A redelivered task finds its run already finished; one still marked
+        # running lost its worker, since its lease was free for us to take
+        claimed = JobRun.objects.filter(
+            pk=run.pk, status__in=[JobRun.STATUS_QUEUED, JobRun.STATUS_RUNNING],
+        ).update(status=JobRun.STATUS_RUNNING, holder=run.holder, started_at=run.started_at)
+        if not claimed:
+            lease.release()
+            run.refresh_from_db()
+            logger.info(f"Job '{name}' run {run.pk} already {run.status}; ignoring redelivery")
+            return run
+        run.status = JobRun.STATUS_RUNNING
+    started = time.monotonic()
+    heartbeat = _LeaseHeartbeat(lease)
+    heartbeat.start()
+    try:
+        result = func(*args, **kwargs)
+        heartbeat.stop()
+        if heartbeat.lost or not lease.renew():
+            raise LeaseLost(f"Lease for job '{name}' expired before the run finished; another process may have run it too")
+    except Exception as e:
+        heartbeat.stop()
+        _finish(run, started, JobRun.STATUS_FAILED, error=str(e))
+        raise
+    finally:
+        lease.release()
+
+    if isinstance(result, dict):
+        run.rows_scanned = result.get(scanned) or 0
+        run.rows_acted = (result.get(acted) or 0) if acted else 0
+    elif isinstance(result, int):
+        run.rows_acted = result
+    _finish(run, started, JobRun.STATUS_SUCCEEDED, result=result)
+    logger.info(f"Job '{name}' finished in {run.duration_seconds}s: {run.rows_acted} of {run.rows_scanned} rows acted on")
+    return run
+
+
+def progress_reporter(run):
+    """Return a ``drain_outbox`` progress callback that stores live counts on *run*."""
+    def report(totals):
+        JobRun.objects.filter(pk=run.pk).update(
+            processed_count=sum(totals.values()),
+            sent_count=totals['sent'],
+            failed_count=totals['failed'],
+        )
+    return report
@@ -0,0 +1,34 @@
+import smtplib
+
+from django.core.mail.backends.smtp import EmailBackend
+
+from .circuit_breaker import CircuitOpenError, smtp_breaker
+
+
+class CircuitBreakerEmailBackend(EmailBackend):
+    """SMTP backend that consults the shared SMTP circuit breaker before connecting.
+
+    Every failed connection attempt counts towards tripping the breaker and
+    every successful one closes it.  While the circuit is open, ``open()``
+    fails immediately with :class:`CircuitOpenError` instead of waiting on a
+    relay that is known to be down.
+    """
+
+    def open(self):
+        if self.connection:
+            return False
+        if not smtp_breaker.allow_request():
+            if self.fail_silently:
+                return False
+            raise CircuitOpenError('SMTP circuit is open; skipping connection attempt')
+        try:
+            opened = super().open()
+        except (OSError, smtplib.SMTPException):
+            smtp_breaker.record_failure()
+            raise
+        if opened:
+            smtp_breaker.record_success()
+        else:
+            # fail_silently swallowed the error
+            smtp_breaker.record_failure()
+        return opened
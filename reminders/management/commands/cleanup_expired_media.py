@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 
+from reminders.jobs import MEDIA_CLEANUP_JOB, run_job
+from reminders.models import JobRun
 from reminders.utils import cleanup_expired_media
 
 
@@ -8,7 +10,11 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         try:
-            result = cleanup_expired_media()
+            run = run_job(MEDIA_CLEANUP_JOB, cleanup_expired_media, acted='deleted_count')
+            if run.status == JobRun.STATUS_SKIPPED:
+                self.stdout.write(self.style.WARNING(f"Skipped: already running elsewhere ({run.holder})"))
+                return
+            result = run.result
             self.stdout.write(self.style.SUCCESS(
                 f"Deleted media for {result['deleted_count']} of {result['total_events']} events"
             ))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reminders.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox, optionally as a long-running worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep draining until interrupted.')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds to sleep between empty polls.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows claimed per batch.')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Number of SMTP workers (defaults to REMINDER_CONCURRENCY).',
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            while True:
+                result = drain_outbox(batch_size=kwargs['batch_size'], concurrency=kwargs['concurrency'])
+                if not kwargs['loop']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Sent {result['sent']} emails ({result['retrying']} rescheduled, {result['failed']} failed)"
+                    ))
+                    return
+                close_old_connections()
+                if not any(result.values()):
+                    time.sleep(kwargs['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Outbox worker stopped")
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Error: {e}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from reminders.renditions import backfill_renditions
+from reminders.supabase_helpers import get_service_supabase_client
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and slideshow renditions for image media that is missing them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Process at most this many media rows.')
+
+    def handle(self, *args, **kwargs):
+        try:
+            supabase = get_service_supabase_client()
+            if supabase is None:
+                self.stderr.write(self.style.ERROR("Error: storage client unavailable"))
+                return
+            result = backfill_renditions(supabase, limit=kwargs['limit'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Generated renditions for {result['processed']} media ({result['failed']} failed)"
+            ))
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Error: {e}"))
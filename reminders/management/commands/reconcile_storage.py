@@ -0,0 +1,118 @@
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reminders.storage_manifest import LIST_PAGE_SIZE, StorageManifest, walk_bucket
+from reminders.storage_reaper import remove_batches
+from reminders.supabase_helpers import get_service_supabase_client
+
+logger = logging.getLogger('app_logger')
+
+
+def _modified_before(mtime, cutoff):
+    try:
+        return datetime.fromisoformat(mtime) < cutoff
+    except (TypeError, ValueError):
+        # Unknown age: treat as recent so an in-flight upload is never removed
+        return False
+
+
+class Command(BaseCommand):
+    help = 'Remove storage objects in the media bucket that no EventMedia row references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report orphans without removing them.')
+        parser.add_argument(
+            '--manifest',
+            default=None,
+            help='SQLite file for the manifest (defaults to a temporary file removed afterwards).',
+        )
+        parser.add_argument('--page-size', type=int, default=LIST_PAGE_SIZE, help='Objects per listing page.')
+        parser.add_argument(
+            '--min-age-hours',
+            type=int,
+            default=24,
+            help='Only remove orphans older than this, so uploads still being saved are left alone.',
+        )
+        parser.add_argument(
+            '--allow-missing',
+            action='store_true',
+            help='Remove orphans even when some referenced paths are missing from the listing.',
+        )
+
+    def handle(self, *args, **kwargs):
+        try:
+            supabase = get_service_supabase_client()
+            if supabase is None:
+                self.stderr.write(self.style.ERROR("Error: storage client unavailable"))
+                return
+
+            filename = kwargs['manifest']
+            if filename is None:
+                handle, filename = tempfile.mkstemp(prefix='storage-manifest-', suffix='.sqlite3')
+                os.close(handle)
+            manifest = StorageManifest(filename)
+            try:
+                self._reconcile(supabase, manifest, kwargs)
+            finally:
+                manifest.close()
+                if kwargs['manifest'] is None:
+                    os.remove(filename)
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f"Error: {e}"))
+
+    def _reconcile(self, supabase, manifest, kwargs):
+        listed = manifest.add_objects(walk_bucket(supabase, kwargs['page_size']))
+        referenced = manifest.add_references()
+        logger.info(f"reconcile_storage: {listed} objects listed, {referenced} paths referenced")
+
+        # Missing references mean the listing and the stored URLs disagree on
+        # naming, in which case the "orphans" may well be live files.
+        missing = manifest.missing_count()
+        refused = bool(missing) and not kwargs['dry_run'] and not kwargs['allow_missing']
+        if refused:
+            self.stderr.write(self.style.ERROR(
+                f"Error: {missing} referenced paths are missing from storage; "
+                "not removing anything (re-run with --allow-missing to override)"
+            ))
+        dry_run = kwargs['dry_run'] or refused
+
+        cutoff = timezone.now() - timedelta(hours=kwargs['min_age_hours'])
+        batch_size = settings.STORAGE_REMOVE_BATCH_SIZE
+        concurrency = settings.STORAGE_REMOVE_CONCURRENCY
+        counts = {'orphan': 0, 'missing': 0, 'recent': 0, 'removed': 0}
+        batches = [[]]
+
+        def flush():
+            full = [batch for batch in batches if batch]
+            if full and not dry_run:
+                for batch, ok in zip(full, remove_batches(supabase, full, concurrency)):
+                    counts['removed'] += len(batch) if ok else 0
+            batches[:] = [[]]
+
+        for kind, path, size, mtime in manifest.diff():
+            if kind == 'missing':
+                counts['missing'] += 1
+                continue
+            if not _modified_before(mtime, cutoff):
+                counts['recent'] += 1
+                continue
+            counts['orphan'] += 1
+            batches[-1].append(path)
+            if len(batches[-1]) == batch_size:
+                if len(batches) == concurrency:
+                    flush()
+                else:
+                    batches.append([])
+        flush()
+
+        action = 'Found' if dry_run else f"Removed {counts['removed']} of"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {counts['orphan']} orphaned objects out of {listed} "
+            f"({counts['recent']} too recent to remove, {counts['missing']} referenced paths missing from storage)"
+        ))
@@ -0,0 +1,142 @@
+import logging
+import math
+import random
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from reminders.models import JobRun
+
+logger = logging.getLogger('app_logger')
+
+
+class ScheduledJob:
+    """One ``SCHEDULER_JOBS`` entry.
+
+    Jobs anchored *at* an ``'HH:MM'`` wall-clock time (``TIME_ZONE``) run in
+    the slots ``at + k * interval``; unanchored jobs every *interval* seconds
+    from their first run.  Each run starts up to *jitter* seconds after its
+    slot, and the next slot is counted from the previous slot rather than
+    from when the run started, so jitter and run time never accumulate.
+    """
+
+    def __init__(self, ledger_name, path, interval, jitter, at=None):
+        self.ledger_name = ledger_name
+        self.path = path
+        self.func = import_string(path)
+        self.interval = interval
+        self.jitter = jitter
+        self.at = at
+        self.slot = None
+        self.next_run = None
+
+    def _origin(self, moment):
+        if self.at is None:
+            return self.slot or moment
+        hour, minute = (int(part) for part in self.at.split(':'))
+        return timezone.localtime(moment).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+    def _slot_after(self, moment):
+        """Return the first slot strictly after *moment*."""
+        origin = self._origin(moment)
+        periods = math.floor((moment - origin).total_seconds() / self.interval) + 1
+        return origin + timedelta(seconds=periods * self.interval)
+
+    def _plan(self, slot):
+        self.slot = slot
+        self.next_run = slot + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def schedule_next(self, now):
+        """Plan the first slot after *now*; slots missed by a long run are skipped."""
+        self._plan(self._slot_after(now))
+
+    def resume(self, now):
+        """Continue the cadence recorded in the JobRun ledger.
+
+        The slot after the last recorded run is planned even if it is already
+        past, so a day missed while the scheduler was down is caught up once.
+        Without a ledger entry anchored jobs wait for their next slot and
+        unanchored ones run now.
+        """
+        last = None
+        if self.ledger_name:
+            last = (
+                JobRun.objects.filter(name=self.ledger_name)
+                .exclude(status=JobRun.STATUS_SKIPPED)
+                .values_list('started_at', flat=True)
+                .first()
+            )
+        if last is None:
+            self._plan(now if self.at is None else self._slot_after(now))
+            return
+        # The slot nearest the last start is the one that run covered
+        covered = last if self.at is None else self._slot_after(last - timedelta(seconds=self.interval / 2))
+        self._plan(covered + timedelta(seconds=self.interval))
+
+
+class Command(BaseCommand):
+    help = 'Run all periodic jobs from one resident process (replaces the per-job cron services).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit.')
+        parser.add_argument(
+            '--max-sleep',
+            type=int,
+            default=60,
+            help='Longest pause between schedule checks, in seconds.',
+        )
+
+    def handle(self, *args, **kwargs):
+        self._stopping = False
+        previous = {sig: signal.signal(sig, self._stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            self._loop(kwargs)
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+        self.stdout.write(self.style.SUCCESS("Scheduler stopped"))
+
+    def _loop(self, kwargs):
+        now = timezone.now()
+        jobs = [ScheduledJob(*entry) for entry in settings.SCHEDULER_JOBS]
+        for job in jobs:
+            job.resume(now)
+            anchor = f" from {job.at}" if job.at else ''
+            self.stdout.write(f"{job.path}: every {job.interval}s{anchor}, next at {job.next_run:%Y-%m-%d %H:%M:%S}")
+
+        while not self._stopping:
+            now = timezone.now()
+            for job in jobs:
+                if job.next_run <= now and not self._stopping:
+                    self._run(job)
+            if kwargs['once']:
+                break
+            next_run = min(job.next_run for job in jobs)
+            pause = (next_run - timezone.now()).total_seconds()
+            self._sleep(min(max(pause, 1), kwargs['max_sleep']))
+
+    def _run(self, job):
+        try:
+            # Drop connections the database closed while we were idle; healthy ones are reused
+            close_old_connections()
+            job.func()
+        except Exception as e:
+            logger.error(f"Scheduled job {job.path} failed: {e}")
+        finally:
+            close_old_connections()
+            job.schedule_next(timezone.now())
+
+    def _sleep(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self._stopping and time.monotonic() < deadline:
+            time.sleep(min(1, deadline - time.monotonic()))
+
+    def _stop(self, signum, frame):
+        logger.info(f"Scheduler received signal {signum}; stopping after the current job")
+        self._stopping = True
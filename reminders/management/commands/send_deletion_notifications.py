@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 
+from reminders.jobs import DELETION_NOTICE_JOB, run_job
+from reminders.models import JobRun
 from reminders.utils import send_deletion_notifications
 
 
@@ -8,7 +10,11 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         try:
-            result = send_deletion_notifications()
+            run = run_job(DELETION_NOTICE_JOB, send_deletion_notifications, acted='sent_count')
+            if run.status == JobRun.STATUS_SKIPPED:
+                self.stdout.write(self.style.WARNING(f"Skipped: already running elsewhere ({run.holder})"))
+                return
+            result = run.result
             self.stdout.write(self.style.SUCCESS(
                 f"Sent {result['sent_count']} of {result['total_events']} deletion notifications"
             ))
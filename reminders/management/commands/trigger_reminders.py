@@ -1,16 +1,108 @@
-from django.core.management.base import BaseCommand
+import json
+import subprocess
+import sys
+from pathlib import Path
 
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reminders.jobs import REMINDER_JOB, run_job
+from reminders.models import JobRun
 from reminders.utils import send_upcoming_reminders
+from users.models import UserProfile
 
 
 class Command(BaseCommand):
     help = 'Manually trigger sending of upcoming event reminders'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Number of SMTP workers (defaults to REMINDER_CONCURRENCY).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Split the run across this many processes, each handling a disjoint slice of users.',
+        )
+        parser.add_argument('--shard', type=int, default=None, help='Slice handled by this process (0-based).')
+        parser.add_argument('--shards', type=int, default=None, help='Total number of slices.')
+        parser.add_argument('--json', action='store_true', help='Print the result as one JSON line (used by shard processes).')
+
     def handle(self, *args, **kwargs):
         try:
-            result = send_upcoming_reminders()
-            self.stdout.write(self.style.SUCCESS(
-                f"Sent {result['sent_count']} of {result['total_events']} reminders"
-            ))
+            if kwargs['shards']:
+                # Shard processes run under the lease held by their parent
+                result = send_upcoming_reminders(
+                    concurrency=kwargs['concurrency'], local_time=True,
+                    shard=kwargs['shard'], shards=kwargs['shards'],
+                )
+            else:
+                run = run_job(REMINDER_JOB, self._run, kwargs, acted='sent_count')
+                if run.status == JobRun.STATUS_SKIPPED:
+                    self.stdout.write(self.style.WARNING(f"Skipped: already running elsewhere ({run.holder})"))
+                    return
+                result = run.result
         except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Error: {e}"))
\ No newline at end of file
+            if kwargs['shards']:
+                # The parent relies on the exit code to spot a failed shard
+                raise CommandError(f"Shard {kwargs['shard']} failed: {e}")
+            self.stderr.write(self.style.ERROR(f"Error: {e}"))
+            return
+
+        if kwargs['json']:
+            self.stdout.write(json.dumps(result))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {result['sent_count']} of {result['total_events']} reminders"
+        ))
+        if result.get('failed_shards'):
+            raise CommandError(f"{result['failed_shards']} of {kwargs['workers']} shards failed")
+
+    def _run(self, kwargs):
+        # Reminders always go out at each user's local delivery hour
+        UserProfile.refresh_utc_offsets()
+        if kwargs['workers'] > 1:
+            return self._run_workers(kwargs)
+        return send_upcoming_reminders(concurrency=kwargs['concurrency'], local_time=True)
+
+    def _run_workers(self, kwargs):
+        """Spawn one ``--shard`` process per worker, wait for all of them and sum their counts.
+
+        Each process opens its own database and SMTP connections, commits
+        its own results and reports them as one JSON line; row locks taken
+        while queueing keep the slices from ever emailing the same event
+        twice.  A shard that exits non-zero is counted as failed and makes the
+        whole command fail.
+        """
+        workers = kwargs['workers']
+        command = [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'trigger_reminders', '--json']
+        if kwargs['concurrency']:
+            command += ['--concurrency', str(kwargs['concurrency'])]
+        processes = [
+            subprocess.Popen(
+                command + ['--shard', str(shard), '--shards', str(workers)],
+                # Shard logs go straight to our stderr; only the JSON result is captured
+                stdout=subprocess.PIPE, text=True,
+            )
+            for shard in range(workers)
+        ]
+
+        result = {'sent_count': 0, 'queued_count': 0, 'total_events': 0, 'failed_shards': 0}
+        for shard, process in enumerate(processes):
+            out, _ = process.communicate()
+            try:
+                summary = json.loads((out or '').strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                summary = None
+            if process.returncode != 0 or not isinstance(summary, dict):
+                result['failed_shards'] += 1
+                self.stderr.write(self.style.ERROR(f"Shard {shard} failed (exit code {process.returncode})"))
+                continue
+            self.stdout.write(f"Shard {shard}: sent {summary['sent_count']} of {summary['total_events']} reminders")
+            for key in ('sent_count', 'queued_count', 'total_events'):
+                result[key] += summary.get(key, 0)
+        return result
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:36
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_fire_on(apps, schema_editor):
+    Event = apps.get_model('reminders', 'Event')
+    pending = Event.objects.filter(notified=False).only('id', 'date', 'remind_days_before')
+    batch = []
+    for event in pending.iterator(chunk_size=2000):
+        event.fire_on = event.date - timedelta(days=event.remind_days_before or 0)
+        batch.append(event)
+        if len(batch) >= 2000:
+            Event.objects.bulk_update(batch, ['fire_on'])
+            batch = []
+    if batch:
+        Event.objects.bulk_update(batch, ['fire_on'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0028_eventmedia_video_support'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='fire_on',
+            field=models.DateField(blank=True, db_index=True, help_text='Date the pending reminder becomes due; cleared once it has been sent.', null=True),
+        ),
+        migrations.RunPython(backfill_fire_on, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0030_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailoutbox',
+            name='event_ids',
+            field=models.JSONField(blank=True, default=list, help_text='Events covered by a reminder digest.'),
+        ),
+        migrations.AlterField(
+            model_name='emailoutbox',
+            name='kind',
+            field=models.CharField(choices=[('reminder', 'Reminder'), ('reminder_digest', 'Reminder digest'), ('deletion_notice', 'Deletion notice'), ('auto_share', 'Auto-share card'), ('media_removed', 'Media removed')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0036_storagetombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmedia',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventmedia',
+            name='thumbnail_height',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventmedia',
+            name='thumbnail_url',
+            field=models.URLField(blank=True, max_length=1000),
+        ),
+        migrations.AddField(
+            model_name='eventmedia',
+            name='thumbnail_width',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eventmedia',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0037_eventmedia_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmedia',
+            name='renditions',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
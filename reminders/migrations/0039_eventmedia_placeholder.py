@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0038_eventmedia_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmedia',
+            name='dominant_color',
+            field=models.CharField(blank=True, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='eventmedia',
+            name='placeholder',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:35
+
+from django.db import migrations, models
+
+
+def mark_queued_reminders(apps, schema_editor):
+    Event = apps.get_model('reminders', 'Event')
+    EmailOutbox = apps.get_model('reminders', 'EmailOutbox')
+    in_flight = EmailOutbox.objects.filter(
+        kind__in=['reminder', 'reminder_digest'], status__in=['pending', 'sending'],
+    ).values_list('event_id', 'event_ids')
+    ids = set()
+    for event_id, event_ids in in_flight.iterator(chunk_size=2000):
+        if event_id:
+            ids.add(event_id)
+        ids.update(event_ids or [])
+    Event.objects.filter(id__in=ids, notified=False).update(reminder_queued=True, fire_on=None)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0039_eventmedia_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='reminder_queued',
+            field=models.BooleanField(default=False, help_text='A reminder email for this date is in the outbox and not yet delivered or given up on.'),
+        ),
+        migrations.RunPython(mark_queued_reminders, migrations.RunPython.noop),
+    ]
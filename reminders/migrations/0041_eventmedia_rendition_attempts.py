@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0040_event_reminder_queued'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmedia',
+            name='rendition_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:10
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_reflection_year(apps, schema_editor):
+    Reflection = apps.get_model('reminders', 'Reflection')
+    today = timezone.localdate()
+    batch = []
+    for reflection in Reflection.objects.select_related('event').iterator(chunk_size=2000):
+        event_date = reflection.event.date
+        # Reflections are only added to past events, so one on a recurring
+        # row already moved on to its next date is about the previous year
+        reflection.year = event_date.year if event_date < today else event_date.year - 1
+        batch.append(reflection)
+        if len(batch) >= 2000:
+            Reflection.objects.bulk_update(batch, ['year'])
+            batch = []
+    if batch:
+        Reflection.objects.bulk_update(batch, ['year'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reminders', '0041_eventmedia_rendition_attempts'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='eventoccurrence',
+            name='deletion_notified',
+        ),
+        migrations.RemoveConstraint(
+            model_name='reflection',
+            name='unique_reflection_per_event',
+        ),
+        migrations.AddField(
+            model_name='reflection',
+            name='year',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_reflection_year, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reflection',
+            name='year',
+            field=models.PositiveSmallIntegerField(),
+        ),
+        migrations.AlterModelOptions(
+            name='reflection',
+            options={'ordering': ['-year']},
+        ),
+        migrations.AddConstraint(
+            model_name='reflection',
+            constraint=models.UniqueConstraint(fields=('user', 'event', 'year'), name='unique_reflection_per_occurrence'),
+        ),
+    ]
@@ -2,6 +2,7 @@ import json
 import logging
 import secrets
 import uuid
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -40,6 +41,16 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     notified = models.BooleanField(default=False)
+    fire_on = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text="Date the pending reminder becomes due; cleared once it has been sent."
+    )
+    reminder_queued = models.BooleanField(
+        default=False,
+        help_text="A reminder email for this date is in the outbox and not yet delivered or given up on."
+    )
     deletion_notified = models.BooleanField(default=False)
     deletion_scheduled = models.DateTimeField(null=True, blank=True)
     media_url = models.URLField(max_length=1000, blank=True, null=True)
@@ -269,12 +280,28 @@ class Event(models.Model):
             return []
         return [p.strip() for p in self.sacred_promises.split('\n') if p.strip()]
 
-    def save(self, *args, **kwargs):
-        """Override save to auto-set card_password and recurring flag."""
+    def compute_fire_on(self):
+        """Return the date the pending reminder should fire, or None if nothing is pending.
+
+        A reminder already in the outbox counts as sent, so saving the event
+        while it waits for delivery or a retry does not schedule another.
+        """
+        if self.notified or self.reminder_queued or not self.date:
+            return None
+        return self.date - timedelta(days=self.remind_days_before or 0)
+
+    def apply_save_defaults(self):
+        """Fill in the fields ``save()`` derives: recurring flag, reminder schedule and card password.
+
+        Also used to prepare rows for ``bulk_create``, which bypasses ``save()``.
+        """
         # Set recurring flag based on event type
         if self.event_type not in ['birthday', 'anniversary', 'raksha_bandhan']:
             self.is_recurring = False
 
+        # Keep the reminder schedule in step with the fields it is derived from
+        self.fire_on = self.compute_fire_on()
+
         # Auto-set card password if not already set
         if not self.card_password:
             password_handlers = {
@@ -293,6 +320,13 @@ class Event(models.Model):
                     logger.error(f"[Event: {self.event_type} ID: {self.id}] Failed to set card password: {str(e)}")
                     raise
 
+    def save(self, *args, **kwargs):
+        """Override save to auto-set card_password, recurring flag and reminder schedule."""
+        self.apply_save_defaults()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'remind_days_before', 'notified', 'reminder_queued'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'fire_on'}
+
         super().save(*args, **kwargs)
 
     def _set_birthday_password(self):
@@ -341,6 +375,22 @@ class EventMedia(models.Model):
     media_type = models.CharField(max_length=20, choices=MEDIA_TYPES)
     mime_type = models.CharField(max_length=50, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Image renditions generated by reminders.renditions
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    thumbnail_url = models.URLField(max_length=1000, blank=True)
+    thumbnail_width = models.PositiveSmallIntegerField(null=True, blank=True)
+    thumbnail_height = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Width-bucketed WebP copies for the card slideshow: [{'width', 'height', 'url'}], narrowest first
+    renditions = models.JSONField(default=list, blank=True)
+    # Inline preview (base64 data URI) and '#rrggbb' colour painted while the image loads
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+    # Failed background rendition attempts; the backfill gives up after RENDITION_MAX_ATTEMPTS
+    rendition_attempts = models.PositiveSmallIntegerField(default=0)
+
+    # Fields holding URLs of files in storage, original first; list fields hold rendition dicts
+    FILE_FIELDS = ('media_file', 'thumbnail_url', 'renditions')
 
     class Meta:
         constraints = [
@@ -353,6 +403,46 @@ class EventMedia(models.Model):
     def __str__(self):
         return f"{self.media_type} for {self.event}"
 
+    def file_urls(self):
+        """URLs of the original file and every rendition stored for it."""
+        urls = []
+        for field in self.FILE_FIELDS:
+            value = getattr(self, field)
+            if isinstance(value, list):
+                urls.extend(item['url'] for item in value if item.get('url'))
+            elif value:
+                urls.append(value)
+        return urls
+
+    def srcset(self):
+        """``srcset`` value offering the WebP renditions alongside the original."""
+        candidates = [f"{item['url']} {item['width']}w" for item in self.renditions or []]
+        if candidates and self.width:
+            candidates.append(f"{self.media_file} {self.width}w")
+        return ', '.join(candidates)
+
+
+class EventOccurrence(models.Model):
+    """A past year of a recurring event.
+
+    A recurring event is a single master row whose ``date`` is its next
+    occurrence.  When that date passes the rollover records the year here
+    and moves the master on, rather than copying the whole row every year.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrences')
+    year = models.PositiveSmallIntegerField()
+    date = models.DateField()
+    notified = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'year'], name='unique_occurrence_per_year')
+        ]
+
+    def __str__(self):
+        return f"{self.event.name} {self.year}"
+
 
 class CelebrationCardPage(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='card_pages')
@@ -404,13 +494,16 @@ class ImportLog(models.Model):
 class Reflection(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reflections')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='reflections')
+    # Year of the occurrence reflected on; a recurring event gets one reflection per year
+    year = models.PositiveSmallIntegerField()
     note = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        ordering = ['-year']
         constraints = [
-            models.UniqueConstraint(fields=['user', 'event'], name='unique_reflection_per_event')
+            models.UniqueConstraint(fields=['user', 'event', 'year'], name='unique_reflection_per_occurrence')
         ]
 
     def __str__(self):
@@ -445,4 +538,128 @@ class CardShare(models.Model):
 
     @staticmethod
     def generate_random_password():
-        return secrets.token_urlsafe(8)
\ No newline at end of file
+        return secrets.token_urlsafe(8)
+
+class EmailOutbox(models.Model):
+    """A queued outbound email, drained by ``reminders.outbox.drain_outbox``.
+
+    Jobs only insert rows here; sending, retries and the follow-up database
+    writes (``ReminderLog``, status flags) happen in the drain worker.
+    """
+    KIND_REMINDER = 'reminder'
+    KIND_REMINDER_DIGEST = 'reminder_digest'
+    KIND_DELETION_NOTICE = 'deletion_notice'
+    KIND_AUTO_SHARE = 'auto_share'
+    KIND_MEDIA_REMOVED = 'media_removed'
+    KINDS = [
+        (KIND_REMINDER, 'Reminder'),
+        (KIND_REMINDER_DIGEST, 'Reminder digest'),
+        (KIND_DELETION_NOTICE, 'Deletion notice'),
+        (KIND_AUTO_SHARE, 'Auto-share card'),
+        (KIND_MEDIA_REMOVED, 'Media removed'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUSES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KINDS)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='outbox_emails')
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_emails')
+    event_ids = models.JSONField(default=list, blank=True,
+                                 help_text="Events covered by a reminder digest.")
+    card_share = models.ForeignKey('CardShare', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='outbox_emails')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField(blank=True)
+    body_html = models.TextField(blank=True)
+    log_label = models.CharField(max_length=100, blank=True,
+                                 help_text="ReminderLog message prefix, e.g. '1-day reminder'.")
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} email to {self.to_email} ({self.status})"
+
+
+class StorageTombstone(models.Model):
+    """A storage object waiting to be removed by ``reminders.storage_reaper.drain_tombstones``.
+
+    User-facing deletes only insert rows here, so they never wait on storage.
+    """
+    path = models.CharField(max_length=1000)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
+
+
+class JobRun(models.Model):
+    """Ledger entry for one run of a scheduled job (see ``reminders.jobs``)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_SKIPPED = 'skipped'
+    STATUSES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_SKIPPED, 'Skipped (lease held elsewhere)'),
+    ]
+
+    name = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUSES, default=STATUS_RUNNING)
+    holder = models.CharField(max_length=255, blank=True, help_text="host:pid that held the lease.")
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_seconds = models.FloatField(null=True, blank=True)
+    rows_scanned = models.PositiveIntegerField(default=0)
+    rows_acted = models.PositiveIntegerField(default=0)
+    # Live progress of the email phase, updated after every outbox batch
+    processed_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['name', 'started_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.status} at {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class JobWatermark(models.Model):
+    """How far an incremental job has got, so its next run can skip work already done."""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField(null=True, blank=True, help_text="Start of the last successful run.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} at {self.position}"
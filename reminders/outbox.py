@@ -0,0 +1,318 @@
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .circuit_breaker import smtp_breaker
+from .dispatch import send_concurrently
+from .models import CardShare, EmailOutbox, Event, ReminderLog
+
+logger = logging.getLogger('app_logger')
+
+
+class OutcomeBuffer:
+    """Collect per-event delivery outcomes and write them to the database in bulk.
+
+    ``ReminderLog`` rows go through ``bulk_create`` and the status flags in
+    *success_updates* are applied to every succeeded event with a single
+    ``UPDATE ... WHERE id IN (...)``, instead of a create and a full
+    ``Event.save()`` per event.  *success_filter* narrows that update to
+    events still in the given state.
+    """
+
+    def __init__(self, success_updates=None, flush_size=None, success_filter=None):
+        self.success_updates = success_updates
+        self.success_filter = success_filter or {}
+        self.flush_size = flush_size or getattr(settings, 'REMINDER_FLUSH_SIZE', 200)
+        self.logs = []
+        self.succeeded_ids = []
+
+    def record(self, event, success, message):
+        self.record_many(event.user_id, [event.id], success, message)
+
+    def record_many(self, user_id, event_ids, success, message):
+        """Record one outcome shared by several events of the same user, e.g. a digest."""
+        for event_id in event_ids:
+            self.logs.append(ReminderLog(
+                user_id=user_id,
+                event_id=event_id,
+                status='success' if success else 'failure',
+                message=message,
+            ))
+        if success:
+            self.succeeded_ids.extend(event_ids)
+        if len(self.logs) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self.logs:
+            return
+        with transaction.atomic():
+            ReminderLog.objects.bulk_create(self.logs)
+            if self.succeeded_ids and self.success_updates:
+                Event.objects.filter(id__in=self.succeeded_ids, **self.success_filter).update(
+                    updated_at=timezone.now(), **self.success_updates
+                )
+        self.logs = []
+        self.succeeded_ids = []
+
+
+def outbox_row(message, kind, *, user=None, event=None, event_ids=None, card_share=None, log_label=''):
+    """Build an unsaved ``EmailOutbox`` row from a rendered email message."""
+    body_html = ''
+    for content, mimetype in getattr(message, 'alternatives', []):
+        if mimetype == 'text/html':
+            body_html = content
+            break
+    return EmailOutbox(
+        kind=kind,
+        user=user,
+        event=event,
+        event_ids=event_ids or [],
+        card_share=card_share,
+        to_email=message.to[0],
+        subject=message.subject,
+        body_text=message.body,
+        body_html=body_html,
+        log_label=log_label,
+    )
+
+
+def enqueue(rows):
+    """Insert outbox rows in bulk. Enqueueing never talks to the mail server."""
+    return EmailOutbox.objects.bulk_create(rows, batch_size=getattr(settings, 'REMINDER_FLUSH_SIZE', 200))
+
+
+def _to_message(row):
+    msg = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body_text,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[row.to_email],
+    )
+    if row.body_html:
+        msg.attach_alternative(row.body_html, 'text/html')
+    return msg
+
+
+def claim_batch(batch_size=None, kinds=None, retries=None, ids=None):
+    """Claim up to *batch_size* due rows for this worker.
+
+    Rows are locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` and flipped to
+    ``sending`` in the same transaction, so concurrent drainers never claim
+    the same email.  Rows left in ``sending`` by a crashed worker become
+    claimable again after ``EMAIL_OUTBOX_CLAIM_TIMEOUT`` seconds.
+
+    *retries* narrows the claim to never-attempted rows (False) or to rows
+    that already failed at least once (True); None claims both.  *ids*
+    restricts the claim to those outbox rows.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    due = (
+        Q(status=EmailOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+        | Q(status=EmailOutbox.STATUS_SENDING, claimed_at__lt=stale_before)
+    )
+    queryset = EmailOutbox.objects.filter(due)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    if retries is not None:
+        queryset = queryset.filter(attempts__gt=0) if retries else queryset.filter(attempts=0)
+
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .select_related('event')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+                status=EmailOutbox.STATUS_SENDING, claimed_at=now
+            )
+    return rows
+
+
+def retry_delay(attempts):
+    """Jittered exponential backoff before the next delivery attempt.
+
+    Half of the capped exponential delay is fixed and the other half random,
+    so a batch that failed together during an outage does not retry in
+    lockstep once the mail server comes back.
+    """
+    delay = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    delay = min(delay, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+
+def _success_updates(kind):
+    """Status flags applied to the linked event once an email of *kind* is delivered."""
+    if kind in (EmailOutbox.KIND_REMINDER, EmailOutbox.KIND_REMINDER_DIGEST):
+        return {'notified': True, 'reminder_queued': False}
+    if kind == EmailOutbox.KIND_DELETION_NOTICE:
+        return {'deletion_notified': True, 'deletion_scheduled': timezone.now() + timedelta(days=2)}
+    return None
+
+
+def _success_filter(kind):
+    """State an event must still be in for a delivered email of *kind* to update it."""
+    if kind in (EmailOutbox.KIND_REMINDER, EmailOutbox.KIND_REMINDER_DIGEST):
+        # Rolling a recurring event forward clears reminder_queued, so a late
+        # delivery of last year's reminder never marks next year's as notified
+        return {'reminder_queued': True}
+    return None
+
+
+def _give_up(rows):
+    """Undo enqueue-time bookkeeping for emails that ran out of attempts.
+
+    Reminders go back on the ``fire_on`` schedule and deletion notices lose
+    their placeholder ``deletion_scheduled`` so the next job run picks them up
+    again; auto-shares drop the unsent share link.
+    """
+    reminder_ids = [r.event_id for r in rows if r.kind == EmailOutbox.KIND_REMINDER and r.event_id]
+    for row in rows:
+        if row.kind == EmailOutbox.KIND_REMINDER_DIGEST:
+            reminder_ids.extend(row.event_ids)
+    if reminder_ids:
+        events = list(Event.objects.filter(id__in=reminder_ids, notified=False).only(
+            'id', 'date', 'remind_days_before', 'notified', 'reminder_queued',
+        ))
+        for event in events:
+            event.reminder_queued = False
+            event.fire_on = event.compute_fire_on()
+        Event.objects.bulk_update(events, ['reminder_queued', 'fire_on'])
+
+    deletion_ids = [r.event_id for r in rows if r.kind == EmailOutbox.KIND_DELETION_NOTICE and r.event_id]
+    if deletion_ids:
+        Event.objects.filter(id__in=deletion_ids, deletion_notified=False).update(deletion_scheduled=None)
+
+    share_ids = [r.card_share_id for r in rows if r.kind == EmailOutbox.KIND_AUTO_SHARE and r.card_share_id]
+    if share_ids:
+        CardShare.objects.filter(id__in=share_ids).delete()
+
+
+def _record_results(rows, results, totals):
+    now = timezone.now()
+    max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+    buffers = {}
+    exhausted = []
+
+    for row, success in zip(rows, results):
+        row.claimed_at = None
+        if success is None:
+            # Circuit breaker refused the send; release without spending an attempt
+            row.status = EmailOutbox.STATUS_PENDING
+            row.next_attempt_at = now + timedelta(seconds=smtp_breaker.cooldown)
+            totals['deferred'] += 1
+            continue
+        row.attempts += 1
+        if success:
+            row.status = EmailOutbox.STATUS_SENT
+            row.sent_at = now
+            row.last_error = ''
+            totals['sent'] += 1
+        elif row.attempts >= max_attempts:
+            row.status = EmailOutbox.STATUS_FAILED
+            row.last_error = f"Delivery failed after {row.attempts} attempts"
+            exhausted.append(row)
+            totals['failed'] += 1
+            logger.error(f"Giving up on {row.kind} email {row.id} to {row.to_email}")
+        else:
+            row.status = EmailOutbox.STATUS_PENDING
+            row.next_attempt_at = now + retry_delay(row.attempts)
+            row.last_error = f"Delivery failed on attempt {row.attempts}; retry scheduled"
+            totals['retrying'] += 1
+
+        # Log final outcomes only, so analytics count each email once
+        if not row.log_label or row.status == EmailOutbox.STATUS_PENDING:
+            continue
+        if row.event:
+            user_id, event_ids = row.event.user_id, [row.event.id]
+        elif row.event_ids and row.user_id:
+            user_id, event_ids = row.user_id, row.event_ids
+        else:
+            continue
+        if row.kind not in buffers:
+            buffers[row.kind] = OutcomeBuffer(_success_updates(row.kind), success_filter=_success_filter(row.kind))
+        outcome = 'sent' if success else 'failed'
+        buffers[row.kind].record_many(user_id, event_ids, success, f"{row.log_label} {outcome}")
+
+    with transaction.atomic():
+        EmailOutbox.objects.bulk_update(
+            rows, ['status', 'attempts', 'next_attempt_at', 'claimed_at', 'last_error', 'sent_at']
+        )
+        for buffer in buffers.values():
+            buffer.flush()
+        if exhausted:
+            _give_up(exhausted)
+
+
+def _drain_pass(totals, batch_size, concurrency, kinds, retries, limit=None, max_batches=None, progress=None, ids=None):
+    """Claim and send batches until the queue, *limit* rows or *max_batches* run out.
+
+    Returns the number of batches sent.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        size = batch_size if limit is None else min(batch_size, limit)
+        if size <= 0:
+            break
+        if smtp_breaker.is_open():
+            logger.warning("SMTP circuit is open; leaving remaining outbox rows pending")
+            break
+        rows = claim_batch(size, kinds, retries=retries, ids=ids)
+        if not rows:
+            break
+        batches += 1
+        if limit is not None:
+            limit -= len(rows)
+        results = send_concurrently([_to_message(row) for row in rows], concurrency)
+        _record_results(rows, results, totals)
+        if progress:
+            progress(totals)
+    return batches
+
+
+def drain_outbox(batch_size=None, concurrency=None, kinds=None, max_batches=None, retry_budget=None, progress=None,
+                 ids=None):
+    """Send due outbox rows batch by batch until none are left.
+
+    The first pass sends never-attempted rows at full speed; failures are
+    rescheduled with jittered exponential backoff instead of being retried
+    inline, so one bad recipient or a flaky mail server never blocks the rest
+    of the queue.  A second pass then re-attempts previously failed rows whose
+    backoff has elapsed, capped at *retry_budget* emails per run
+    (``EMAIL_RETRY_BUDGET`` by default).  While the SMTP circuit breaker is
+    open the drain stops early and leaves rows pending without spending their
+    attempts.  *progress*, if given, is called with the running totals after
+    every batch.  *ids* limits the drain to those outbox rows, e.g. the ones
+    a sharded reminder run just queued.  Returns counts of emails sent, rescheduled for retry,
+    deferred by the breaker, and given up on.
+    """
+    if retry_budget is None:
+        retry_budget = getattr(settings, 'EMAIL_RETRY_BUDGET', 50)
+    totals = {'sent': 0, 'retrying': 0, 'deferred': 0, 'failed': 0}
+    batches = _drain_pass(
+        totals, batch_size, concurrency, kinds, retries=False, max_batches=max_batches, progress=progress, ids=ids,
+    )
+    if max_batches is not None:
+        max_batches -= batches
+    batches += _drain_pass(
+        totals, batch_size, concurrency, kinds, retries=True, limit=retry_budget, max_batches=max_batches,
+        progress=progress, ids=ids,
+    )
+    if batches:
+        logger.info(
+            f"Outbox drain: {totals['sent']} sent, {totals['retrying']} rescheduled, "
+            f"{totals['deferred']} deferred, {totals['failed']} failed in {batches} batches"
+        )
+    return totals
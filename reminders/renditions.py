@@ -0,0 +1,125 @@
+"""Derived images stored next to each uploaded photo.
+
+Every image gets a square list thumbnail, WebP copies at the
+``RENDITION_WIDTHS`` buckets for the card slideshow ``srcset`` and an inline
+placeholder stored on the row itself.  Decoding happens off the request:
+uploads queue :func:`render_media` for their new rows, and anything it
+missed (older media, a worker outage) is filled in by
+:func:`backfill_renditions`.
+"""
+import logging
+from io import BytesIO
+
+from django.db.models import F, Q
+
+from .image_utils import (
+    RENDITION_WIDTHS,
+    ImageProcessingError,
+    derived_path,
+    make_placeholder,
+    make_thumbnail,
+    make_width_renditions,
+    open_image,
+)
+from .models import EventMedia
+from .supabase_helpers import MEDIA_BUCKET, storage_path
+
+logger = logging.getLogger('app_logger')
+
+# Originals that fail this often (deleted, unreadable) are no longer retried
+RENDITION_MAX_ATTEMPTS = 5
+
+
+def render_renditions(supabase, file_path, source):
+    """Generate and upload the renditions of the image stored at *file_path*.
+
+    *source* is a local path or binary file object with the same image.
+    Returns the ``EventMedia`` field values to save.  Files Pillow cannot
+    decode (SVG, corrupt uploads) get a 0x0 size so they are not retried.
+    """
+    try:
+        image, (original_width, original_height) = open_image(source, min_width=max(RENDITION_WIDTHS))
+    except ImageProcessingError as e:
+        logger.info(f"No renditions for {file_path}: {e}")
+        return {'width': 0, 'height': 0}
+
+    bucket = supabase.storage.from_(MEDIA_BUCKET)
+
+    def upload(label, data):
+        path = derived_path(file_path, label)
+        bucket.upload(path, data, file_options={'content-type': 'image/webp', 'upsert': 'true'})
+        return bucket.get_public_url(path).rstrip('?')
+
+    placeholder, dominant_color = make_placeholder(image)
+    fields = {
+        'width': original_width,
+        'height': original_height,
+        'placeholder': placeholder,
+        'dominant_color': dominant_color,
+    }
+    data, width, height = make_thumbnail(image)
+    fields.update(thumbnail_url=upload('thumb', data), thumbnail_width=width, thumbnail_height=height)
+    fields['renditions'] = sorted(
+        (
+            {'width': width, 'height': height, 'url': upload(f'w{width}', data)}
+            for data, width, height in make_width_renditions(image, original_width)
+        ),
+        key=lambda item: item['width'],
+    )
+    return fields
+
+
+def _pending_renditions():
+    """Image media missing renditions: never processed, or processed before width buckets or placeholders existed."""
+    return EventMedia.objects.filter(
+        Q(width__isnull=True)
+        | Q(width__gt=min(RENDITION_WIDTHS), renditions=[])
+        | Q(width__gt=0, placeholder=''),
+        media_type='image',
+        rendition_attempts__lt=RENDITION_MAX_ATTEMPTS,
+    )
+
+
+def _render_pending(supabase, pending):
+    """Download and render each row of *pending*; returns counts of rows processed and failed.
+
+    Each original is downloaded and processed one at a time, so memory is
+    bounded by a single image.
+    """
+    bucket = supabase.storage.from_(MEDIA_BUCKET)
+    result = {'processed': 0, 'failed': 0}
+    for media in pending.iterator(chunk_size=100):
+        path = storage_path(media.media_file)
+        try:
+            fields = render_renditions(supabase, path, BytesIO(bucket.download(path)))
+        except Exception as e:
+            logger.error(f"Renditions failed for media {media.pk}: {e}")
+            EventMedia.objects.filter(pk=media.pk).update(rendition_attempts=F('rendition_attempts') + 1)
+            result['failed'] += 1
+            continue
+        for field, value in fields.items():
+            setattr(media, field, value)
+        media.save(update_fields=list(fields))
+        result['processed'] += 1
+    return result
+
+
+def render_media(supabase, media_ids):
+    """Generate renditions for the just-uploaded image media *media_ids*."""
+    return _render_pending(supabase, _pending_renditions().filter(pk__in=media_ids).order_by('pk'))
+
+
+def backfill_renditions(supabase, limit=None):
+    """Generate renditions for image media that is missing them.
+
+    Failures are counted on the row and sort it behind untried media, so a
+    few broken originals cannot hold up every batch.  Returns counts of rows
+    processed and failed.
+    """
+    pending = _pending_renditions().order_by('rendition_attempts', 'pk')
+    if limit:
+        pending = pending[:limit]
+    result = _render_pending(supabase, pending)
+    if result['processed'] or result['failed']:
+        logger.info(f"Rendition backfill: {result['processed']} processed, {result['failed']} failed")
+    return result
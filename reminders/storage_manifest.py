@@ -0,0 +1,134 @@
+"""Local manifest of the media bucket, used by ``manage.py reconcile_storage``.
+
+The bucket listing is paged one ``supabase_id/event_id`` folder at a time and
+written to a SQLite file together with every path ``EventMedia`` still
+references.  Both tables are then read back in path order and walked with a
+sorted merge, so neither the listing nor the references are ever held in
+memory in full.
+"""
+import logging
+import sqlite3
+
+from .models import Event, EventMedia
+from .supabase_helpers import MEDIA_BUCKET, storage_path
+
+logger = logging.getLogger('app_logger')
+
+LIST_PAGE_SIZE = 1000
+_WRITE_BATCH = 5000
+
+
+def list_folder(supabase, prefix, page_size=LIST_PAGE_SIZE):
+    """Yield the entries directly under *prefix*, one listing page at a time."""
+    bucket = supabase.storage.from_(MEDIA_BUCKET)
+    offset = 0
+    while True:
+        page = bucket.list(prefix, {
+            'limit': page_size,
+            'offset': offset,
+            'sortBy': {'column': 'name', 'order': 'asc'},
+        }) or []
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def _is_folder(entry):
+    # Folders come back without an object id
+    return entry.get('id') is None
+
+
+def walk_bucket(supabase, page_size=LIST_PAGE_SIZE):
+    """Yield ``(path, size, mtime)`` for every object in the media bucket.
+
+    Objects live under ``<supabase_id>/<event_id>/``; the walk descends into
+    one folder at a time so memory stays bounded by a single listing page.
+    """
+    pending = ['']
+    while pending:
+        prefix = pending.pop()
+        for entry in list_folder(supabase, prefix, page_size):
+            path = f"{prefix}/{entry['name']}" if prefix else entry['name']
+            if _is_folder(entry):
+                pending.append(path)
+            else:
+                metadata = entry.get('metadata') or {}
+                yield path, metadata.get('size') or 0, entry.get('updated_at') or entry.get('created_at') or ''
+
+
+class StorageManifest:
+    """SQLite-backed manifest of stored objects and referenced paths."""
+
+    def __init__(self, filename):
+        self.db = sqlite3.connect(filename)
+        self.db.executescript('''
+            DROP TABLE IF EXISTS objects;
+            DROP TABLE IF EXISTS refs;
+            CREATE TABLE objects (path TEXT PRIMARY KEY, size INTEGER, mtime TEXT);
+            CREATE TABLE refs (path TEXT PRIMARY KEY);
+        ''')
+
+    def close(self):
+        self.db.close()
+
+    def _insert(self, sql, rows):
+        batch = []
+        count = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) == _WRITE_BATCH:
+                count += self._flush(sql, batch)
+        count += self._flush(sql, batch)
+        return count
+
+    def _flush(self, sql, batch):
+        self.db.executemany(sql, batch)
+        self.db.commit()
+        written = len(batch)
+        batch.clear()
+        return written
+
+    def add_objects(self, objects):
+        """Record ``(path, size, mtime)`` rows; returns how many were written."""
+        return self._insert('INSERT OR REPLACE INTO objects VALUES (?, ?, ?)', objects)
+
+    def add_references(self):
+        """Record every storage path still referenced by the database, renditions included."""
+        media = (
+            item.file_urls()
+            for item in EventMedia.objects.only(*EventMedia.FILE_FIELDS).iterator(chunk_size=_WRITE_BATCH)
+        )
+        legacy = Event.objects.exclude(media_path__isnull=True).exclude(media_path='').values_list(
+            'media_path',
+        ).iterator(chunk_size=_WRITE_BATCH)
+        paths = (storage_path(value) for source in (media, legacy) for row in source for value in row if value)
+        return self._insert('INSERT OR IGNORE INTO refs VALUES (?)', ((path,) for path in paths))
+
+    def missing_count(self):
+        """Number of referenced paths with no object in the listing."""
+        return self.db.execute(
+            'SELECT COUNT(*) FROM refs WHERE path NOT IN (SELECT path FROM objects)'
+        ).fetchone()[0]
+
+    def diff(self):
+        """Sorted merge of objects against references.
+
+        Yields ``('orphan', path, size, mtime)`` for stored objects nothing
+        references and ``('missing', path, None, None)`` for references whose
+        object is gone.
+        """
+        objects = self.db.execute('SELECT path, size, mtime FROM objects ORDER BY path')
+        refs = self.db.cursor().execute('SELECT path FROM refs ORDER BY path')
+        obj = objects.fetchone()
+        ref = refs.fetchone()
+        while obj is not None or ref is not None:
+            if ref is None or (obj is not None and obj[0] < ref[0]):
+                yield ('orphan', *obj)
+                obj = objects.fetchone()
+            elif obj is None or ref[0] < obj[0]:
+                yield ('missing', ref[0], None, None)
+                ref = refs.fetchone()
+            else:
+                obj = objects.fetchone()
+                ref = refs.fetchone()
@@ -0,0 +1,168 @@
+"""Bulk removal of media from Supabase storage.
+
+Paths are collected up front, deduplicated and removed with large
+``remove()`` batches run in parallel.  Expired media is reaped directly by
+the cleanup jobs; user-facing deletes only queue a :class:`StorageTombstone`
+per file and leave the removal to :func:`drain_tombstones`.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_q.tasks import async_task
+
+from .models import EventMedia, StorageTombstone
+from .supabase_helpers import get_service_supabase_client, remove_storage_objects, storage_path
+
+logger = logging.getLogger('app_logger')
+
+TOMBSTONE_CLAIM_SECONDS = 10 * 60
+TOMBSTONE_RETRY_BASE_SECONDS = 60
+TOMBSTONE_RETRY_MAX_SECONDS = 6 * 60 * 60
+
+
+def _media_rows(media):
+    """``(pk, media_file, bucket paths)`` for each row of *media*, renditions included."""
+    return [
+        (item.pk, item.media_file, [storage_path(url) for url in item.file_urls()])
+        for item in media.only(*EventMedia.FILE_FIELDS)
+    ]
+
+
+def _still_used(rows):
+    """Original files of *rows* that other media rows still point at.
+
+    Older recurring copies share files (and their renditions) with the rows
+    that replaced them.
+    """
+    return set(
+        EventMedia.objects.filter(media_file__in={media_file for _, media_file, _ in rows})
+        .exclude(pk__in=[pk for pk, _, _ in rows])
+        .values_list('media_file', flat=True)
+    )
+
+
+def remove_batches(supabase, batches, concurrency):
+    """Run one ``remove()`` per batch on a small pool; returns a success flag per batch."""
+    workers = min(concurrency, len(batches))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='storage-reaper') as pool:
+        return list(pool.map(partial(remove_storage_objects, supabase), batches))
+
+
+def reap_media(supabase, media, batch_size=None, concurrency=None):
+    """Remove the stored files behind *media* (an ``EventMedia`` queryset), then the rows.
+
+    Files still referenced by media rows outside *media* are left in storage.
+    Rows whose ``remove()`` batch failed are kept so the next run retries
+    them.  Returns counts of files removed, rows deleted and rows kept.
+    """
+    batch_size = batch_size or settings.STORAGE_REMOVE_BATCH_SIZE
+    concurrency = concurrency or settings.STORAGE_REMOVE_CONCURRENCY
+
+    rows = _media_rows(media)
+    if not rows:
+        return {'removed': 0, 'deleted': 0, 'kept': 0}
+    still_used = _still_used(rows)
+    paths_by_row = {pk: [] if media_file in still_used else paths for pk, media_file, paths in rows}
+    paths = list(dict.fromkeys(path for row_paths in paths_by_row.values() for path in row_paths))
+
+    failed = set()
+    batches = [paths[start:start + batch_size] for start in range(0, len(paths), batch_size)]
+    if batches:
+        for batch, ok in zip(batches, remove_batches(supabase, batches, concurrency)):
+            if not ok:
+                failed.update(batch)
+
+    done = [pk for pk, row_paths in paths_by_row.items() if not failed.intersection(row_paths)]
+    _, deleted_by_model = EventMedia.objects.filter(pk__in=done).delete()
+    deleted = deleted_by_model.get(EventMedia._meta.label, 0)
+    result = {'removed': len(paths) - len(failed), 'deleted': deleted, 'kept': len(rows) - len(done)}
+    logger.info(f"Storage reaper removed {result['removed']} files and {result['deleted']} media rows ({result['kept']} kept for retry)")
+    return result
+
+
+def bury_media(media, extra_paths=()):
+    """Delete *media* rows and queue their stored files for :func:`drain_tombstones`.
+
+    Only database writes happen here, so it is safe to call inside a
+    request.  *extra_paths* are further bucket paths to remove (e.g. a
+    legacy ``Event.media_path``) or URLs.  Returns the number of files queued.
+    """
+    rows = _media_rows(media)
+    still_used = _still_used(rows)
+    paths = {path for _, media_file, row_paths in rows if media_file not in still_used for path in row_paths}
+    paths.update(storage_path(path) for path in extra_paths if path)
+
+    with transaction.atomic():
+        StorageTombstone.objects.bulk_create([StorageTombstone(path=path) for path in sorted(paths)])
+        EventMedia.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        if paths:
+            transaction.on_commit(lambda: async_task('reminders.tasks.drain_storage_tombstones'))
+    return len(paths)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(TOMBSTONE_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), TOMBSTONE_RETRY_MAX_SECONDS))
+
+
+def _claim_tombstones(limit):
+    """Lock up to *limit* due tombstones and push them out of reach of other drainers."""
+    now = timezone.now()
+    with transaction.atomic():
+        tombstones = list(
+            StorageTombstone.objects.filter(next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')[:limit]
+        )
+        StorageTombstone.objects.filter(pk__in=[t.pk for t in tombstones]).update(
+            next_attempt_at=now + timedelta(seconds=TOMBSTONE_CLAIM_SECONDS)
+        )
+    return tombstones
+
+
+def drain_tombstones(batch_size=None, concurrency=None, max_rounds=100):
+    """Remove the storage objects queued as tombstones.
+
+    Each round claims up to ``batch_size * concurrency`` due tombstones,
+    removes them with parallel ``remove()`` calls and deletes the
+    tombstones that succeeded; failed ones are retried later with
+    exponential backoff.  Returns counts of paths removed and rescheduled.
+    """
+    batch_size = batch_size or settings.STORAGE_REMOVE_BATCH_SIZE
+    concurrency = concurrency or settings.STORAGE_REMOVE_CONCURRENCY
+    totals = {'removed': 0, 'retrying': 0}
+    if not StorageTombstone.objects.filter(next_attempt_at__lte=timezone.now()).exists():
+        return totals
+    supabase = get_service_supabase_client()
+    if supabase is None:
+        return totals
+
+    for _ in range(max_rounds):
+        tombstones = _claim_tombstones(batch_size * concurrency)
+        if not tombstones:
+            break
+        batches = [tombstones[start:start + batch_size] for start in range(0, len(tombstones), batch_size)]
+        paths = [list(dict.fromkeys(t.path for t in batch)) for batch in batches]
+
+        done, failed = [], []
+        for batch, ok in zip(batches, remove_batches(supabase, paths, concurrency)):
+            (done if ok else failed).extend(batch)
+
+        now = timezone.now()
+        for tombstone in failed:
+            tombstone.attempts += 1
+            tombstone.next_attempt_at = now + _retry_delay(tombstone.attempts)
+        with transaction.atomic():
+            StorageTombstone.objects.filter(pk__in=[t.pk for t in done]).delete()
+            StorageTombstone.objects.bulk_update(failed, ['attempts', 'next_attempt_at'])
+        totals['removed'] += len(done)
+        totals['retrying'] += len(failed)
+        if len(tombstones) < batch_size * concurrency:
+            break
+
+    logger.info(f"Storage tombstones drained: {totals['removed']} removed, {totals['retrying']} rescheduled")
+    return totals
@@ -1,3 +1,5 @@
+from urllib.parse import unquote
+
 from supabase import create_client
 from supabase.lib.client_options import SyncClientOptions
 from django.conf import settings
@@ -60,15 +62,33 @@ def get_user_supabase_client(request):
     return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options)
 
 
+MEDIA_BUCKET = 'event-media'
+
+
+def stream_upload(supabase, file_path, file, content_type):
+    """Upload a Django ``UploadedFile`` to the media bucket without buffering it whole.
+
+    Uploads larger than ``FILE_UPLOAD_MAX_MEMORY_SIZE`` are already spooled
+    to a temporary file by Django; that file is handed to the storage client
+    as an open file object, which the HTTP client streams in small chunks.
+    Only small in-memory uploads are passed as bytes.
+    """
+    options = {"content-type": content_type}
+    bucket = supabase.storage.from_(MEDIA_BUCKET)
+    if hasattr(file, 'temporary_file_path'):
+        with open(file.temporary_file_path(), 'rb') as stream:
+            return bucket.upload(file_path, stream, file_options=options)
+    file.seek(0)
+    return bucket.upload(file_path, file.read(), file_options=options)
+
+
 def upload_media(request, event, file):
     supabase = get_user_supabase_client(request)
     file_name = file.name
     file_path = f"{request.user.supabase_id}/{event.id}/{file_name}"
     logger.debug(f"Uploading media to path: {file_path}")
 
-    response = supabase.storage.from_('event-media').upload(
-        file_path, file.read(), file_options={"content-type": file.content_type}
-    )
+    response = stream_upload(supabase, file_path, file, file.content_type)
 
     if hasattr(response, 'error') and response.error:
         logger.error(f"Media upload failed for user {request.user.username}: {response.error}")
@@ -78,40 +98,51 @@ def upload_media(request, event, file):
         logger.error(f"Media upload failed for user {request.user.username}: {response}")
         return None, f"Failed to upload {file_name}."
 
-    public_url = supabase.storage.from_('event-media').get_public_url(file_path)
+    public_url = supabase.storage.from_(MEDIA_BUCKET).get_public_url(file_path)
     return public_url, file_path
 
 
-def delete_media(request, file_path):
-    supabase = get_user_supabase_client(request)
-    dir_path = "/".join(file_path.split('/')[:-1])
-    file_list = supabase.storage.from_('event-media').list(path=dir_path)
-
-    file_exists = any(f['name'] == file_path.split('/')[-1] for f in file_list)
-    if not file_exists:
-        logger.warning(f"File not found in storage: {file_path}")
-        return True
-
-    response = supabase.storage.from_('event-media').remove([file_path])
-    if response is None or (isinstance(response, list) and not response):
-        logger.error(f"Media deletion failed: {file_path}")
+def storage_path(media_file):
+    """Return the bucket-relative path for a stored public URL (or a path already relative).
+
+    Public URLs are percent-encoded (``My%20Photo.jpg``) while the bucket
+    lists and removes objects by their raw names, so URLs are decoded.
+    """
+    marker = f'/{MEDIA_BUCKET}/'
+    if marker not in media_file:
+        return media_file
+    return unquote(media_file.split(marker)[-1].split('?', 1)[0])
+
+
+def get_service_supabase_client():
+    """Return a service-role client for background jobs, or None if it cannot be created."""
+    if not (settings.SUPABASE_URL and settings.SUPABASE_SERVICE_KEY):
+        logger.warning("Supabase credentials missing; media file deletion from storage is disabled.")
+        return None
+    try:
+        return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+    except Exception as e:
+        logger.error(f"Failed to initialize Supabase client: {str(e)}")
+        return None
+
+
+def remove_storage_objects(supabase, paths):
+    """Remove *paths* from the media bucket in one call; returns True on success.
+
+    ``remove`` is idempotent, so paths that are already gone are not an error
+    and no existence check is made first.
+    """
+    try:
+        supabase.storage.from_(MEDIA_BUCKET).remove(list(paths))
+    except Exception as e:
+        logger.error(f"Storage remove failed for {len(paths)} paths: {e}")
         return False
-
-    logger.info(f"Deleted media from storage: {file_path}")
     return True
 
 
-def delete_media_from_storage(supabase, file_path):
-    dir_path = "/".join(file_path.split('/')[:-1])
-    file_list = supabase.storage.from_('event-media').list(path=dir_path)
-
-    file_exists = any(f['name'] == file_path.split('/')[-1] for f in file_list)
-    if not file_exists:
-        logger.warning(f"File not found in storage: {file_path}")
-        return True
-
-    response = supabase.storage.from_('event-media').remove([file_path])
-    if response is None or (isinstance(response, list) and not response):
+def delete_media(request, file_path):
+    supabase = get_user_supabase_client(request)
+    if not remove_storage_objects(supabase, [file_path]):
         logger.error(f"Media deletion failed: {file_path}")
         return False
 
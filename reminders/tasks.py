@@ -1,47 +1,84 @@
 import logging
+from datetime import datetime, time, timezone as dt_timezone
 
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
-from .models import Event, ReminderLog, EventMedia
-from .email_utils import ReminderEmailService
+from .jobs import AUTO_SHARE_JOB, RECURRING_EVENTS_JOB, REMINDER_JOB, progress_reporter, run_job
+from .models import EmailOutbox, Event, EventOccurrence, JobRun, JobWatermark
+from .outbox import drain_outbox
+from .renditions import render_media
+from .storage_reaper import drain_tombstones
+from .supabase_helpers import get_service_supabase_client
+from .utils import send_local_time_reminders
 logger = logging.getLogger('app_logger')
 
 
 def send_reminder_emails():
     """Send reminder emails for upcoming events (called via django-q).
 
-    This delegates to ReminderEmailService (SMTP backend) for consistency
-    with the cron path in utils.py.  Uses ``<=`` for catch-up resilience.
+    Runs the same local-time, batched and bulk-flushed pipeline as the
+    hourly cron job so both entry points behave identically.
     """
-    today = timezone.localdate()
-    events = Event.objects.filter(notified=False).select_related('user')
+    run = run_job(REMINDER_JOB, send_local_time_reminders, acted='sent_count')
+    if run.status == JobRun.STATUS_SKIPPED:
+        return "Reminders already running elsewhere"
+    logger.info(f"django-q reminder task sent {run.result['sent_count']} of {run.result['total_events']} reminders")
+    return "Reminders processed"
 
-    for event in events:
-        days_until = (event.date - today).days
-        if 0 <= days_until <= event.remind_days_before:
-            try:
-                success = ReminderEmailService.send_reminder_email(event.user, event)
-            except Exception as e:
-                logger.error(f"All retries failed for {event.name}: {e}")
-                success = False
-
-            ReminderLog.objects.create(
-                user=event.user,
-                event=event,
-                status='success' if success else 'failure',
-                message='Email sent via SMTP' if success else f'Send failed',
-            )
-
-            if success:
-                event.notified = True
-                event.save()
-                logger.info(
-                    f"Reminder email sent to {event.user.email} for "
-                    f"{event.name}'s {event.get_event_type_display()} on {event.date}."
-                )
-            else:
-                logger.error(f"Failed to send reminder for {event.name}")
 
-    return "Reminders processed"
+def drain_email_outbox(concurrency=None):
+    """Send everything due in the email outbox (called via django-q)."""
+    result = drain_outbox(concurrency=concurrency)
+    return f"Outbox drained: {result['sent']} sent, {result['retrying']} rescheduled, {result['failed']} failed"
+
+
+def drain_storage_tombstones():
+    """Remove storage objects queued by user-facing deletes (called via django-q)."""
+    result = drain_tombstones()
+    return f"Storage tombstones drained: {result['removed']} removed, {result['retrying']} rescheduled"
+
+
+def generate_media_renditions(media_ids):
+    """Generate thumbnails, slideshow widths and placeholders for new image uploads (called via django-q)."""
+    supabase = get_service_supabase_client()
+    if supabase is None:
+        return "Storage client unavailable; renditions left for the backfill"
+    result = render_media(supabase, media_ids)
+    return f"Renditions generated: {result['processed']} processed, {result['failed']} failed"
+
+
+def run_reminder_trigger(run_id, concurrency=None):
+    """Queue and send due reminders for a ``queued`` JobRun created by the trigger endpoint.
+
+    Live processed/sent/failed counts are written to the JobRun after every
+    outbox batch so callers can poll the progress endpoint.
+    """
+    run = JobRun.objects.get(pk=run_id)
+
+    def _send():
+        result = send_local_time_reminders(drain=False)
+        kinds = [EmailOutbox.KIND_REMINDER, EmailOutbox.KIND_REMINDER_DIGEST]
+        totals = drain_outbox(concurrency=concurrency, kinds=kinds, progress=progress_reporter(run))
+        return {**result, 'sent_count': totals['sent'], 'failed_count': totals['failed']}
+
+    run = run_job(REMINDER_JOB, _send, run=run, acted='sent_count')
+    return f"Reminder job {run.id} {run.status}"
+
+
+def run_auto_share_trigger(run_id):
+    """Create today's auto-share links and send the card emails for a ``queued`` JobRun."""
+    from .views import auto_share_card
+
+    run = JobRun.objects.get(pk=run_id)
+
+    def _share():
+        queued = auto_share_card(drain=False)
+        totals = drain_outbox(kinds=[EmailOutbox.KIND_AUTO_SHARE], progress=progress_reporter(run))
+        return {'total_events': queued, 'sent_count': totals['sent'], 'failed_count': totals['failed']}
+
+    run = run_job(AUTO_SHARE_JOB, _share, run=run, acted='sent_count')
+    return f"Auto-share job {run.id} {run.status}"
 
 
 def _next_annual_date(original_date):
@@ -57,57 +94,193 @@ def _next_annual_date(original_date):
         return original_date.replace(year=next_year, day=28)
 
 
+RECURRING_TYPES = ['birthday', 'anniversary', 'raksha_bandhan']
+ROLLOVER_CHUNK_SIZE = 500
+
+# Card passwords for these types do not depend on the date, so rolling forward keeps the hash
+_DATE_INDEPENDENT_PASSWORDS = {'birthday', 'raksha_bandhan'}
+
+# Per-occurrence state that starts afresh each year
+_ROLLOVER_RESET = {
+    'notified': False,
+    'reminder_queued': False,
+    'deletion_notified': False,
+    'deletion_scheduled': None,
+    'birthday_page1_seen': False,
+    'birthday_unwrap_step': 0,
+    'birthday_page2_completed': False,
+    'birthday_page4_wish_made': False,
+    'birthday_page5_seen': False,
+}
+_ROLLOVER_FIELDS = ['date', 'fire_on', 'card_password', 'updated_at', *_ROLLOVER_RESET]
+
+
+def _rollover_date(event_date, today):
+    """Return the first annual occurrence of *event_date* on or after *today*."""
+    while event_date < today:
+        event_date = _next_annual_date(event_date)
+    return event_date
+
+
+def _roll_forward(event, today, now):
+    """Move *event* on to its next occurrence on or after *today*; return the passed years."""
+    passed = []
+    notified = event.notified
+    while event.date < today:
+        passed.append(EventOccurrence(event_id=event.pk, year=event.date.year, date=event.date, notified=notified))
+        event.date = _next_annual_date(event.date)
+        notified = False
+
+    for field, value in _ROLLOVER_RESET.items():
+        setattr(event, field, value)
+    if event.event_type not in _DATE_INDEPENDENT_PASSWORDS:
+        event.card_password = None
+    # bulk_update skips save(), so derive fire_on and the card password here
+    event.apply_save_defaults()
+    event.updated_at = now
+    return passed
+
+
+def _write_rollover(planned):
+    events = [event for event, _ in planned]
+    EventOccurrence.objects.bulk_create(
+        [occurrence for _, occurrences in planned for occurrence in occurrences], ignore_conflicts=True,
+    )
+    Event.objects.bulk_update(events, _ROLLOVER_FIELDS)
+    # A reminder still waiting in the outbox is for a date that has passed
+    EmailOutbox.objects.filter(
+        kind=EmailOutbox.KIND_REMINDER, event__in=events, status=EmailOutbox.STATUS_PENDING,
+    ).update(status=EmailOutbox.STATUS_FAILED, last_error='Cancelled: event rolled over to its next occurrence')
+
+
+def _roll_over(events, today, now):
+    """Roll one chunk of past recurring events on to their next occurrence.
+
+    Each event stays a single row: the passed years are recorded as thin
+    :class:`EventOccurrence` rows and the event itself is moved to its next
+    date.  One query finds the events whose next date is already taken by
+    another row (copies made before occurrences existed); those are left as
+    history.  Reminders for the passed date still pending in the outbox are
+    cancelled.  The chunk is written in one savepoint; if that fails each event
+    is retried in its own, so one bad row cannot hold back the rest.  Returns
+    the number of events rolled forward and the events that failed.
+    """
+    candidates = {}
+    for event in events:
+        key = (event.user_id, event.name, event.event_type, _rollover_date(event.date, today))
+        # Of several copies heading for the same date, the latest one is live
+        if key not in candidates or event.date > candidates[key].date:
+            candidates[key] = event
+
+    existing = set(
+        Event.objects.filter(
+            user_id__in={key[0] for key in candidates},
+            event_type__in={key[2] for key in candidates},
+            date__in={key[3] for key in candidates},
+        ).values_list('user_id', 'name', 'event_type', 'date')
+    )
+    planned = []
+    failed = []
+    for key, event in candidates.items():
+        if key in existing:
+            continue
+        try:
+            planned.append((event, _roll_forward(event, today, now)))
+        except Exception as e:
+            logger.error(f"Recurring rollover failed for event {event.pk}: {e}")
+            failed.append(event)
+    if not planned:
+        return 0, failed
+
+    try:
+        with transaction.atomic():
+            _write_rollover(planned)
+        return len(planned), failed
+    except Exception as e:
+        logger.warning(f"Rolling {len(planned)} recurring events at once failed ({e}); retrying one by one")
+
+    rolled_count = 0
+    for event, occurrences in planned:
+        try:
+            with transaction.atomic():
+                _write_rollover([(event, occurrences)])
+            rolled_count += 1
+        except Exception as e:
+            logger.error(f"Recurring rollover failed for event {event.pk}: {e}")
+            failed.append(event)
+    return rolled_count, failed
+
+
+def expand_recurring(event_ids):
+    """Roll just the given recurring events forward, e.g. right after the user edits one.
+
+    Unlike :func:`check_recurring_events` this touches only *event_ids*, so
+    it is cheap enough to run inside a request; the global scan stays with
+    the scheduled job.
+    """
+    now = timezone.now()
+    today = now.date()
+    with transaction.atomic():
+        events = list(
+            Event.objects.select_for_update()
+            .filter(pk__in=event_ids, event_type__in=RECURRING_TYPES, is_recurring=True, date__lt=today)
+            .order_by('pk')
+        )
+        rolled_count, failed = _roll_over(events, today, now) if events else (0, [])
+    return {"rolled_count": rolled_count, "failed_count": len(failed), "total_events": len(events)}
+
+
 def check_recurring_events():
-    """Create next-year copies for recurring birthday/anniversary/raksha_bandhan events."""
-    today = timezone.now().date()
+    """Roll recurring birthday/anniversary/raksha_bandhan events on to their next occurrence.
+
+    Only events that crossed into the past since the last successful run, or
+    were edited since then, are examined; the run's start is kept as a
+    :class:`JobWatermark`.  Events that fail to roll are logged and counted,
+    and the watermark stops short of the earliest of their dates so the next
+    run picks them up again.  Returns counts of events rolled forward, events
+    that failed and recurring events examined.
+    """
+    started = timezone.now()
+    today = started.date()
+    watermark, _ = JobWatermark.objects.get_or_create(name=RECURRING_EVENTS_JOB)
     events = Event.objects.filter(
-        event_type__in=['birthday', 'anniversary', 'raksha_bandhan'],
+        event_type__in=RECURRING_TYPES,
         is_recurring=True,
         date__lt=today,
     )
-    for event in events:
-        try:
-            next_date = _next_annual_date(event.date)
-
-            if Event.objects.filter(
-                user=event.user,
-                name=event.name,
-                event_type=event.event_type,
-                date=next_date,
-            ).exists():
-                continue
-
-            new_event = Event.objects.create(
-                user=event.user,
-                name=event.name,
-                event_type=event.event_type,
-                date=next_date,
-                remind_days_before=event.remind_days_before,
-                message=event.message,
-                custom_label=event.custom_label,
-                cultural_theme=event.cultural_theme,
-                highlights=event.highlights,
-                is_recurring=True,
-                notified=False,
-                deletion_notified=False,
-                deletion_scheduled=None,
-                recipient_email=event.recipient_email,
-                auto_share_enabled=event.auto_share_enabled,
-                raksha_bandhan_theme=getattr(event, 'raksha_bandhan_theme', None),
-                sibling_relationship=getattr(event, 'sibling_relationship', None),
-                sacred_promises=getattr(event, 'sacred_promises', None),
-                rakhi_ceremony_notes=getattr(event, 'rakhi_ceremony_notes', None),
-            )
-
-            for media in event.media.all():
-                EventMedia.objects.create(
-                    event=new_event,
-                    media_file=media.media_file,
-                    media_type=media.media_type,
-                )
-
-            logger.info(f"Created recurring event: {new_event} for {event.user.username}")
-        except Exception as e:
-            logger.error(f"Error creating recurring event for {event}: {e}")
+    if watermark.position:
+        events = events.filter(Q(date__gte=watermark.position.date()) | Q(updated_at__gte=watermark.position))
+    events = events.order_by('pk')
+
+    rolled_count = 0
+    total_events = 0
+    failed_dates = []
 
-    return "Recurring events processed"
+    def roll(chunk):
+        # _roll_forward moves events in memory, so note the stored dates first
+        dates = {event.pk: event.date for event in chunk}
+        rolled, failed = _roll_over(chunk, today, started)
+        failed_dates.extend(dates[event.pk] for event in failed)
+        return rolled
+
+    chunk = []
+    for event in events.iterator(chunk_size=ROLLOVER_CHUNK_SIZE):
+        chunk.append(event)
+        if len(chunk) == ROLLOVER_CHUNK_SIZE:
+            rolled_count += roll(chunk)
+            total_events += len(chunk)
+            chunk = []
+    if chunk:
+        rolled_count += roll(chunk)
+        total_events += len(chunk)
+
+    watermark.position = started
+    if failed_dates:
+        # Stop short of the failed events so the next run retries them
+        watermark.position = min(started, datetime.combine(min(failed_dates), time.min, tzinfo=dt_timezone.utc))
+    watermark.save(update_fields=['position', 'updated_at'])
+    logger.info(
+        f"Recurring rollover moved {rolled_count} of {total_events} past recurring events forward"
+        f" ({len(failed_dates)} failed)"
+    )
+    return {"rolled_count": rolled_count, "failed_count": len(failed_dates), "total_events": total_events}
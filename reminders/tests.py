@@ -1,18 +1,27 @@
 from io import StringIO
 from pathlib import Path
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from smtplib import SMTPServerDisconnected
 from unittest.mock import Mock, patch
 
+from django.conf import settings
+from django.core import mail
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.datastructures import MultiValueDict
 
+from reminders.circuit_breaker import CircuitBreaker, CircuitOpenError, smtp_breaker
+from reminders.email_utils import BatchEmailSender, ReminderEmailService
 from reminders.forms import EventForm
-from reminders.utils import process_bulk_import
-from reminders.models import Event
+from reminders.utils import process_bulk_import, send_deletion_notifications, send_upcoming_reminders
+from reminders.models import CardShare, EmailOutbox, Event, JobRun, ReminderLog
 
 
 class AutomationCommandTests(TestCase):
@@ -23,9 +32,95 @@ class AutomationCommandTests(TestCase):
 
 		call_command('trigger_reminders', stdout=out)
 
-		mock_send.assert_called_once_with()
+		mock_send.assert_called_once_with(concurrency=None, local_time=True)
 		self.assertIn('Sent 1 of 2 reminders', out.getvalue())
 
+	@patch('reminders.management.commands.trigger_reminders.send_upcoming_reminders')
+	def test_trigger_reminders_command_passes_concurrency(self, mock_send):
+		mock_send.return_value = {'sent_count': 0, 'total_events': 0}
+
+		call_command('trigger_reminders', '--concurrency', '6', stdout=StringIO())
+
+		mock_send.assert_called_once_with(concurrency=6, local_time=True)
+
+	@patch('reminders.management.commands.trigger_reminders.subprocess.Popen')
+	def test_trigger_reminders_command_spawns_one_process_per_shard(self, mock_popen):
+		mock_popen.return_value.communicate.return_value = (
+			'{"sent_count": 1, "queued_count": 1, "total_events": 1}\n', None,
+		)
+		mock_popen.return_value.returncode = 0
+		out = StringIO()
+
+		call_command('trigger_reminders', '--workers', '3', stdout=out)
+
+		commands = [call.args[0] for call in mock_popen.call_args_list]
+		self.assertEqual([c[-4:] for c in commands], [['--shard', str(i), '--shards', '3'] for i in range(3)])
+		self.assertTrue(all('--json' in c for c in commands))
+		self.assertIn('Sent 3 of 3 reminders', out.getvalue())
+
+	@patch('reminders.management.commands.trigger_reminders.subprocess.Popen')
+	def test_trigger_reminders_command_fails_when_a_shard_fails(self, mock_popen):
+		ok = Mock(returncode=0)
+		ok.communicate.return_value = ('{"sent_count": 2, "queued_count": 2, "total_events": 2}\n', None)
+		failed = Mock(returncode=1)
+		failed.communicate.return_value = ('', None)
+		mock_popen.side_effect = [ok, failed]
+		out = StringIO()
+
+		with self.assertRaises(CommandError):
+			call_command('trigger_reminders', '--workers', '2', stdout=out, stderr=StringIO())
+
+		self.assertIn('Sent 2 of 2 reminders', out.getvalue())
+		self.assertEqual(JobRun.objects.get(name='send_reminders').result['failed_shards'], 1)
+
+	@patch('reminders.management.commands.trigger_reminders.send_upcoming_reminders', side_effect=RuntimeError('db down'))
+	def test_trigger_reminders_shard_exits_non_zero_on_error(self, mock_send):
+		with self.assertRaises(CommandError):
+			call_command('trigger_reminders', '--shard', '0', '--shards', '2', '--json', stdout=StringIO())
+
+	@patch('reminders.cron.outbox_drain_job')
+	@patch('reminders.cron.daily_media_cleanup_job')
+	def test_run_scheduler_resumes_cadence_from_job_ledger(self, mock_cleanup, mock_drain):
+		JobRun.objects.create(name='media_cleanup', status=JobRun.STATUS_SUCCEEDED)
+		jobs = [
+			('media_cleanup', 'reminders.cron.daily_media_cleanup_job', 24 * 60 * 60, 0),
+			(None, 'reminders.cron.outbox_drain_job', 5 * 60, 0),
+		]
+
+		with self.settings(SCHEDULER_JOBS=jobs):
+			call_command('run_scheduler', '--once', stdout=StringIO())
+
+		mock_drain.assert_called_once_with()
+		mock_cleanup.assert_not_called()
+
+	@patch('reminders.management.commands.run_scheduler.random.uniform', return_value=120)
+	def test_anchored_scheduler_jobs_keep_their_wall_clock_slot(self, mock_uniform):
+		from reminders.management.commands.run_scheduler import ScheduledJob
+		job = ScheduledJob('recurring_events', 'reminders.cron.daily_recurring_events_job', 24 * 60 * 60, 600, '00:30')
+		tz = timezone.get_current_timezone()
+
+		job.resume(datetime(2026, 3, 10, 15, 0, tzinfo=tz))
+		self.assertEqual(job.next_run, datetime(2026, 3, 11, 0, 32, tzinfo=tz))
+
+		# A late, jittered run does not push the following days later
+		for day in (11, 12, 13):
+			job.schedule_next(datetime(2026, 3, day, 0, 50, tzinfo=tz))
+		self.assertEqual(job.next_run, datetime(2026, 3, 14, 0, 32, tzinfo=tz))
+
+	@patch('reminders.management.commands.run_scheduler.random.uniform', return_value=0)
+	def test_anchored_scheduler_job_catches_up_a_missed_slot_once(self, mock_uniform):
+		from reminders.management.commands.run_scheduler import ScheduledJob
+		tz = timezone.get_current_timezone()
+		last = JobRun.objects.create(name='recurring_events', status=JobRun.STATUS_SUCCEEDED)
+		JobRun.objects.filter(pk=last.pk).update(started_at=datetime(2026, 3, 9, 0, 38, tzinfo=tz))
+		job = ScheduledJob('recurring_events', 'reminders.cron.daily_recurring_events_job', 24 * 60 * 60, 600, '00:30')
+
+		job.resume(datetime(2026, 3, 10, 15, 0, tzinfo=tz))
+		self.assertEqual(job.next_run, datetime(2026, 3, 10, 0, 30, tzinfo=tz))
+
+		job.schedule_next(datetime(2026, 3, 10, 15, 1, tzinfo=tz))
+		self.assertEqual(job.next_run, datetime(2026, 3, 11, 0, 30, tzinfo=tz))
+
 	@patch('reminders.management.commands.send_deletion_notifications.send_deletion_notifications')
 	def test_send_deletion_notifications_command_calls_utility(self, mock_send):
 		mock_send.return_value = {'sent_count': 3, 'total_events': 5}
@@ -46,16 +141,16 @@ class AutomationCommandTests(TestCase):
 		mock_cleanup.assert_called_once_with()
 		self.assertIn('Deleted media for 2 of 4 events', out.getvalue())
 
-	@patch('reminders.management.commands.delete_expired_media.delete_media_from_storage')
-	@patch('reminders.management.commands.delete_expired_media.create_client')
+	@patch('reminders.supabase_helpers.create_client')
 	@patch('reminders.management.commands.delete_expired_media.ReminderEmailService.send_deletion_notification')
-	def test_delete_expired_media_command_preserves_storage_delete(self, mock_send_notification, mock_create_client, mock_delete_media):
+	def test_delete_expired_media_command_removes_storage_in_bulk(self, mock_send_notification, mock_create_client):
 		User = get_user_model()
 		user = User.objects.create_user(username='cleanup_user', email='cleanup@example.com', password='pass12345')
 		today_event = Event.objects.create(
 			user=user,
 			name='Today Event',
-			event_type='birthday',
+			event_type='other',
+			custom_label='Launch',
 			date=date(2026, 4, 13),
 			remind_days_before=1,
 		)
@@ -68,35 +163,1075 @@ class AutomationCommandTests(TestCase):
 		)
 		from reminders.models import EventMedia
 		EventMedia.objects.create(event=today_event, media_file='user/today/file.jpg', media_type='image')
+		EventMedia.objects.create(event=today_event, media_file='user/old/shared.jpg', media_type='image')
 		EventMedia.objects.create(event=old_event, media_file='user/old/file.jpg', media_type='image')
+		EventMedia.objects.create(
+			event=old_event,
+			media_file='https://x.supabase.co/storage/v1/object/public/event-media/user/old/file.jpg',
+			media_type='image',
+		)
+		EventMedia.objects.create(event=old_event, media_file='user/old/shared.jpg', media_type='image')
 
-		mock_supabase = Mock()
-		mock_create_client.return_value = mock_supabase
-		mock_delete_media.return_value = True
+		bucket = mock_create_client.return_value.storage.from_.return_value
 		out = StringIO()
 
-		with patch('reminders.management.commands.delete_expired_media.timezone.now') as mock_now:
-			mock_now.return_value = datetime(2026, 4, 13, 12, 0, 0)
-			call_command('delete_expired_media', stdout=out)
+		with self.settings(SUPABASE_URL='https://x.supabase.co', SUPABASE_SERVICE_KEY='service-key'):
+			with patch('reminders.management.commands.delete_expired_media.timezone.now') as mock_now:
+				mock_now.return_value = datetime(2026, 4, 13, 12, 0, 0)
+				call_command('delete_expired_media', stdout=out)
 
 		mock_send_notification.assert_called_once()
-		mock_create_client.assert_called_once()
-		mock_delete_media.assert_called_once()
+		# One remove() call for the deduplicated paths; the file still used by today's event is kept
+		bucket.remove.assert_called_once_with(['user/old/file.jpg'])
+		bucket.list.assert_not_called()
+		self.assertFalse(EventMedia.objects.filter(event=old_event).exists())
+		self.assertEqual(EventMedia.objects.filter(event=today_event).count(), 2)
 		self.assertIn('delete_expired_media completed', out.getvalue())
 
 
+class ReminderScheduleTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(
+			username='schedule_tester',
+			email='schedule_tester@example.com',
+			password='test-pass-123'
+		)
+		self.today = timezone.localdate()
+
+	def _event(self, name, days_ahead, remind_days_before=1, **extra):
+		return Event.objects.create(
+			user=self.user,
+			name=name,
+			event_type='birthday',
+			date=self.today + timedelta(days=days_ahead),
+			remind_days_before=remind_days_before,
+			**extra,
+		)
+
+	def test_save_sets_and_clears_fire_on(self):
+		event = self._event('Asha', 10, remind_days_before=3)
+		self.assertEqual(event.fire_on, self.today + timedelta(days=7))
+
+		event.remind_days_before = 5
+		event.save(update_fields=['remind_days_before'])
+		event.refresh_from_db()
+		self.assertEqual(event.fire_on, self.today + timedelta(days=5))
+
+		event.reminder_queued = True
+		event.save(update_fields=['reminder_queued'])
+		event.refresh_from_db()
+		self.assertIsNone(event.fire_on)
+
+		event.reminder_queued = False
+		event.notified = True
+		event.save()
+		event.refresh_from_db()
+		self.assertIsNone(event.fire_on)
+
+	def test_send_upcoming_reminders_only_touches_due_events(self):
+		due = self._event('Due', 1)
+		self._event('Later', 30)
+		missed = Event.objects.create(
+			user=self.user,
+			name='Missed',
+			event_type='birthday',
+			date=self.today - timedelta(days=2),
+			remind_days_before=1,
+		)
+
+		result = send_upcoming_reminders()
+
+		self.assertEqual(result, {'sent_count': 1, 'queued_count': 1, 'total_events': 1})
+		self.assertEqual(len(mail.outbox), 1)
+		due.refresh_from_db()
+		self.assertTrue(due.notified)
+		self.assertIsNone(due.fire_on)
+		self.assertEqual(ReminderLog.objects.filter(event=due, status='success').count(), 1)
+		missed.refresh_from_db()
+		self.assertIsNone(missed.fire_on)
+
+
+	def test_shards_split_users_and_overlapping_runs_never_double_queue(self):
+		User = get_user_model()
+		other = User.objects.create_user(username='shard_other', email='shard_other@example.com', password='test-pass-123')
+		mine = self._event('Mine', 1)
+		theirs = Event.objects.create(user=other, name='Theirs', event_type='birthday', date=self.today + timedelta(days=1))
+
+		first = send_upcoming_reminders(drain=False, shard=self.user.id % 2, shards=2)
+		second = send_upcoming_reminders(drain=False, shard=other.id % 2, shards=2)
+		again = send_upcoming_reminders(drain=False)
+
+		self.assertEqual((first['queued_count'], second['queued_count'], again['queued_count']), (1, 1, 0))
+		self.assertEqual(sorted(EmailOutbox.objects.values_list('event_id', flat=True)), sorted([mine.id, theirs.id]))
+
+	def test_shard_drain_only_sends_the_rows_it_queued(self):
+		User = get_user_model()
+		other = User.objects.create_user(username='shard_other', email='shard_other@example.com', password='test-pass-123')
+		Event.objects.create(user=other, name='Theirs', event_type='birthday', date=self.today + timedelta(days=1))
+		send_upcoming_reminders(drain=False)
+		mine = self._event('Mine', 1)
+
+		result = send_upcoming_reminders(shard=self.user.id % 2, shards=2)
+
+		self.assertEqual((result['queued_count'], result['sent_count']), (1, 1))
+		self.assertEqual([m.to for m in mail.outbox], [[self.user.email]])
+		self.assertEqual(EmailOutbox.objects.get(event=mine).status, EmailOutbox.STATUS_SENT)
+		self.assertEqual(EmailOutbox.objects.exclude(event=mine).get().status, EmailOutbox.STATUS_PENDING)
+
+	def test_local_time_run_only_selects_users_past_their_delivery_hour(self):
+		User = get_user_model()
+		pacific = User.objects.create_user(username='pacific', email='pacific@example.com', password='test-pass-123')
+		profile = pacific.profile
+		profile.timezone = 'US/Pacific'
+		profile.save()
+		self.user.profile.save()
+		kolkata_event = Event.objects.create(user=self.user, name='Kolkata', event_type='birthday', date=date(2026, 3, 11))
+		pacific_event = Event.objects.create(user=pacific, name='Pacific', event_type='birthday', date=date(2026, 3, 10))
+
+		# 02:00 UTC is 07:30 in Kolkata but already the previous evening in California
+		with self.settings(REMINDER_DELIVERY_HOUR=8):
+			first = send_upcoming_reminders(concurrency=1, local_time=True, now=datetime(2026, 3, 10, 2, tzinfo=dt_timezone.utc))
+			second = send_upcoming_reminders(concurrency=1, local_time=True, now=datetime(2026, 3, 10, 3, tzinfo=dt_timezone.utc))
+
+		self.assertEqual((first['sent_count'], second['sent_count']), (1, 1))
+		self.assertEqual([m.to for m in mail.outbox], [['pacific@example.com'], ['schedule_tester@example.com']])
+		self.assertEqual(Event.objects.filter(id__in=[kolkata_event.id, pacific_event.id], notified=True).count(), 2)
+
+class EmailRenderingTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='render_user', email='render@example.com', password='pass12345')
+
+	def test_reminder_uses_plain_text_template_and_prefetched_media(self):
+		from reminders.email_rendering import static_blocks
+		from reminders.models import EventMedia
+		event = Event.objects.create(user=self.user, name='Asha & Ravi', event_type='anniversary', date=date.today() + timedelta(days=3), remind_days_before=3)
+		EventMedia.objects.create(event=event, media_file='https://cdn.example.com/a.jpg', media_type='image')
+		event = Event.objects.prefetch_related('media').get(pk=event.pk)
+		static_blocks.cache_clear()
+
+		with CaptureQueriesContext(connection) as queries:
+			first = ReminderEmailService.build_reminder_email(self.user, event)
+			ReminderEmailService.build_reminder_email(self.user, event)
+
+		self.assertEqual(len(queries), 0)
+		self.assertEqual(static_blocks.cache_info().hits, 1)
+		self.assertIn("Asha & Ravi's Anniversary is on", first.body)
+		self.assertIn('View the image: https://cdn.example.com/a.jpg', first.body)
+		self.assertNotIn('<', first.body)
+		html = first.alternatives[0][0]
+		self.assertIn('<h1>Event Reminder</h1>', html)
+		self.assertIn('https://cdn.example.com/a.jpg', html)
+
+
+class BatchEmailSenderTests(TestCase):
+	def _message(self, to='someone@example.com'):
+		return mail.EmailMessage('Subject', 'Body', 'from@example.com', [to])
+
+	def test_messages_share_one_session_until_chunk_size(self):
+		connection = Mock()
+		connection.send_messages.return_value = 1
+
+		with BatchEmailSender(connection=connection, chunk_size=2) as sender:
+			results = sender.send_many([self._message() for _ in range(5)])
+
+		self.assertEqual(results, [True] * 5)
+		self.assertEqual(connection.send_messages.call_count, 5)
+		# Sessions: [1, 2], [3, 4], [5]
+		self.assertEqual(connection.open.call_count, 3)
+		self.assertEqual(connection.close.call_count, 3)
+
+	def test_reconnects_once_when_server_drops_session(self):
+		connection = Mock()
+		connection.send_messages.side_effect = [SMTPServerDisconnected('gone'), 1, 1]
+
+		with BatchEmailSender(connection=connection, chunk_size=50) as sender:
+			results = sender.send_many([self._message(), self._message()])
+
+		self.assertEqual(results, [True, True])
+		self.assertEqual(connection.open.call_count, 2)
+
+	def test_failed_message_does_not_stop_batch(self):
+		connection = Mock()
+		connection.send_messages.side_effect = [1, Exception('rejected'), 1]
+
+		with BatchEmailSender(connection=connection) as sender:
+			results = sender.send_many([self._message() for _ in range(3)])
+
+		self.assertEqual(results, [True, False, True])
+
+	@patch('reminders.email_utils.get_connection', wraps=mail.get_connection)
+	def test_send_upcoming_reminders_opens_one_connection(self, mock_get_connection):
+		User = get_user_model()
+		user = User.objects.create_user(username='batch_user', email='batch@example.com', password='pass12345')
+		today = timezone.localdate()
+		for name in ('One', 'Two', 'Three'):
+			Event.objects.create(user=user, name=name, event_type='birthday', date=today + timedelta(days=1))
+
+		result = send_upcoming_reminders(concurrency=1)
+
+		self.assertEqual(result['sent_count'], 3)
+		self.assertEqual(len(mail.outbox), 3)
+		mock_get_connection.assert_called_once()
+
+
+class ConcurrentDispatchTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='pool_user', email='pool@example.com', password='pass12345')
+
+	def test_resolve_concurrency_clamps_requested_workers(self):
+		from reminders.dispatch import resolve_concurrency
+
+		with self.settings(REMINDER_CONCURRENCY=3, REMINDER_MAX_CONCURRENCY=8):
+			self.assertEqual(resolve_concurrency(), 3)
+			self.assertEqual(resolve_concurrency('5'), 5)
+			self.assertEqual(resolve_concurrency(0), 1)
+			self.assertEqual(resolve_concurrency(100), 8)
+			self.assertEqual(resolve_concurrency('bogus'), 1)
+
+	def test_concurrent_run_logs_and_flags_every_event(self):
+		today = timezone.localdate()
+		events = [
+			Event.objects.create(user=self.user, name=f'Guest {i}', event_type='birthday', date=today + timedelta(days=1))
+			for i in range(6)
+		]
+
+		result = send_upcoming_reminders(concurrency=3)
+
+		self.assertEqual(result, {'sent_count': 6, 'queued_count': 6, 'total_events': 6})
+		self.assertEqual(len(mail.outbox), 6)
+		self.assertEqual(Event.objects.filter(id__in=[e.id for e in events], notified=True).count(), 6)
+		self.assertEqual(ReminderLog.objects.filter(status='success').count(), 6)
+
+	@patch('reminders.dispatch.BatchEmailSender')
+	def test_results_keep_input_order(self, mock_sender_cls):
+		from reminders.dispatch import send_concurrently
+
+		mock_sender_cls.return_value.send.side_effect = lambda message: message != 'bad'
+
+		results = send_concurrently(['ok', 'bad', 'ok', 'bad'], concurrency=2)
+
+		self.assertEqual(results, [True, False, True, False])
+
+
+class SMTPCircuitBreakerTests(TestCase):
+	def setUp(self):
+		self.breaker = CircuitBreaker('test-smtp', failure_threshold=2, cooldown=60)
+		self.breaker.reset()
+		smtp_breaker.reset()
+		self.addCleanup(smtp_breaker.reset)
+
+	def test_trips_after_consecutive_failures_and_half_opens_with_one_probe(self):
+		self.breaker.record_failure()
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+		self.breaker.record_failure()
+		self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+		self.assertFalse(self.breaker.allow_request())
+
+		with patch('reminders.circuit_breaker.time.time', return_value=datetime.now().timestamp() + 61):
+			self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+			self.assertTrue(self.breaker.allow_request())
+			self.assertFalse(self.breaker.allow_request())
+
+		self.breaker.record_success()
+		self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+	def test_backend_fails_fast_while_circuit_is_open(self):
+		from reminders.mail_backend import CircuitBreakerEmailBackend
+		backend = CircuitBreakerEmailBackend(host='smtp.invalid', port=25, username='', password='')
+		with self.settings(SMTP_CIRCUIT_FAILURE_THRESHOLD=1), patch('smtplib.SMTP', side_effect=ConnectionRefusedError) as mock_smtp:
+			with self.assertRaises(ConnectionRefusedError):
+				backend.open()
+			with self.assertRaises(CircuitOpenError):
+				backend.open()
+		mock_smtp.assert_called_once()
+
+	def test_drain_leaves_rows_pending_while_circuit_is_open(self):
+		from reminders.outbox import drain_outbox
+		row = EmailOutbox.objects.create(kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email='wait@example.com', subject='Wait')
+		with self.settings(SMTP_CIRCUIT_FAILURE_THRESHOLD=1):
+			smtp_breaker.record_failure()
+
+		result = drain_outbox()
+
+		self.assertEqual(result, {'sent': 0, 'retrying': 0, 'deferred': 0, 'failed': 0})
+		row.refresh_from_db()
+		self.assertEqual((row.status, row.attempts), (EmailOutbox.STATUS_PENDING, 0))
+
+	def test_rows_refused_by_breaker_mid_batch_keep_their_attempts(self):
+		from reminders.outbox import drain_outbox
+		row = EmailOutbox.objects.create(kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email='later@example.com', subject='Later')
+		with patch('reminders.outbox.send_concurrently', return_value=[None]):
+			result = drain_outbox()
+
+		self.assertEqual(result['deferred'], 1)
+		row.refresh_from_db()
+		self.assertEqual(row.attempts, 0)
+		self.assertEqual(row.status, EmailOutbox.STATUS_PENDING)
+		self.assertGreater(row.next_attempt_at, timezone.now())
+
+
+class BulkOutcomeFlushTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='flush_user', email='flush@example.com', password='pass12345')
+		self.today = timezone.localdate()
+
+	def _write_statements(self, queries, table):
+		return [
+			q['sql'] for q in queries
+			if table in q['sql'] and q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+		]
+
+	def test_reminder_outcomes_are_written_in_bulk(self):
+		for i in range(5):
+			Event.objects.create(user=self.user, name=f'Friend {i}', event_type='birthday', date=self.today + timedelta(days=1))
+
+		with CaptureQueriesContext(connection) as ctx:
+			result = send_upcoming_reminders(concurrency=1)
+
+		self.assertEqual(result['sent_count'], 5)
+		self.assertEqual(len(self._write_statements(ctx.captured_queries, 'reminders_reminderlog')), 1)
+		# expiry sweep + taking the batch off the schedule + notified flush
+		self.assertEqual(len(self._write_statements(ctx.captured_queries, 'reminders_event')), 3)
+		self.assertEqual(Event.objects.filter(user=self.user, notified=True, fire_on__isnull=True).count(), 5)
+
+	def test_failed_sends_are_rescheduled_not_flagged(self):
+		ok = Event.objects.create(user=self.user, name='Ok', event_type='birthday', date=self.today + timedelta(days=1))
+		bad = Event.objects.create(user=self.user, name='Bad', event_type='birthday', date=self.today + timedelta(days=1))
+
+		with patch('reminders.outbox.send_concurrently', return_value=[True, False]):
+			result = send_upcoming_reminders()
+
+		self.assertEqual(result['sent_count'], 1)
+		ok.refresh_from_db()
+		bad.refresh_from_db()
+		self.assertTrue(ok.notified)
+		self.assertFalse(bad.notified)
+		self.assertFalse(ReminderLog.objects.filter(event=bad).exists())
+		retry = EmailOutbox.objects.get(event=bad)
+		self.assertEqual(retry.status, EmailOutbox.STATUS_PENDING)
+		self.assertEqual(retry.attempts, 1)
+		self.assertGreater(retry.next_attempt_at, timezone.now())
+
+	def test_deletion_notifications_flag_events_in_one_update(self):
+		from reminders.models import EventMedia
+		for i in range(3):
+			event = Event.objects.create(user=self.user, name=f'Past {i}', event_type='anniversary', date=self.today - timedelta(days=3))
+			EventMedia.objects.create(event=event, media_file=f'user/{i}/file.jpg', media_type='image')
+
+		with CaptureQueriesContext(connection) as ctx:
+			result = send_deletion_notifications()
+
+		self.assertEqual(result, {'sent_count': 3, 'queued_count': 3, 'total_events': 3})
+		# placeholder deletion_scheduled on enqueue + deletion_notified flush
+		self.assertEqual(len(self._write_statements(ctx.captured_queries, 'reminders_event')), 2)
+		self.assertEqual(Event.objects.filter(deletion_notified=True, deletion_scheduled__isnull=False).count(), 3)
+		self.assertEqual(ReminderLog.objects.filter(status='success').count(), 3)
+
+
+class EmailOutboxTests(TestCase):
+	def setUp(self):
+		User = get_user_model()
+		self.user = User.objects.create_user(username='outbox_user', email='outbox@example.com', password='pass12345')
+		self.today = timezone.localdate()
+
+	def test_enqueue_only_leaves_email_for_the_worker(self):
+		event = Event.objects.create(user=self.user, name='Queued', event_type='birthday', date=self.today + timedelta(days=1))
+
+		result = send_upcoming_reminders(drain=False)
+
+		self.assertEqual(result, {'sent_count': 0, 'queued_count': 1, 'total_events': 1})
+		self.assertEqual(len(mail.outbox), 0)
+		event.refresh_from_db()
+		self.assertIsNone(event.fire_on)
+		self.assertFalse(event.notified)
+		# A second run must not queue the same reminder again, even after the event is edited
+		event.message = 'edited'
+		event.save()
+		self.assertIsNone(event.fire_on)
+		self.assertEqual(send_upcoming_reminders(drain=False)['queued_count'], 0)
+		self.assertEqual(EmailOutbox.objects.count(), 1)
+
+		from reminders.outbox import drain_outbox
+		self.assertEqual(drain_outbox(), {'sent': 1, 'retrying': 0, 'deferred': 0, 'failed': 0})
+		event.refresh_from_db()
+		self.assertTrue(event.notified)
+		self.assertEqual(mail.outbox[0].to, ['outbox@example.com'])
+		self.assertEqual(ReminderLog.objects.get(event=event).message, '1-day reminder sent')
+
+	def test_digest_users_get_one_email_for_all_due_events(self):
+		from users.models import UserProfile
+		UserProfile.objects.update_or_create(user=self.user, defaults={'reminder_digest': True})
+		events = [
+			Event.objects.create(user=self.user, name=name, event_type='birthday', date=self.today + timedelta(days=1))
+			for name in ('Asha', 'Ravi', 'Meera')
+		]
+
+		result = send_upcoming_reminders(concurrency=1)
+
+		self.assertEqual(result, {'sent_count': 1, 'queued_count': 1, 'total_events': 3})
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertIn('3 events coming up', mail.outbox[0].subject)
+		for name in ('Asha', 'Ravi', 'Meera'):
+			self.assertIn(name, mail.outbox[0].body)
+		self.assertEqual(Event.objects.filter(id__in=[e.id for e in events], notified=True).count(), 3)
+		self.assertEqual(ReminderLog.objects.filter(status='success', message='Digest reminder sent').count(), 3)
+
+	def test_giving_up_puts_reminder_back_on_schedule(self):
+		from reminders.outbox import drain_outbox
+		event = Event.objects.create(user=self.user, name='Flaky', event_type='birthday', date=self.today + timedelta(days=1))
+		send_upcoming_reminders(drain=False)
+		EmailOutbox.objects.update(attempts=4)
+
+		with self.settings(EMAIL_OUTBOX_MAX_ATTEMPTS=5), patch('reminders.outbox.send_concurrently', return_value=[False]):
+			result = drain_outbox()
+
+		self.assertEqual(result['failed'], 1)
+		self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_FAILED)
+		event.refresh_from_db()
+		self.assertEqual(event.fire_on, event.compute_fire_on())
+		self.assertEqual(ReminderLog.objects.get(event=event).status, 'failure')
+
+	def test_rows_waiting_for_backoff_are_not_claimed(self):
+		from reminders.outbox import claim_batch
+		EmailOutbox.objects.create(
+			kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email='later@example.com', subject='Later',
+			next_attempt_at=timezone.now() + timedelta(minutes=5),
+		)
+		due = EmailOutbox.objects.create(kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email='now@example.com', subject='Now')
+
+		claimed = claim_batch()
+
+		self.assertEqual([row.id for row in claimed], [due.id])
+		due.refresh_from_db()
+		self.assertEqual(due.status, EmailOutbox.STATUS_SENDING)
+
+	def test_undeliverable_auto_share_drops_share_link(self):
+		from reminders.views import auto_share_card
+		Event.objects.create(
+			user=self.user, name='Card', event_type='birthday', date=timezone.now().date(),
+			recipient_email='friend@example.com',
+		)
+
+		with self.settings(EMAIL_OUTBOX_MAX_ATTEMPTS=1), patch('reminders.outbox.send_concurrently', return_value=[False]):
+			queued = auto_share_card()
+
+		self.assertEqual(queued, 1)
+		self.assertFalse(CardShare.objects.exists())
+		self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.STATUS_FAILED)
+
+	def test_retry_delay_is_jittered_exponential_backoff(self):
+		from reminders.outbox import retry_delay
+		with self.settings(EMAIL_OUTBOX_RETRY_BASE_SECONDS=60, EMAIL_OUTBOX_RETRY_MAX_SECONDS=600):
+			for attempts, ceiling in ((1, 60), (3, 240), (10, 600)):
+				delay = retry_delay(attempts).total_seconds()
+				self.assertGreaterEqual(delay, ceiling / 2)
+				self.assertLessEqual(delay, ceiling)
+
+	def test_fresh_emails_go_before_budgeted_retries(self):
+		from reminders.outbox import drain_outbox
+		past = timezone.now() - timedelta(minutes=1)
+		for i in range(3):
+			EmailOutbox.objects.create(
+				kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email=f'retry{i}@example.com', subject='Retry',
+				attempts=1, next_attempt_at=past - timedelta(minutes=1),
+			)
+		EmailOutbox.objects.create(kind=EmailOutbox.KIND_MEDIA_REMOVED, to_email='fresh@example.com', subject='Fresh', next_attempt_at=past)
+
+		result = drain_outbox(retry_budget=2)
+
+		self.assertEqual(result, {'sent': 3, 'retrying': 0, 'deferred': 0, 'failed': 0})
+		self.assertEqual(mail.outbox[0].to, ['fresh@example.com'])
+		self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDING).count(), 1)
+
+	def test_send_reminder_email_does_not_retry_inline(self):
+		event = Event.objects.create(user=self.user, name='Once', event_type='birthday', date=self.today)
+		with patch('django.core.mail.EmailMultiAlternatives.send', side_effect=ConnectionError) as mock_send:
+			with self.assertRaises(ConnectionError):
+				ReminderEmailService.send_reminder_email(self.user, event)
+		mock_send.assert_called_once()
+
+	@patch('reminders.management.commands.drain_outbox.drain_outbox')
+	def test_drain_outbox_command_reports_counts(self, mock_drain):
+		mock_drain.return_value = {'sent': 2, 'retrying': 1, 'failed': 0}
+		out = StringIO()
+
+		call_command('drain_outbox', '--concurrency', '2', stdout=out)
+
+		mock_drain.assert_called_once_with(batch_size=None, concurrency=2)
+		self.assertIn('Sent 2 emails (1 rescheduled, 0 failed)', out.getvalue())
+
+
+class RecurringRolloverTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username='roller', email='roller@example.com', password='pw-123456')
+
+	def test_rollover_moves_the_event_forward_and_is_incremental(self):
+		from reminders.models import EventOccurrence
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		birthday = Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past, notified=True)
+		anniversary = Event.objects.create(user=self.user, name='Us', event_type='anniversary', date=past)
+
+		result = check_recurring_events()
+
+		self.assertEqual(result, {'rolled_count': 2, 'failed_count': 0, 'total_events': 2})
+		self.assertEqual(Event.objects.count(), 2)
+		birthday.refresh_from_db()
+		self.assertEqual(birthday.date, past.replace(year=past.year + 1))
+		self.assertFalse(birthday.notified)
+		self.assertEqual(birthday.fire_on, birthday.date - timedelta(days=1))
+		self.assertTrue(birthday.check_card_password('Asha'))
+		occurrence = EventOccurrence.objects.get(event=birthday)
+		self.assertEqual((occurrence.year, occurrence.date, occurrence.notified), (past.year, past, True))
+		anniversary.refresh_from_db()
+		self.assertTrue(anniversary.check_card_password(anniversary.date.strftime('%Y-%m-%d')))
+
+		# Nothing new crossed into the past, so the next run examines nothing
+		self.assertEqual(check_recurring_events(), {'rolled_count': 0, 'failed_count': 0, 'total_events': 0})
+
+		# The passed year still shows up among the past events
+		from reminders.views import _past_events
+		past_events = {event.name: event.occurred_on for event in _past_events(self.user, timezone.now().date())}
+		self.assertEqual(past_events, {'Asha': past, 'Us': past})
+
+	def test_recurring_events_keep_media_and_get_a_reflection_per_year(self):
+		from reminders.models import EventMedia, Reflection
+		from reminders.tasks import check_recurring_events
+		from reminders.utils import send_deletion_notifications
+		past = timezone.now().date() - timedelta(days=3)
+		birthday = Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past)
+		one_off = Event.objects.create(user=self.user, name='Launch', event_type='other', custom_label='Launch', date=past)
+		for event in (birthday, one_off):
+			EventMedia.objects.create(event=event, media_file=f'u1/{event.id}/a.jpg', media_type='image')
+
+		check_recurring_events()
+		result = send_deletion_notifications(drain=False)
+
+		# The rolled recurring event keeps its media for next year's card
+		self.assertEqual(result['queued_count'], 1)
+		self.assertEqual(EmailOutbox.objects.get().event, one_off)
+
+		Reflection.objects.create(user=self.user, event=birthday, year=past.year - 1, note='Last year')
+		self.user.is_verified = True
+		self.user.save()
+		self.client.force_login(self.user)
+		url = reverse('add_reflection', args=[birthday.id])
+		self.assertIsNone(self.client.get(url).json()['reflection'])
+
+		self.client.post(url, {'note': 'This year'})
+
+		self.assertEqual(
+			sorted(Reflection.objects.filter(event=birthday).values_list('year', 'note')),
+			[(past.year - 1, 'Last year'), (past.year, 'This year')],
+		)
+		self.assertEqual(self.client.get(url).json()['reflection'], {'note': 'This year'})
+
+	def test_rollover_leaves_rows_that_already_have_a_next_year_copy(self):
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past.replace(year=past.year - 1))
+		Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past)
+
+		self.assertEqual(check_recurring_events(), {'rolled_count': 1, 'failed_count': 0, 'total_events': 2})
+		self.assertEqual(
+			sorted(Event.objects.values_list('date', flat=True)),
+			[past.replace(year=past.year - 1), past.replace(year=past.year + 1)],
+		)
+
+
+	def test_rollover_checks_for_a_copy_at_the_date_it_would_move_to(self):
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		# Missed for several years, while a later copy already holds the next date
+		Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past.replace(year=past.year - 3))
+		Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past.replace(year=past.year + 1))
+
+		self.assertEqual(check_recurring_events()['rolled_count'], 0)
+		self.assertEqual(
+			sorted(Event.objects.values_list('date', flat=True)),
+			[past.replace(year=past.year - 3), past.replace(year=past.year + 1)],
+		)
+
+	def test_rollover_skips_a_failing_event_and_retries_it_next_run(self):
+		from reminders.models import JobWatermark
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		broken = Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past)
+		fine = Event.objects.create(user=self.user, name='Ravi', event_type='birthday', date=past)
+		apply_defaults = Event.apply_save_defaults
+
+		def fail_for_broken(event):
+			if event.pk == broken.pk:
+				raise ValueError('bad row')
+			return apply_defaults(event)
+
+		with patch.object(Event, 'apply_save_defaults', fail_for_broken):
+			result = check_recurring_events()
+
+		self.assertEqual(result, {'rolled_count': 1, 'failed_count': 1, 'total_events': 2})
+		fine.refresh_from_db()
+		broken.refresh_from_db()
+		self.assertEqual((fine.date, broken.date), (past.replace(year=past.year + 1), past))
+		self.assertLessEqual(JobWatermark.objects.get(name='recurring_events').position.date(), past)
+
+		self.assertEqual(check_recurring_events(), {'rolled_count': 1, 'failed_count': 0, 'total_events': 1})
+
+	def test_rollover_retries_one_by_one_when_the_bulk_write_fails(self):
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past)
+		Event.objects.create(user=self.user, name='Ravi', event_type='birthday', date=past)
+		bulk_update = Event.objects.bulk_update
+		calls = []
+
+		def fail_in_bulk(objs, fields, **kwargs):
+			calls.append(len(objs))
+			if len(objs) > 1:
+				raise RuntimeError('deadlock')
+			return bulk_update(objs, fields, **kwargs)
+
+		with patch.object(Event.objects, 'bulk_update', side_effect=fail_in_bulk):
+			result = check_recurring_events()
+
+		self.assertEqual(result, {'rolled_count': 2, 'failed_count': 0, 'total_events': 2})
+		self.assertEqual(calls, [2, 1, 1])
+		self.assertFalse(Event.objects.filter(date__lt=timezone.now().date()).exists())
+
+	def test_rollover_cancels_stale_reminders_and_late_deliveries_leave_next_year_alone(self):
+		from reminders.outbox import drain_outbox
+		from reminders.tasks import check_recurring_events
+		past = timezone.now().date() - timedelta(days=3)
+		single = Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past)
+		digested = Event.objects.create(user=self.user, name='Ravi', event_type='birthday', date=past)
+		Event.objects.filter(pk__in=[single.pk, digested.pk]).update(reminder_queued=True, fire_on=None)
+		reminder = EmailOutbox.objects.create(
+			kind=EmailOutbox.KIND_REMINDER, event=single, user=self.user, to_email=self.user.email,
+			subject='Reminder', body_text='Soon', log_label='Reminder',
+		)
+		EmailOutbox.objects.create(
+			kind=EmailOutbox.KIND_REMINDER_DIGEST, event_ids=[digested.pk], user=self.user, to_email=self.user.email,
+			subject='Digest', body_text='Soon', log_label='Digest',
+		)
+
+		check_recurring_events()
+		totals = drain_outbox()
+
+		reminder.refresh_from_db()
+		self.assertEqual(reminder.status, EmailOutbox.STATUS_FAILED)
+		# The digest still went out, but for last year's date
+		self.assertEqual(totals['sent'], 1)
+		digested.refresh_from_db()
+		self.assertEqual(digested.date, past.replace(year=past.year + 1))
+		self.assertFalse(digested.notified)
+		self.assertIsNotNone(digested.fire_on)
+
+	def test_toggling_recurring_rolls_only_that_event(self):
+		past = timezone.now().date() - timedelta(days=3)
+		event = Event.objects.create(user=self.user, name='Asha', event_type='birthday', date=past, is_recurring=False)
+		other = Event.objects.create(user=self.user, name='Ravi', event_type='birthday', date=past)
+		self.user.is_verified = True
+		self.user.save()
+		self.client.force_login(self.user)
+
+		with patch('reminders.tasks.check_recurring_events') as global_scan:
+			self.client.post(reverse('toggle_recurring', args=[event.id]))
+
+		global_scan.assert_not_called()
+		event.refresh_from_db()
+		other.refresh_from_db()
+		self.assertEqual(event.date, past.replace(year=past.year + 1))
+		self.assertEqual(other.date, past)
+
+
+class StorageCleanupTests(TestCase):
+	def setUp(self):
+		self.user = get_user_model().objects.create_user(username='tomb', email='tomb@example.com', password='pw-123456')
+		self.user.is_verified = True
+		self.user.save()
+		self.event = Event.objects.create(
+			user=self.user, name='Slideshow', event_type='birthday',
+			date=timezone.now().date() + timedelta(days=10), media_path='legacy/old.jpg',
+		)
+		from reminders.models import EventMedia
+		for index in range(20):
+			EventMedia.objects.create(event=self.event, media_file=f'user/{self.event.id}/{index}.jpg', media_type='image')
+
+	@patch('reminders.views.get_user_supabase_client')
+	def test_delete_event_only_queues_storage_paths(self, mock_client):
+		from reminders.models import StorageTombstone
+		self.client.force_login(self.user)
+
+		response = self.client.post(reverse('event_delete', args=[self.event.id]))
+
+		self.assertEqual(response.status_code, 302)
+		self.assertFalse(Event.objects.filter(pk=self.event.pk).exists())
+		mock_client.assert_not_called()
+		self.assertEqual(StorageTombstone.objects.count(), 21)
+
+	@patch('reminders.storage_reaper.get_service_supabase_client')
+	def test_drainer_removes_in_batches_and_reschedules_failures(self, mock_client):
+		from reminders.models import EventMedia, StorageTombstone
+		from reminders.storage_reaper import bury_media, drain_tombstones
+		bury_media(EventMedia.objects.filter(event=self.event), extra_paths=[self.event.media_path])
+		bucket = mock_client.return_value.storage.from_.return_value
+		bucket.remove.side_effect = [None, ConnectionError('storage down'), None]
+
+		result = drain_tombstones(batch_size=10, concurrency=1)
+
+		self.assertEqual(bucket.remove.call_count, 3)
+		self.assertEqual(result, {'removed': 11, 'retrying': 10})
+		retrying = StorageTombstone.objects.all()
+		self.assertEqual(retrying.count(), 10)
+		self.assertTrue(all(t.attempts == 1 and t.next_attempt_at > timezone.now() for t in retrying))
+
+	def test_reaper_removes_the_raw_object_name_behind_an_encoded_url(self):
+		from reminders.models import EventMedia
+		from reminders.storage_reaper import reap_media
+		media = EventMedia.objects.create(
+			event=self.event,
+			media_file='https://x.supabase.co/storage/v1/object/public/event-media/u1/5/ab12_My%20Photo%C3%A9.jpg?',
+			media_type='image',
+		)
+		supabase = Mock()
+
+		result = reap_media(supabase, EventMedia.objects.filter(pk=media.pk))
+
+		supabase.storage.from_.return_value.remove.assert_called_once_with(['u1/5/ab12_My Photoé.jpg'])
+		self.assertEqual(result, {'removed': 1, 'deleted': 1, 'kept': 0})
+
+
+	@patch('reminders.management.commands.reconcile_storage.get_service_supabase_client')
+	def test_reconcile_storage_removes_only_old_unreferenced_objects(self, mock_client):
+		from reminders.models import EventMedia
+		EventMedia.objects.create(
+			event=self.event,
+			media_file='https://x.supabase.co/storage/v1/object/public/event-media/u1/5/a.jpg',
+			media_type='image',
+		)
+		old, recent = '2020-01-01T00:00:00+00:00', timezone.now().isoformat()
+		listing = {
+			'': [{'name': 'u1', 'id': None}],
+			'u1': [{'name': '5', 'id': None}],
+			'u1/5': [
+				{'name': name, 'id': name, 'updated_at': mtime, 'metadata': {'size': 10}}
+				for name, mtime in [('a.jpg', old), ('b.jpg', old), ('c.jpg', recent)]
+			],
+		}
+		bucket = mock_client.return_value.storage.from_.return_value
+		bucket.list.side_effect = lambda prefix, options: listing[prefix][options['offset']:options['offset'] + options['limit']]
+		out, err = StringIO(), StringIO()
+
+		call_command('reconcile_storage', '--page-size', '2', stdout=out, stderr=err)
+
+		bucket.remove.assert_not_called()
+		self.assertIn('21 referenced paths are missing', err.getvalue())
+
+		call_command('reconcile_storage', '--page-size', '2', '--allow-missing', stdout=out)
+
+		bucket.remove.assert_called_once_with(['u1/5/b.jpg'])
+		self.assertIn('Removed 1 of 1 orphaned objects out of 3', out.getvalue())
+
+	@patch('reminders.management.commands.reconcile_storage.get_service_supabase_client')
+	def test_reconcile_storage_matches_encoded_urls_to_raw_object_names(self, mock_client):
+		from reminders.models import EventMedia
+		EventMedia.objects.filter(event=self.event).delete()
+		Event.objects.filter(pk=self.event.pk).update(media_path=None)
+		EventMedia.objects.create(
+			event=self.event,
+			media_file='https://x.supabase.co/storage/v1/object/public/event-media/u1/5/ab12_My%20Photo.jpg',
+			media_type='image',
+		)
+		listing = {
+			'': [{'name': 'u1', 'id': None}],
+			'u1': [{'name': '5', 'id': None}],
+			'u1/5': [{'name': 'ab12_My Photo.jpg', 'id': '1', 'updated_at': '2020-01-01T00:00:00+00:00', 'metadata': {'size': 10}}],
+		}
+		bucket = mock_client.return_value.storage.from_.return_value
+		bucket.list.side_effect = lambda prefix, options: listing[prefix][options['offset']:options['offset'] + options['limit']]
+		out = StringIO()
+
+		call_command('reconcile_storage', stdout=out)
+
+		bucket.remove.assert_not_called()
+		self.assertIn('Removed 0 of 0 orphaned objects out of 1', out.getvalue())
+		self.assertIn('0 referenced paths missing', out.getvalue())
+
+
+class MediaUploadTests(TestCase):
+	def test_spooled_uploads_are_streamed_from_disk(self):
+		from django.core.files.uploadedfile import TemporaryUploadedFile
+		from reminders.supabase_helpers import stream_upload
+		supabase = Mock()
+		bucket = supabase.storage.from_.return_value
+		sent = {}
+
+		def upload(path, body, file_options):
+			sent['body'] = body
+			sent['first_chunk'] = body.read(4)
+		bucket.upload.side_effect = upload
+
+		upload_file = TemporaryUploadedFile('big.mp3', 'audio/mpeg', 4 * 1024 * 1024, None)
+		upload_file.write(b'ID3' + b'\0' * (4 * 1024 * 1024 - 3))
+		upload_file.seek(0)
+		stream_upload(supabase, 'u1/5/big.mp3', upload_file, 'audio/mpeg')
+
+		self.assertNotIsInstance(sent['body'], bytes)
+		self.assertEqual(sent['body'].name, upload_file.temporary_file_path())
+		self.assertEqual(sent['first_chunk'], b'ID3\0')
+		self.assertTrue(sent['body'].closed)
+
+
+	def test_slideshow_uploads_in_parallel_and_rolls_back_on_failure(self):
+		from reminders.models import EventMedia, StorageTombstone
+		from reminders.views import _validate_and_upload_media
+		user = get_user_model().objects.create_user(username='slides', email='slides@example.com', password='pw-123456')
+		event = Event.objects.create(user=user, name='Slides', event_type='birthday', date=timezone.now().date())
+		request = Mock(user=user)
+		supabase = Mock()
+		supabase.storage.from_.return_value.get_public_url.side_effect = lambda path: f'https://cdn.example.com/event-media/{path}?'
+		photos = [SimpleUploadedFile(f'{index}.jpg', b'jpeg', content_type='image/jpeg') for index in range(5)]
+
+		def upload(client, path, file, content_type):
+			if file.name == '3.jpg':
+				raise ConnectionError('storage down')
+			return Mock(error=None, status_code=200)
+
+		with patch('reminders.views.stream_upload', side_effect=upload):
+			result = _validate_and_upload_media(request, event, supabase, photos)
+
+		self.assertIn("Failed to upload '3.jpg'", result)
+		self.assertFalse(EventMedia.objects.exists())
+		self.assertEqual(StorageTombstone.objects.count(), 4)
+
+		with patch('reminders.views.stream_upload', return_value=Mock(error=None, status_code=200)) as mock_upload:
+			created = _validate_and_upload_media(request, event, supabase, photos[:3])
+
+		self.assertEqual(mock_upload.call_count, 3)
+		self.assertEqual(len(created), 3)
+		self.assertEqual(event.media.count(), 3)
+		self.assertFalse(event.media.filter(media_file__endswith='?').exists())
+
+
+	def test_image_renditions_are_generated_off_the_request(self):
+		from io import BytesIO
+		from PIL import Image
+		from reminders.models import EventMedia
+		from reminders.tasks import generate_media_renditions
+		from reminders.views import _validate_and_upload_media
+		user = get_user_model().objects.create_user(username='thumbs', email='thumbs@example.com', password='pw-123456')
+		event = Event.objects.create(user=user, name='Thumbs', event_type='birthday', date=timezone.now().date())
+		supabase = Mock()
+		bucket = supabase.storage.from_.return_value
+		bucket.get_public_url.side_effect = lambda path: f'https://cdn.example.com/event-media/{path}'
+		buffer = BytesIO()
+		Image.new('RGB', (3400, 2000), (200, 40, 40)).save(buffer, format='JPEG')
+		photo = SimpleUploadedFile('my party.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+		with patch('reminders.views.stream_upload', return_value=Mock(error=None, status_code=200)), \
+				patch('reminders.views.async_task') as mock_async_task, \
+				self.captureOnCommitCallbacks(execute=True):
+			media, = _validate_and_upload_media(Mock(user=user), event, supabase, [photo])
+
+		bucket.upload.assert_not_called()
+		mock_async_task.assert_called_once_with('reminders.tasks.generate_media_renditions', [media.pk])
+
+		bucket.download.return_value = buffer.getvalue()
+		with patch('reminders.tasks.get_service_supabase_client', return_value=supabase):
+			generate_media_renditions([media.pk])
+
+		self.assertTrue(bucket.download.call_args.args[0].endswith('_my party.jpg'))
+		thumb_path, thumb_bytes = bucket.upload.call_args_list[0].args
+		self.assertTrue(thumb_path.endswith('-thumb.webp'))
+		self.assertIn('/renditions/', thumb_path)
+		self.assertEqual(Image.open(BytesIO(thumb_bytes)).size, (96, 96))
+		media = EventMedia.objects.get(pk=media.pk)
+		# The JPEG is decoded at half scale, but the row records the original size
+		self.assertEqual((media.width, media.height), (3400, 2000))
+		self.assertEqual(media.thumbnail_url, f'https://cdn.example.com/event-media/{thumb_path}')
+		self.assertEqual((media.thumbnail_width, media.thumbnail_height), (96, 96))
+		self.assertEqual([(item['width'], item['height']) for item in media.renditions], [(480, 282), (960, 565), (1600, 941)])
+		self.assertEqual(media.dominant_color, '#c82828')
+		self.assertTrue(media.placeholder.startswith('data:image/webp;base64,'))
+		self.assertLess(len(media.placeholder), 400)
+
+		Event.objects.filter(pk=event.pk).update(date=timezone.now().date() - timedelta(days=3), is_recurring=False)
+		user.is_verified = True
+		user.save()
+		self.client.force_login(user)
+		entry, = self.client.get(reverse('add_reflection', args=[event.id])).json()['event']['media']
+		self.assertEqual(entry['placeholder'], media.placeholder)
+		self.assertEqual((entry['dominant_color'], entry['width'], entry['height']), ('#c82828', 3400, 2000))
+
+
+	def test_backfill_adds_width_renditions_for_the_card_srcset(self):
+		from io import BytesIO
+		from PIL import Image
+		from reminders.models import EventMedia
+		from reminders.renditions import backfill_renditions
+		user = get_user_model().objects.create_user(username='srcset', email='srcset@example.com', password='pw-123456')
+		event = Event.objects.create(user=user, name='Srcset', event_type='birthday', date=timezone.now().date())
+		original = 'https://cdn.example.com/event-media/u1/7/party.jpg'
+		media = EventMedia.objects.create(
+			event=event, media_file=original, media_type='image',
+			width=1200, height=800, thumbnail_url='https://cdn.example.com/event-media/u1/7/renditions/party-thumb.webp',
+		)
+		EventMedia.objects.create(event=event, media_file=original.replace('.jpg', '-small.jpg'), media_type='image', width=300, height=200, placeholder='data:image/webp;base64,UklGR')
+		supabase = Mock()
+		bucket = supabase.storage.from_.return_value
+		bucket.get_public_url.side_effect = lambda path: f'https://cdn.example.com/event-media/{path}'
+		buffer = BytesIO()
+		Image.new('RGB', (1200, 800), (40, 120, 200)).save(buffer, format='JPEG')
+		bucket.download.return_value = buffer.getvalue()
+
+		self.assertEqual(backfill_renditions(supabase), {'processed': 1, 'failed': 0})
+
+		bucket.download.assert_called_once_with('u1/7/party.jpg')
+		media.refresh_from_db()
+		self.assertEqual([(item['width'], item['height']) for item in media.renditions], [(480, 320), (960, 640)])
+		self.assertEqual(
+			media.srcset(),
+			'https://cdn.example.com/event-media/u1/7/renditions/party-w480.webp 480w, '
+			'https://cdn.example.com/event-media/u1/7/renditions/party-w960.webp 960w, '
+			f'{original} 1200w',
+		)
+		self.assertEqual(len(media.file_urls()), 4)
+		self.assertEqual(backfill_renditions(supabase), {'processed': 0, 'failed': 0})
+
+		# A missing original is retried a few times, behind untried rows, then left alone
+		broken = EventMedia.objects.create(event=event, media_file=original.replace('party', 'gone'), media_type='image')
+		fresh = EventMedia.objects.create(event=event, media_file=original, media_type='image')
+
+		def download(path):
+			if 'gone' in path:
+				raise FileNotFoundError(path)
+			return buffer.getvalue()
+		bucket.download.side_effect = download
+		self.assertEqual(backfill_renditions(supabase, limit=1), {'processed': 0, 'failed': 1})
+		self.assertEqual(backfill_renditions(supabase, limit=1), {'processed': 1, 'failed': 0})
+		fresh.refresh_from_db()
+		self.assertEqual(fresh.width, 1200)
+		for _ in range(10):
+			backfill_renditions(supabase)
+		broken.refresh_from_db()
+		self.assertEqual(broken.rendition_attempts, 5)
+
+
 class TriggerEndpointTests(TestCase):
-	@patch('reminders.views.send_upcoming_reminders')
+	@patch('reminders.views.async_task')
 	@patch('reminders.views.settings.REMINDER_CRON_SECRET', 'test-secret')
-	def test_trigger_endpoint_accepts_valid_token(self, mock_send):
+	def test_trigger_endpoint_queues_a_job_and_returns_its_id(self, mock_async_task):
 		response = self.client.post(
 			reverse('send_daily_reminders'),
 			{'token': 'test-secret'},
 		)
 
+		self.assertEqual(response.status_code, 202)
+		run = JobRun.objects.get()
+		self.assertEqual(run.status, JobRun.STATUS_QUEUED)
+		self.assertEqual(response.json()['job_id'], run.id)
+		self.assertTrue(response.json()['status_url'].endswith(reverse('job_status', args=[run.id])))
+		mock_async_task.assert_called_once_with(
+			'reminders.tasks.run_reminder_trigger', run.id, timeout=settings.JOB_LEASE_SECONDS, concurrency=None,
+		)
+
+	@patch('reminders.views.async_task')
+	@patch('reminders.views.settings.REMINDER_CRON_SECRET', 'test-secret')
+	def test_trigger_endpoint_returns_the_live_run_instead_of_overlapping(self, mock_async_task):
+		live = JobRun.objects.create(name='send_reminders', status=JobRun.STATUS_RUNNING)
+
+		response = self.client.post(reverse('send_daily_reminders'), {'token': 'test-secret'})
+
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(response.json()['job_id'], live.id)
+		mock_async_task.assert_not_called()
+		self.assertEqual(JobRun.objects.count(), 1)
+
+	@patch('reminders.tasks.drain_outbox')
+	@patch('reminders.tasks.send_local_time_reminders')
+	@patch('reminders.views.settings.REMINDER_CRON_SECRET', 'test-secret')
+	def test_reminder_trigger_task_reports_progress(self, mock_send, mock_drain):
+		from reminders.tasks import run_reminder_trigger
+		mock_send.return_value = {'sent_count': 0, 'queued_count': 3, 'total_events': 3}
+
+		def drain(progress=None, **kwargs):
+			totals = {'sent': 2, 'retrying': 0, 'deferred': 0, 'failed': 1}
+			progress(totals)
+			return totals
+		mock_drain.side_effect = drain
+		run = JobRun.objects.create(name='send_reminders', status=JobRun.STATUS_QUEUED)
+
+		run_reminder_trigger(run.id)
+
+		# The workflow trigger must not send ahead of users' local delivery hour
+		mock_send.assert_called_once_with(drain=False)
+		response = self.client.get(reverse('job_status', args=[run.id]), HTTP_X_CRON_TOKEN='test-secret')
 		self.assertEqual(response.status_code, 200)
-		self.assertEqual(response.json()['message'], 'Reminders sent successfully')
-		mock_send.assert_called_once_with()
+		payload = response.json()
+		self.assertEqual(payload['status'], JobRun.STATUS_SUCCEEDED)
+		self.assertEqual((payload['processed'], payload['sent'], payload['failed']), (3, 2, 1))
+		self.assertEqual(self.client.get(reverse('job_status', args=[run.id])).status_code, 403)
+
+	def test_run_job_records_counts_and_releases_the_lease(self):
+		from reminders.jobs import run_job
+		job = Mock(return_value={'total_events': 7, 'queued_count': 5})
+
+		run = run_job('ledger-test', job, 'arg', acted='queued_count')
+		again = run_job('ledger-test', job, 'arg', acted='queued_count')
+
+		self.assertEqual((run.status, run.rows_scanned, run.rows_acted), (JobRun.STATUS_SUCCEEDED, 7, 5))
+		self.assertIsNotNone(run.duration_seconds)
+		self.assertEqual(again.status, JobRun.STATUS_SUCCEEDED)
+		job.assert_called_with('arg')
+
+	@patch('reminders.tasks.send_local_time_reminders')
+	def test_redelivered_trigger_task_does_not_rerun_a_finished_job(self, mock_send):
+		from reminders.tasks import run_reminder_trigger
+		run = JobRun.objects.create(name='send_reminders', status=JobRun.STATUS_SUCCEEDED)
+
+		run_reminder_trigger(run.id)
+
+		mock_send.assert_not_called()
+		run.refresh_from_db()
+		self.assertEqual(run.status, JobRun.STATUS_SUCCEEDED)
+		self.assertEqual(JobRun.objects.count(), 1)
+
+	def test_run_job_skip_records_a_new_row_and_leaves_the_queued_run(self):
+		from reminders.jobs import JobLease, run_job
+		queued = JobRun.objects.create(name='ledger-test', status=JobRun.STATUS_QUEUED)
+		other = JobLease('ledger-test')
+		self.assertTrue(other.acquire())
+		job = Mock()
+
+		skipped = run_job('ledger-test', job, run=queued)
+
+		other.release()
+		job.assert_not_called()
+		self.assertNotEqual(skipped.pk, queued.pk)
+		self.assertEqual((skipped.status, skipped.holder), (JobRun.STATUS_SKIPPED, other.token))
+		queued.refresh_from_db()
+		self.assertEqual(queued.status, JobRun.STATUS_QUEUED)
+
+	def test_run_job_fails_loudly_when_the_lease_was_lost(self):
+		from django.core.cache import cache
+		from reminders.jobs import LeaseLost, run_job
+
+		def job():
+			# Simulate the lease expiring and another process taking it over
+			cache.set('job-lease:ledger-test', 'someone-else')
+			return {'total_events': 1}
+
+		with self.assertRaises(LeaseLost):
+			run_job('ledger-test', job)
+
+		run = JobRun.objects.get(name='ledger-test')
+		self.assertEqual(run.status, JobRun.STATUS_FAILED)
+		self.assertIn('expired', run.error)
+		self.assertEqual(cache.get('job-lease:ledger-test'), 'someone-else')
+		cache.delete('job-lease:ledger-test')
 
 	@patch('reminders.views.settings.REMINDER_CRON_SECRET', '')
 	def test_trigger_endpoint_returns_503_when_secret_missing(self):
@@ -47,6 +47,7 @@ urlpatterns = [
     # Cron / automated tasks
     path('send-daily-reminders/', views.trigger_send_reminders, name='send_daily_reminders'),
     path('trigger-auto-share/', views.trigger_auto_share_card, name='trigger_auto_share_card'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
 
     # Admin
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
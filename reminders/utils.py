@@ -1,107 +1,298 @@
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta, datetime
-from .models import Event, ReminderLog, ImportLog, EventMedia, Reflection
+from datetime import timedelta, datetime, timezone as dt_timezone
+from .models import EmailOutbox, Event, ReminderLog, ImportLog, EventMedia, Reflection
 from .email_utils import ReminderEmailService
+from .outbox import drain_outbox, enqueue, outbox_row
+from .storage_reaper import reap_media
+from .supabase_helpers import get_service_supabase_client
 import logging
 import csv
 import re
 from io import StringIO
 from django.core.exceptions import ValidationError
 from django.http import HttpResponse
-from django.db.models import Count, Sum
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Mod
 from django.utils.timezone import make_aware, is_naive
 from django.contrib.auth import get_user_model
 logger = logging.getLogger('app_logger')
 
-def send_upcoming_reminders():
-    """Send reminder emails for events approaching their reminder date.
+def due_reminders(today):
+    """Return the events whose reminder is due on *today*.
 
-    Uses ``<=`` instead of ``==`` so that if the cron job is down for a day
-    the reminder still fires when it comes back (catch-up behaviour).
+    This is a range scan over the indexed ``fire_on`` column; events whose
+    date has already passed are excluded so a late reminder is never sent.
     """
-    today = timezone.localdate()
-    sent_count = 0
-    events = Event.objects.filter(
-        notified=False,
-    ).select_related('user', 'user__profile').prefetch_related('media')
+    return Event.objects.filter(notified=False, fire_on__lte=today, date__gte=today)
+
+
+def delivery_buckets(now=None):
+    """Map each local date to the UTC-offset buckets whose delivery hour has passed.
+
+    Only the handful of distinct ``UserProfile.utc_offset_minutes`` values
+    are evaluated, never individual rows.  Users without a profile fall in
+    the bucket of the project ``TIME_ZONE``.
+    """
+    from users.models import UserProfile
+
+    now = (now or timezone.now()).astimezone(dt_timezone.utc)
+    offsets = set(UserProfile.objects.values_list('utc_offset_minutes', flat=True).distinct())
+    offsets.add(UserProfile.offset_for(settings.TIME_ZONE, now))
+    buckets = {}
+    for offset in sorted(offsets):
+        local = now + timedelta(minutes=offset)
+        if local.hour >= settings.REMINDER_DELIVERY_HOUR:
+            buckets.setdefault(local.date(), []).append(offset)
+    return buckets
+
+
+def due_local_reminders(now=None):
+    """Return the events whose reminder is due at their owner's local delivery hour.
+
+    Like :func:`due_reminders`, but "today" is each user's local date and
+    only users whose local time has reached ``REMINDER_DELIVERY_HOUR`` are
+    selected, via the indexed offset bucket on ``UserProfile``.
+    """
+    from users.models import UserProfile
+
+    now = now or timezone.now()
+    default_offset = UserProfile.offset_for(settings.TIME_ZONE, now)
+    condition = Q()
+    for local_date, offsets in delivery_buckets(now).items():
+        users = Q(user__profile__utc_offset_minutes__in=offsets)
+        if default_offset in offsets:
+            users |= Q(user__profile__isnull=True)
+        condition |= users & Q(fire_on__lte=local_date, date__gte=local_date)
+    if not condition:
+        return Event.objects.none()
+    return Event.objects.filter(condition, notified=False)
+
+
+def expire_missed_reminders(today):
+    """Drop reminders whose event date passed before they could be sent.
+
+    They can never fire again, so clearing ``fire_on`` keeps them out of the
+    range scan in :func:`due_reminders`.
+    """
+    return Event.objects.filter(fire_on__lte=today, date__lt=today).update(fire_on=None)
+
+
+def _chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
+def _wants_digest(user):
+    profile = getattr(user, 'profile', None)
+    return bool(profile and profile.reminder_digest)
+
+
+def _reminder_batches(events):
+    """Group due events into one list per email.
+
+    Users who opted into digests get all of their due events in one email;
+    everyone else gets one email per event.
+    """
+    digests = {}
+    batches = []
     for event in events:
-        days_until_event = (event.date - today).days
-        if 0 <= days_until_event <= event.remind_days_before:
-            user = event.user
-            logger.info(f"Sending {event.remind_days_before}-day reminder email for {event.name} to {user.email}")
-            try:
-                success = ReminderEmailService.send_reminder_email(user, event)
-            except Exception as e:
-                logger.error(f"All retries failed for reminder email {event.name} to {user.email}: {e}")
-                success = False
-            ReminderLog.objects.create(
-                user=user,
-                event=event,
-                status='success' if success else 'failure',
-                message=f"{event.remind_days_before}-day reminder sent" if success else f"{event.remind_days_before}-day reminder failed"
-            )
-            if success:
-                event.notified = True
-                event.save()
-                sent_count += 1
-                logger.info(f"Reminder email sent successfully for {event.name} to {user.email}")
-            else:
-                logger.error(f"Failed to send reminder email for {event.name} to {user.email}")
-    logger.info(f"Total reminders sent: {sent_count}")
-    return {"sent_count": sent_count, "total_events": events.count()}
-
-def send_deletion_notifications():
+        if _wants_digest(event.user):
+            if event.user_id not in digests:
+                digests[event.user_id] = []
+                batches.append(digests[event.user_id])
+            digests[event.user_id].append(event)
+        else:
+            batches.append([event])
+    return batches
+
+
+def _reminder_row(batch):
+    """Render the outbox row for one batch from :func:`_reminder_batches`."""
+    if len(batch) == 1:
+        event = batch[0]
+        msg = ReminderEmailService.build_reminder_email(event.user, event)
+        if msg is None:
+            return None
+        return outbox_row(
+            msg, EmailOutbox.KIND_REMINDER,
+            user=event.user, event=event, log_label=f"{event.remind_days_before}-day reminder",
+        )
+    user = batch[0].user
+    msg = ReminderEmailService.build_reminder_digest(user, batch)
+    if msg is None:
+        return None
+    return outbox_row(
+        msg, EmailOutbox.KIND_REMINDER_DIGEST,
+        user=user, event_ids=[event.id for event in batch], log_label='Digest reminder',
+    )
+
+
+def _claim_scheduled(batches):
+    """Lock the events in *batches* that are still scheduled and drop the rest.
+
+    Must run inside the enqueue transaction.  ``SELECT ... FOR UPDATE SKIP
+    LOCKED`` passes over events another runner is enqueueing right now, and
+    the ``fire_on`` re-check drops those it already took off the schedule, so
+    overlapping runs never queue the same reminder twice.
+    """
+    ids = [event.id for batch in batches for event in batch]
+    claimed = set(
+        Event.objects.filter(id__in=ids, notified=False, fire_on__isnull=False)
+        .select_for_update(skip_locked=True)
+        .values_list('id', flat=True)
+    )
+    kept = ([event for event in batch if event.id in claimed] for batch in batches)
+    return [batch for batch in kept if batch]
+
+
+def send_upcoming_reminders(concurrency=None, drain=True, local_time=False, now=None, shard=None, shards=None):
+    """Queue reminder emails for events approaching their reminder date.
+
+    Due events are found through the indexed ``fire_on`` schedule column, so
+    the job only touches rows whose reminder window has opened.  Uses ``<=``
+    instead of ``==`` so that if the cron job is down for a day the reminder
+    still fires when it comes back (catch-up behaviour).
+
+    Users with ``reminder_digest`` enabled get a single email covering all of
+    their due events; everyone else gets one email per event.  Each email is
+    rendered into the ``EmailOutbox`` and its events taken off the schedule in
+    the same transaction; the drain worker sends it and sets ``notified``.
+    With *drain* the queued reminders are sent right away by *concurrency*
+    SMTP workers, otherwise they are left for the worker.
+
+    With *local_time* only users whose local time has reached
+    ``REMINDER_DELIVERY_HOUR`` are included.  Every entry point runs in that
+    mode (see :func:`send_local_time_reminders`); without it every reminder
+    due on the server's date is sent and reminders whose server date has
+    passed are expired, which is wrong for users west of the server.
+
+    *shard* and *shards* restrict the run to users with ``user_id % shards ==
+    shard`` so several processes can split one run (see ``trigger_reminders
+    --workers``) and drain only the outbox rows they queued themselves.
+    Events are claimed with row locks when they are queued, so even
+    overlapping unsharded runs never email an event twice.
+    """
+    queued_ids = []
+    if local_time:
+        now = now or timezone.now()
+        # The earliest local date anywhere (UTC-12) still owns unsent reminders
+        expire_missed_reminders((now.astimezone(dt_timezone.utc) - timedelta(hours=12)).date())
+        due = due_local_reminders(now)
+    else:
+        today = timezone.localdate()
+        expire_missed_reminders(today)
+        due = due_reminders(today)
+    if shards and shards > 1:
+        due = due.annotate(shard=Mod('user_id', shards)).filter(shard=shard)
+    events = list(due.select_related('user', 'user__profile').prefetch_related('media'))
+
+    for chunk in _chunked(_reminder_batches(events), getattr(settings, 'REMINDER_FLUSH_SIZE', 200)):
+        with transaction.atomic():
+            rows = []
+            scheduled_ids = []
+            for batch in _claim_scheduled(chunk):
+                row = _reminder_row(batch)
+                if row is None:
+                    continue
+                rows.append(row)
+                scheduled_ids.extend(event.id for event in batch)
+            queued_ids.extend(row.id for row in enqueue(rows))
+            Event.objects.filter(id__in=scheduled_ids).update(fire_on=None, reminder_queued=True)
+    queued_count = len(queued_ids)
+    logger.info(f"Total reminder emails queued: {queued_count} for {len(events)} events")
+
+    result = {"sent_count": 0, "queued_count": queued_count, "total_events": len(events)}
+    if drain and queued_count:
+        kinds = [EmailOutbox.KIND_REMINDER, EmailOutbox.KIND_REMINDER_DIGEST]
+        # A shard only sends what it queued, so its counts never include other shards' rows
+        ids = queued_ids if shards and shards > 1 else None
+        result["sent_count"] = drain_outbox(concurrency=concurrency, kinds=kinds, ids=ids)['sent']
+        logger.info(f"Total reminders sent: {result['sent_count']}")
+    return result
+
+def send_local_time_reminders(concurrency=None, drain=True):
+    """Send the reminders due at their owners' local delivery hour.
+
+    The entry point for every scheduled or triggered run, so a run at any
+    hour only reaches users whose local time has got there.
+    """
+    from users.models import UserProfile
+
+    UserProfile.refresh_utc_offsets()
+    return send_upcoming_reminders(concurrency=concurrency, drain=drain, local_time=True)
+
+def send_deletion_notifications(drain=True):
+    """Queue media-deletion notices for expired events that still have media.
+
+    ``deletion_scheduled`` is set when the notice is queued so the event is
+    not picked up twice; the drain worker sets ``deletion_notified`` and the
+    real cleanup date once the email is delivered.
+
+    A recurring event is one row that the daily rollover moves to its next
+    date before this runs, and its media is the card for every year, so it
+    never matches here: its media is kept for as long as the event recurs.
+    It expires like a one-off event's once recurrence is turned off and the
+    last date passes.  Per-year copies left by the old rollover are past
+    dates and expire as before.
+    """
     today = timezone.localdate()
-    sent_count = 0
-    expired_events = Event.objects.filter(
+    expired_events = list(Event.objects.filter(
         date__lt=today,
         deletion_notified=False,
+        deletion_scheduled__isnull=True,
         media__isnull=False
-    ).select_related('user').prefetch_related('media').distinct()
+    ).select_related('user').prefetch_related('media').distinct())
 
+    rows = []
     for event in expired_events:
-        user = event.user
-        logger.info(f"Sending deletion notification for {event.name} to {user.email}")
-        try:
-            success = ReminderEmailService.send_deletion_notification(user, event)
-        except Exception as e:
-            logger.error(f"All retries failed for deletion notification {event.name} to {user.email}: {e}")
-            success = False
-        ReminderLog.objects.create(
-            user=user,
-            event=event,
-            status='success' if success else 'failure',
-            message='Deletion notification sent' if success else 'Deletion notification failed'
+        msg = ReminderEmailService.build_deletion_notification(event.user, event)
+        if msg is None:
+            continue
+        rows.append(outbox_row(
+            msg, EmailOutbox.KIND_DELETION_NOTICE,
+            user=event.user, event=event, log_label='Deletion notification',
+        ))
+    with transaction.atomic():
+        enqueue(rows)
+        Event.objects.filter(id__in=[row.event_id for row in rows]).update(
+            deletion_scheduled=timezone.now() + timedelta(days=2)
         )
-        if success:
-            event.deletion_notified = True
-            event.deletion_scheduled = timezone.now() + timedelta(days=2)
-            event.save()
-            sent_count += 1
-            logger.info(f"Deletion notification sent successfully for {event.name} to {user.email}")
-        else:
-            logger.error(f"Failed to send deletion notification for {event.name} to {user.email}")
-    logger.info(f"Total deletion notifications sent: {sent_count}")
-    return {"sent_count": sent_count, "total_events": expired_events.count()}
+    logger.info(f"Total deletion notifications queued: {len(rows)}")
+
+    result = {"sent_count": 0, "queued_count": len(rows), "total_events": len(expired_events)}
+    if drain and rows:
+        result["sent_count"] = drain_outbox(kinds=[EmailOutbox.KIND_DELETION_NOTICE])['sent']
+        logger.info(f"Total deletion notifications sent: {result['sent_count']}")
+    return result
 
 def cleanup_expired_media():
-    today = timezone.now()
-    deleted_count = 0
-    events_to_delete = Event.objects.filter(
-        deletion_scheduled__lte=today,
+    """Delete the stored files and media rows of events whose deletion notice was delivered.
+
+    Storage objects are removed in bulk by :func:`reap_media`.  Without a
+    storage client nothing is deleted, so the files are not orphaned and the
+    next run retries.
+    """
+    now = timezone.now()
+    event_ids = list(Event.objects.filter(
+        deletion_scheduled__lte=now,
         deletion_notified=True
-    ).prefetch_related('media')
-
-    for event in events_to_delete:
-        logger.info(f"Deleting media for event {event.name}")
-        event.media.all().delete()
-        event.deletion_scheduled = None
-        event.save()
-        deleted_count += 1
-        logger.info(f"Media deleted successfully for {event.name}")
-    logger.info(f"Total events with media deleted: {deleted_count}")
-    return {"deleted_count": deleted_count, "total_events": events_to_delete.count()}
+    ).values_list('id', flat=True))
+    if not event_ids:
+        return {"deleted_count": 0, "total_events": 0}
+
+    supabase = get_service_supabase_client()
+    if supabase is None:
+        logger.warning(f"Storage client unavailable; media for {len(event_ids)} events kept for the next run")
+        return {"deleted_count": 0, "total_events": len(event_ids)}
+
+    reaped = reap_media(supabase, EventMedia.objects.filter(event_id__in=event_ids))
+    pending = set(EventMedia.objects.filter(event_id__in=event_ids).values_list('event_id', flat=True))
+    done = [event_id for event_id in event_ids if event_id not in pending]
+    Event.objects.filter(id__in=done).update(deletion_scheduled=None)
+    logger.info(f"Total events with media deleted: {len(done)}")
+    return {"deleted_count": len(done), "total_events": len(event_ids), "files_removed": reaped['removed']}
 
 def process_bulk_import(user, csv_file):
     try:
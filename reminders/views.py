@@ -2,33 +2,38 @@ import csv
 import json
 import logging
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.mail import send_mail
-from django.db.models import Prefetch
+from django.db import transaction
+from django.db.models import Case, DateField, F, OuterRef, Prefetch, Subquery, When
+from django.db.models.functions import ExtractYear
 from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django_q.tasks import async_task
 from django_ratelimit.decorators import ratelimit
 
 from users.decorators import email_verified_required
 
+from .email_utils import ReminderEmailService
 from .forms import EventForm
-from .models import CardShare, Event, EventMedia, Reflection
-from .supabase_helpers import get_user_supabase_client
+from .jobs import AUTO_SHARE_JOB, REMINDER_JOB
+from .models import CardShare, EmailOutbox, Event, EventMedia, EventOccurrence, JobRun, Reflection
+from .outbox import drain_outbox, enqueue, outbox_row
+from .storage_reaper import bury_media
+from .supabase_helpers import MEDIA_BUCKET, get_user_supabase_client, stream_upload
 from .utils import (
     get_admin_dashboard_stats,
     get_analytics_data,
     get_csv_template,
     process_bulk_import,
-    send_upcoming_reminders,
 )
 
 logger = logging.getLogger('app_logger')
@@ -38,88 +43,106 @@ logger = logging.getLogger('app_logger')
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _validate_media(file):
+    """Return ``(media_type, content_type)`` for an acceptable upload, or an error message."""
+    if file.size > settings.MAX_FILE_SIZE:
+        return f"File '{file.name}' exceeds 50MB limit."
+    content_type = (file.content_type or '').lower()
+    if content_type not in settings.ALLOWED_MEDIA_TYPES:
+        return (
+            f"Invalid file type for '{file.name}'. Allowed: JPG, PNG, GIF, WEBP, BMP, TIFF, SVG, "
+            f"MP3, WAV, FLAC, OGG, AAC, M4A, MP4"
+        )
+
+    if content_type.startswith('image/'):
+        return 'image', content_type
+    if content_type.startswith('audio/'):
+        return 'audio', content_type
+    return (
+        f"Invalid file type for '{file.name}'. Allowed: JPG, PNG, GIF, WEBP, BMP, TIFF, SVG, "
+        f"MP3, WAV, FLAC, OGG, AAC, M4A"
+    )
+
+
+def _upload_one(supabase, file_path, file):
+    """Upload one file; returns an error message, or None on success."""
+    try:
+        response = stream_upload(supabase, file_path, file, file.content_type)
+    except Exception as e:
+        logger.error(f"Upload of {file_path} failed: {e}")
+        return f"Failed to upload '{file.name}': {e}"
+    if hasattr(response, 'error') and response.error:
+        return f"Failed to upload '{file.name}': {response.error}"
+    if hasattr(response, 'status_code') and response.status_code not in (200, 201):
+        return f"Upload failed for '{file.name}'"
+    return None
+
+
 def _validate_and_upload_media(request, event, supabase, files):
     """Validate file constraints and upload media files to Supabase.
 
+    Every file is validated before anything is uploaded; uploads then run on
+    a bounded thread pool (``MEDIA_UPLOAD_CONCURRENCY``) and the EventMedia
+    rows are created with one ``bulk_create``.  If any upload fails, the
+    files that did upload are queued for removal so nothing is left behind.
+    Images are not decoded here: their renditions are generated by a
+    background task once the rows are committed.
+
     Returns a list of created EventMedia objects on success,
     or a string error message on the first validation/upload failure.
     """
-    created = []
+    pending = []
     for file in files:
-        if file.size > settings.MAX_FILE_SIZE:
-            return f"File '{file.name}' exceeds 50MB limit."
-        content_type = (file.content_type or '').lower()
-        if content_type not in settings.ALLOWED_MEDIA_TYPES:
-            return (
-                f"Invalid file type for '{file.name}'. Allowed: JPG, PNG, GIF, WEBP, BMP, TIFF, SVG, "
-                f"MP3, WAV, FLAC, OGG, AAC, M4A, MP4"
-            )
-
-        if content_type.startswith('image/'):
-            media_type = 'image'
-        elif content_type.startswith('audio/'):
-            media_type = 'audio'
-        else:
-            return (
-                f"Invalid file type for '{file.name}'. Allowed: JPG, PNG, GIF, WEBP, BMP, TIFF, SVG, "
-                f"MP3, WAV, FLAC, OGG, AAC, M4A"
-            )
-
+        checked = _validate_media(file)
+        if isinstance(checked, str):
+            return checked
+        media_type, content_type = checked
         unique_suffix = uuid.uuid4().hex[:8]
-        filename = f"{unique_suffix}_{file.name}"
-        file_path = f"{request.user.supabase_id}/{event.id}/{filename}"
-        logger.debug(f"Uploading media to path: {file_path}")
-
-        response = supabase.storage.from_('event-media').upload(
-            file_path, file.read(), file_options={"content-type": file.content_type}
-        )
-        if hasattr(response, 'error') and response.error:
-            return f"Failed to upload '{file.name}': {response.error}"
-        if hasattr(response, 'status_code') and response.status_code not in (200, 201):
-            return f"Upload failed for '{file.name}'"
-
-        public_url = supabase.storage.from_('event-media').get_public_url(file_path)
-        media = EventMedia.objects.create(
+        file_path = f"{request.user.supabase_id}/{event.id}/{unique_suffix}_{file.name}"
+        pending.append((file, file_path, media_type, content_type))
+    if not pending:
+        return []
+
+    workers = min(settings.MEDIA_UPLOAD_CONCURRENCY, len(pending))
+    logger.debug(f"Uploading {len(pending)} media files for event {event.id} with {workers} workers")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='media-upload') as pool:
+        errors = list(pool.map(lambda item: _upload_one(supabase, item[1], item[0]), pending))
+
+    failures = [error for error in errors if error]
+    if failures:
+        uploaded = [file_path for (file, file_path, *_), error in zip(pending, errors) if not error]
+        bury_media(EventMedia.objects.none(), extra_paths=uploaded)
+        return failures[0]
+
+    bucket = supabase.storage.from_(MEDIA_BUCKET)
+    created = EventMedia.objects.bulk_create([
+        EventMedia(
             event=event,
-            media_file=public_url.rstrip('?'),
+            media_file=bucket.get_public_url(file_path).rstrip('?'),
             media_type=media_type,
             mime_type=content_type,
         )
-        created.append(media)
+        for file, file_path, media_type, content_type in pending
+    ])
+    image_ids = [media.pk for media in created if media.media_type == 'image']
+    if image_ids:
+        transaction.on_commit(lambda: async_task('reminders.tasks.generate_media_renditions', image_ids))
     return created
 
 
-def _remove_event_media_from_storage(supabase, media_queryset):
-    """Delete media files from Supabase storage and remove DB records.
-
-    Logs warnings for already-missing files and errors on failure.
-    """
-    for media in media_queryset:
-        public_url = media.media_file
-        try:
-            if '/event-media/' in public_url:
-                relative_path = public_url.split('/event-media/')[-1]
-            else:
-                relative_path = public_url
-                
-            try:
-                # Best-effort removal from Supabase
-                supabase.storage.from_('event-media').remove([relative_path])
-                logger.info(f"Deleted media from storage '{relative_path}'")
-            except Exception as e:
-                logger.warning(f"Storage delete failed for {relative_path}: {e}")
-            
-            # ALWAYS delete the DB record so we don't get stuck
-            media.delete()
-        except Exception as e:
-            logger.warning(f"Failed to delete media record {public_url}: {e}")
-
-
 def _build_card_context(event, *, is_owner, token=None, session_key_unlocked=False):
     """Build the context dict shared by greeting_card_view and public_card_view."""
     audio_media = event.media.filter(media_type='audio').first()
     images = [
-        {'media_file': m.media_file, 'media_type': m.media_type}
+        {
+            'media_file': m.media_file,
+            'media_type': m.media_type,
+            'srcset': m.srcset(),
+            'width': m.width,
+            'height': m.height,
+            'placeholder': m.placeholder,
+            'dominant_color': m.dominant_color,
+        }
         for m in event.media.filter(media_type='image')
     ]
 
@@ -225,11 +248,11 @@ def toggle_recurring(request, event_id):
             event.is_recurring = not event.is_recurring
             event.save()
             
-            # Immediately process recurring events so it shows up without waiting for the cron task
+            # Roll just this event forward so it shows up without waiting for the scheduled job
             if event.is_recurring:
                 try:
-                    from reminders.tasks import check_recurring_events
-                    check_recurring_events()
+                    from reminders.tasks import expand_recurring
+                    expand_recurring([event.id])
                 except Exception as e:
                     logger.error(f"Error checking recurring events after toggle: {e}")
                     
@@ -285,7 +308,7 @@ def edit_event(request, event_id):
 
                 if request.POST.get('remove_media'):
                     try:
-                        _remove_event_media_from_storage(supabase, event.media.all())
+                        bury_media(event.media.all())
                     except Exception as e:
                         messages.error(request, f"Failed to delete media: {e}")
                         return render(request, "reminders/event_form.html", {"form": form, "event": event})
@@ -315,31 +338,11 @@ def delete_event(request, event_id):
     event = get_object_or_404(Event, id=event_id, user=request.user)
     if request.method == 'POST':
         try:
-            supabase = get_user_supabase_client(request)
-
-            # Delete all EventMedia files from Supabase storage
-            if event.media.exists():
-                try:
-                    _remove_event_media_from_storage(supabase, event.media.all())
-                    logger.info(f"Removed all media for event {event.name}")
-                except Exception as e:
-                    logger.error(f"Exception deleting EventMedia for event {event.name}: {str(e)}")
-                    messages.error(request, f"Failed to delete media for event {event.name}: {str(e)}")
-                    return render(request, "reminders/confirm_delete.html", {"event": event})
-
-            # Also handle legacy media_path if it exists
-            if event.media_path:
-                try:
-                    file_path = event.media_path
-                    dir_path = "/".join(file_path.split('/')[:-1])
-                    existing_files = supabase.storage.from_('event-media').list(dir_path)
-                    if any(f['name'] == file_path.split('/')[-1] for f in existing_files):
-                        supabase.storage.from_('event-media').remove([file_path])
-                        logger.info(f"Deleted legacy media from storage: {file_path}")
-                except Exception as e:
-                    logger.warning(f"Failed to delete legacy media_path for event {event.name}: {str(e)}")
-
-            event.delete()
+            # Storage objects (including any legacy media_path) are removed in the background
+            with transaction.atomic():
+                queued = bury_media(event.media.all(), extra_paths=[event.media_path])
+                event.delete()
+            logger.info(f"Queued {queued} storage objects for removal with event {event.name}")
             messages.success(request, f"Event '{event.name}' deleted successfully!")
             logger.info(f"Event deleted: {event.name} for user {request.user.username}")
             return redirect('event_list')
@@ -352,7 +355,7 @@ def delete_event(request, event_id):
 @login_required
 @email_verified_required
 def delete_event_media(request, media_id):
-    """Delete an event media file from Supabase storage and clear the DB record.
+    """Delete an event media record and queue its file for removal from storage.
 
     Handles both full URLs and raw Supabase paths.
     Sends an email notification when media is removed from a past event.
@@ -362,39 +365,18 @@ def delete_event_media(request, media_id):
 
     if request.method == 'POST' and media.media_file:
         try:
-            supabase = get_user_supabase_client(request)
-            public_url = media.media_file
-            
-            if '/event-media/' in public_url:
-                relative_path = public_url.split('/event-media/')[-1]
-            else:
-                relative_path = public_url
-
-            try:
-                # Best-effort removal from Supabase
-                supabase.storage.from_('event-media').remove([relative_path])
-                logger.info(f"Media deleted from Supabase for event {event.id}")
-            except Exception as e:
-                logger.warning(f"Storage delete failed for {relative_path}: {e}")
-
-            # Clear fields but keep the record
-            media.media_url = None
-            media.media_type = None
-            media.media_file = None
-            media.save()
+            # The stored file is removed in the background
+            bury_media(EventMedia.objects.filter(pk=media.pk))
+            logger.info(f"Media {media_id} deleted for event {event.id}")
 
             # Notify user when media is removed from a past event
             if event.date < timezone.now().date():
                 try:
-                    send_mail(
-                        subject=f"Media Removed from Past Event: {event.name}",
-                        message=f"Media was removed from your past event '{event.name}' dated {event.date}.",
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[request.user.email],
-                        fail_silently=True,
-                    )
+                    msg = ReminderEmailService.build_media_removed_notice(request.user, event)
+                    if msg is not None:
+                        enqueue([outbox_row(msg, EmailOutbox.KIND_MEDIA_REMOVED, user=request.user, event=event)])
                 except Exception as e:
-                    logger.error(f"Failed to send notification email for event {event.id}: {e}")
+                    logger.error(f"Failed to queue notification email for event {event.id}: {e}")
 
             messages.success(request, "Event media deleted successfully!")
             return redirect('event_list')
@@ -407,6 +389,53 @@ def delete_event_media(request, media_id):
     return redirect('event_update', event_id=event.id)
 
 
+def _job_payload(request, run):
+    return {
+        'job_id': run.id,
+        'name': run.name,
+        'status': run.status,
+        'status_url': request.build_absolute_uri(reverse('job_status', args=[run.id])),
+        'processed': run.processed_count,
+        'sent': run.sent_count,
+        'failed': run.failed_count,
+        'rows_scanned': run.rows_scanned,
+        'started_at': run.started_at,
+        'finished_at': run.finished_at,
+        'duration_seconds': run.duration_seconds,
+        'error': run.error,
+    }
+
+
+def _start_job(request, name, task, **task_kwargs):
+    """Queue *task* on django-q for a new JobRun and answer 202 with its id.
+
+    The HTTP request never waits for the batch.  If a run of *name* is already
+    queued or running, its id is returned instead of starting a second one.
+    """
+    recent = timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    active = JobRun.objects.filter(
+        name=name, status__in=[JobRun.STATUS_QUEUED, JobRun.STATUS_RUNNING], started_at__gte=recent,
+    ).first()
+    if active:
+        return JsonResponse({'message': f"{name} is already running", **_job_payload(request, active)}, status=202)
+
+    run = JobRun.objects.create(name=name, status=JobRun.STATUS_QUEUED)
+    # The batch may legitimately run for as long as its lease lasts
+    async_task(task, run.id, timeout=settings.JOB_LEASE_SECONDS, **task_kwargs)
+    logger.info(f"Queued {name} as job {run.id}")
+    return JsonResponse({'message': f"{name} queued", **_job_payload(request, run)}, status=202)
+
+
+def job_status(request, job_id):
+    """Report the live progress of a triggered job (cron token or superuser only)."""
+    token = request.headers.get('X-Cron-Token') or request.GET.get('token')
+    authorized = bool(settings.REMINDER_CRON_SECRET) and token == settings.REMINDER_CRON_SECRET
+    if not authorized and not request.user.is_superuser:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    run = get_object_or_404(JobRun, id=job_id)
+    return JsonResponse(_job_payload(request, run))
+
+
 @csrf_exempt
 def trigger_send_reminders(request):
     if request.method != 'POST':
@@ -420,9 +449,10 @@ def trigger_send_reminders(request):
         if not secret_token or secret_token != settings.REMINDER_CRON_SECRET:
             logger.warning("Unauthorized attempt to trigger reminders")
             return JsonResponse({'error': 'Unauthorized'}, status=403)
-        send_upcoming_reminders()
-        logger.info("Reminders sent successfully via trigger_send_reminders")
-        return JsonResponse({'message': 'Reminders sent successfully'})
+        return _start_job(
+            request, REMINDER_JOB, 'reminders.tasks.run_reminder_trigger',
+            concurrency=request.POST.get('concurrency') or None,
+        )
     except Exception as e:
         logger.error(f"Error in trigger_send_reminders: {str(e)}")
         return JsonResponse({'error': f'An error occurred: {str(e)}'}, status=500)
@@ -518,6 +548,31 @@ def download_analytics_report(request):
     return response
 
 
+def _past_events(user, today):
+    """The user's events that have already happened, annotated with ``occurred_on``.
+
+    A recurring event is a single row dated at its next occurrence, so its
+    latest past date comes from its EventOccurrence history instead.
+    ``reflection_note`` is the user's reflection on that occurrence.
+    """
+    last_occurrence = (
+        EventOccurrence.objects.filter(event=OuterRef('pk'), date__lt=today)
+        .order_by('-date')
+        .values('date')[:1]
+    )
+    return Event.objects.filter(user=user, is_archived=False).annotate(
+        occurred_on=Case(
+            When(date__lt=today, then=F('date')),
+            default=Subquery(last_occurrence),
+            output_field=DateField(),
+        ),
+    ).filter(occurred_on__isnull=False).annotate(
+        reflection_note=Subquery(
+            Reflection.objects.filter(event=OuterRef('pk'), year=ExtractYear(OuterRef('occurred_on'))).values('note')[:1]
+        ),
+    )
+
+
 @login_required
 @email_verified_required
 def past_events(request):
@@ -528,18 +583,18 @@ def past_events(request):
         end_date = request.GET.get('end_date', '')
         search_query = request.GET.get('search', '')
 
-        events = Event.objects.filter(user=request.user, date__lt=today, is_archived=False)
+        events = _past_events(request.user, today)
 
         if event_type:
             events = events.filter(event_type=event_type)
         if start_date:
-            events = events.filter(date__gte=start_date)
+            events = events.filter(occurred_on__gte=start_date)
         if end_date:
-            events = events.filter(date__lte=end_date)
+            events = events.filter(occurred_on__lte=end_date)
         if search_query:
             events = events.filter(custom_label__icontains=search_query)
 
-        events = events.order_by('-date')
+        events = events.order_by('-occurred_on')
         logger.info(f"Fetched {events.count()} past events for user {request.user.username}")
     except Exception as e:
         logger.error(f"Error fetching past events for user {request.user.username}: {str(e)}")
@@ -559,7 +614,7 @@ def past_events(request):
 @email_verified_required
 def edit_past_event(request, event_id):
     """Edit a past event — allows updating details and media."""
-    event = get_object_or_404(Event, id=event_id, user=request.user, date__lt=timezone.now().date(), is_archived=False)
+    event = get_object_or_404(_past_events(request.user, timezone.now().date()), id=event_id)
     if request.method == 'POST':
         form = EventForm(request.POST, request.FILES, instance=event)
         if form.is_valid():
@@ -568,7 +623,7 @@ def edit_past_event(request, event_id):
 
                 if request.POST.get('remove_media'):
                     try:
-                        _remove_event_media_from_storage(supabase, event.media.all())
+                        bury_media(event.media.all())
                     except Exception as e:
                         messages.error(request, f"Failed to delete media: {e}")
                         return render(request, "reminders/event_form.html", {"form": form, "event": event})
@@ -581,11 +636,11 @@ def edit_past_event(request, event_id):
 
                 form.save()
                 
-                # Immediately process recurring events so the user sees the new event right away
+                # Roll just this event forward so the user sees the next occurrence right away
                 if event.is_recurring:
                     try:
-                        from reminders.tasks import check_recurring_events
-                        check_recurring_events()
+                        from reminders.tasks import expand_recurring
+                        expand_recurring([event.id])
                     except Exception as e:
                         logger.error(f"Error checking recurring events after edit: {e}")
 
@@ -604,8 +659,7 @@ def edit_past_event(request, event_id):
 @login_required
 @email_verified_required
 def add_reflection(request, event_id):
-    event = get_object_or_404(Event, id=event_id, user=request.user, date__lt=timezone.now().date(), is_archived=False)
-    reflection = event.reflections.first()
+    event = get_object_or_404(_past_events(request.user, timezone.now().date()), id=event_id)
 
     if request.method == 'GET':
         return JsonResponse({
@@ -613,11 +667,21 @@ def add_reflection(request, event_id):
                 'id': event.id,
                 'name': event.name,
                 'event_type_display': event.get_event_type_display(),
-                'date': event.date.strftime('%Y-%m-%d'),
+                'date': event.occurred_on.strftime('%Y-%m-%d'),
                 'message': event.message or '',
-                'media': [{'media_file': m.media_file, 'media_type': m.media_type} for m in event.media.all()],
+                'media': [
+                    {
+                        'media_file': m.media_file,
+                        'media_type': m.media_type,
+                        'width': m.width,
+                        'height': m.height,
+                        'placeholder': m.placeholder,
+                        'dominant_color': m.dominant_color,
+                    }
+                    for m in event.media.all()
+                ],
             },
-            'reflection': {'note': reflection.note} if reflection else None,
+            'reflection': {'note': event.reflection_note} if event.reflection_note is not None else None,
         })
 
     if request.method == 'POST':
@@ -627,6 +691,7 @@ def add_reflection(request, event_id):
                 Reflection.objects.update_or_create(
                     user=request.user,
                     event=event,
+                    year=event.occurred_on.year,
                     defaults={'note': note}
                 )
                 logger.info(f"Reflection added for event '{event.name}' by user {request.user.username}")
@@ -643,7 +708,7 @@ def add_reflection(request, event_id):
 def download_past_events(request):
     try:
         today = timezone.now().date()
-        events = Event.objects.filter(user=request.user, date__lt=today, is_archived=False).order_by('-date')
+        events = _past_events(request.user, today).order_by('-occurred_on')
 
         response = HttpResponse(content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="past_events.csv"'
@@ -651,14 +716,13 @@ def download_past_events(request):
         writer.writerow(['Name', 'Event Type', 'Date', 'Message', 'Custom Label', 'Reflection', 'Media Count'])
 
         for event in events:
-            reflection = event.reflections.first()
             writer.writerow([
                 event.name,
                 event.get_event_type_display(),
-                event.date,
+                event.occurred_on,
                 event.message or '',
                 event.custom_label or '',
-                reflection.note if reflection else '',
+                event.reflection_note or '',
                 event.media.count(),
             ])
 
@@ -775,15 +839,24 @@ def validate_card_password(request, event_id):
 
 
 
-def auto_share_card():
+def auto_share_card(drain=True):
+    """Create share links for today's events and queue the card emails.
+
+    With *drain* the queued emails are sent right away; otherwise they are
+    left for the outbox worker.  Shares whose email can never be delivered
+    are removed by the outbox once it gives up.
+    """
     today = timezone.now().date()
     events = Event.objects.filter(
         date=today,
         recipient_email__isnull=False,
         auto_share_enabled=True,
-        shares__isnull=True,
         is_archived=False
-    )
+    ).exclude(
+        # Recurring events keep one row across years, so only this year's shares count
+        shares__created_at__year=today.year,
+    ).select_related('user')
+    queued = 0
     for event in events:
         try:
             # Skip if no recipient email
@@ -793,46 +866,32 @@ def auto_share_card():
 
             # Generate a random password for the share link
             password = CardShare.generate_random_password()
-            share = CardShare.objects.create(
+            share = CardShare(
                 event=event,
                 token=str(uuid.uuid4()),
                 expires_at=timezone.now() + timedelta(days=3),
                 is_auto_generated=True
             )
             share.set_password(password)
-            share.save()
 
             # Generate the share URL
             validation_base_url = getattr(settings, 'SHARE_VALIDATION_BASE_URL', settings.SITE_URL)
             share_url = f"{validation_base_url.rstrip('/')}/validate-share/{share.token}/"
 
-            # Send email to the recipient
-            subject = f"Greeting Card for {event.name}'s {event.get_event_type_display()}"
-            template_name = 'emails/auto_share_card.html'
-            context = {
-                'recipient_name': event.name,
-                'sender_name': event.user.username,
-                'event_type': event.get_event_type_display(),
-                'share_url': share_url,
-                'password': password,
-                'expires_days': 3
-            }
-            try:
-                send_mail(
-                    subject=subject,
-                    message='',  # Plain text message is empty as we use HTML
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[event.recipient_email],
-                    html_message=render_to_string(template_name, context),
-                    fail_silently=False
-                )
-                logger.info(f"Auto-shared card for event {event.id} to {event.recipient_email}")
-            except Exception as e:
-                logger.error(f"Failed to send auto-share email for event {event.id}: {str(e)}")
-                share.delete()  # Delete the share if email fails
+            # Queue the email to the recipient together with the share it unlocks
+            msg = ReminderEmailService.build_auto_share_email(event, share_url, password, expires_days=3)
+            with transaction.atomic():
+                share.save()
+                enqueue([outbox_row(msg, EmailOutbox.KIND_AUTO_SHARE, user=event.user, event=event, card_share=share)])
+            queued += 1
+            logger.info(f"Queued auto-share card for event {event.id} to {event.recipient_email}")
         except Exception as e:
             logger.error(f"Error in auto-sharing card for event {event.id}: {str(e)}")
 
+    if drain and queued:
+        drain_outbox(kinds=[EmailOutbox.KIND_AUTO_SHARE])
+    return queued
+
 
 
 @csrf_exempt
@@ -843,8 +902,7 @@ def trigger_auto_share_card(request):
     if not secret_token or secret_token != settings.REMINDER_CRON_SECRET:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     try:
-        auto_share_card()
-        return JsonResponse({'message': 'Auto-share card triggered successfully'})
+        return _start_job(request, AUTO_SHARE_JOB, 'reminders.tasks.run_auto_share_trigger')
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -1024,7 +1082,7 @@ def export_events_ics(request):
             lines.append(f'DESCRIPTION:{description}')
         lines.append(f'CATEGORIES:{event.get_event_type_display()}')
         if event.is_recurring:
-            lines.append('RRULE:FREQ=YEARLY;COUNT=10')
+            lines.append('RRULE:FREQ=YEARLY')
         # Reminder alarm
         lines.append('BEGIN:VALARM')
         lines.append('TRIGGER:-PT' + str(alarm_minutes) + 'M')
@@ -39,6 +39,17 @@ class MediaManager {
         const mediaUrls = display.dataset.mediaUrls
             ? display.dataset.mediaUrls.split(',').map(url => url.trim()).filter(url => url)
             : [];
+        // Responsive WebP renditions, '|'-separated in the same order as the URLs
+        const mediaSrcsets = display.dataset.mediaSrcsets
+            ? display.dataset.mediaSrcsets.split('|')
+            : [];
+        // "<dominant colour> <preview data URI>" per image, painted until the photo arrives
+        const mediaPlaceholders = display.dataset.mediaPlaceholders
+            ? display.dataset.mediaPlaceholders.split('|').map(entry => entry.split(' '))
+            : [];
+        const mediaSizes = display.dataset.mediaSizes
+            ? display.dataset.mediaSizes.split(',').map(size => size.split('x').map(Number))
+            : [];
         let fallbackUrl = display.dataset.fallbackUrl || 'https://images.unsplash.com/photo-1441974231531-c6227db76b6e';
         // Rakhi-specific fallback
         if (this.eventType === 'raksha_bandhan' && !mediaUrls.length) {
@@ -55,14 +66,33 @@ class MediaManager {
         mediaUrls.forEach((url, index) => {
             const img = document.createElement('img');
             img.src = decodeURIComponent(url);
+            if (mediaSrcsets[index]) {
+                img.srcset = mediaSrcsets[index];
+                img.sizes = '(max-width: 768px) 100vw, 800px';
+            }
             img.alt = `Event media ${index + 1}`;
             img.className = 'media-image';
 
+            const [color, preview] = mediaPlaceholders[index] || [];
+            if (color) {
+                img.style.backgroundColor = color;
+            }
+            if (preview) {
+                img.style.backgroundImage = `url("${preview}")`;
+                img.style.backgroundSize = 'cover';
+            }
+            const [width, height] = mediaSizes[index] || [];
+            if (width && height) {
+                // Reserve the box up front so the card does not shift when the photo loads
+                img.style.aspectRatio = `${width} / ${height}`;
+            }
+
             img.loading = 'lazy';
             img.style.display = index === 0 ? 'block' : 'none';
 
             // Calculate and maintain aspect ratio
             img.onload = () => {
+                img.style.background = '';
                 const aspectRatio = img.naturalWidth / img.naturalHeight;
                 const containerWidth = display.clientWidth;
                 const maxHeight = window.innerWidth <= 768 ? 300 : 500;
@@ -90,6 +120,7 @@ class MediaManager {
                 const fallbackSrc = decodeURIComponent(fallbackUrl || '');
                 // Use card-level fallback image for every event type.
                 if (fallbackSrc && currentSrc !== fallbackSrc) {
+                    img.removeAttribute('srcset');
                     img.src = fallbackUrl;
                 }
             };
@@ -32,7 +32,7 @@ document.addEventListener('DOMContentLoaded', () => {
                         <div class="flex flex-col gap-2">
                             ${data.event.media.map(media => `
                                 ${media.media_type === 'image' ? `
-                                    <img src="${media.media_file}" alt="Event Media" class="w-full h-32 object-cover rounded-lg">
+                                    <img src="${media.media_file}" alt="Event Media" class="w-full h-32 object-cover rounded-lg" style="background: ${media.dominant_color || 'transparent'} ${media.placeholder ? `url('${media.placeholder}') center / cover` : ''}">
                                 ` : media.media_type === 'audio' ? `
                                     <audio controls class="w-full">
                                         <source src="${media.media_file}">
@@ -64,6 +64,11 @@ class UserSettingsForm(forms.Form):
         help_text="Optional. Reminder emails will be sent here instead of your main email.",
         widget=forms.EmailInput(attrs={'class': 'settings-input', 'autocomplete': 'email', 'placeholder': 'Leave blank to use main email'}),
     )
+    reminder_digest = forms.BooleanField(
+        required=False,
+        label="Daily reminder digest",
+        help_text="Get one email listing every reminder due that day instead of one email per event.",
+    )
     timezone = forms.ChoiceField(
         choices=[
             ('Asia/Kolkata', 'Asia/Kolkata (IST)'),
@@ -89,6 +94,7 @@ class UserSettingsForm(forms.Form):
             if profile:
                 self.fields['notification_email'].initial = profile.notification_email or ''
                 self.fields['timezone'].initial = profile.timezone or 'Asia/Kolkata'
+                self.fields['reminder_digest'].initial = profile.reminder_digest
 
     def clean_username(self):
         username = self.cleaned_data['username']
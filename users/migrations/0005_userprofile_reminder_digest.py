@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_supabase_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='reminder_digest',
+            field=models.BooleanField(default=False, help_text='Bundle reminders due on the same day into one email.'),
+        ),
+    ]
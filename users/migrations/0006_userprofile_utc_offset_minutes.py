@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:54
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_utc_offsets(apps, schema_editor):
+    UserProfile = apps.get_model('users', 'UserProfile')
+    now = timezone.now()
+    for tz_name in UserProfile.objects.values_list('timezone', flat=True).distinct():
+        try:
+            tz = ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = ZoneInfo(settings.TIME_ZONE)
+        offset = int(now.astimezone(tz).utcoffset().total_seconds() // 60)
+        UserProfile.objects.filter(timezone=tz_name).update(utc_offset_minutes=offset)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_userprofile_reminder_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='utc_offset_minutes',
+            field=models.SmallIntegerField(db_index=True, default=330),
+        ),
+        migrations.RunPython(backfill_utc_offsets, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,5 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.db import models
@@ -28,10 +30,44 @@ class UserProfile(models.Model):
     timezone = models.CharField(max_length=50, default='Asia/Kolkata')
     notification_email = models.EmailField(blank=True, null=True)
     notification_sms = models.BooleanField(default=False)
+    reminder_digest = models.BooleanField(default=False, help_text="Bundle reminders due on the same day into one email.")
+    # Current UTC offset of ``timezone``; lets the hourly reminder job pick
+    # users by offset bucket instead of converting time zones row by row.
+    utc_offset_minutes = models.SmallIntegerField(default=330, db_index=True)
 
     def __str__(self):
         return f"Profile for {self.user.username}"
 
+    @staticmethod
+    def offset_for(tz_name, at=None):
+        """Return the UTC offset of *tz_name* in minutes at *at* (default: now)."""
+        try:
+            tz = ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = ZoneInfo(settings.TIME_ZONE)
+        return int((at or timezone.now()).astimezone(tz).utcoffset().total_seconds() // 60)
+
+    @classmethod
+    def refresh_utc_offsets(cls, at=None):
+        """Re-derive ``utc_offset_minutes`` after DST changes, one UPDATE per time zone.
+
+        Returns the number of profiles whose bucket changed.
+        """
+        changed = 0
+        for tz_name in cls.objects.values_list('timezone', flat=True).distinct():
+            offset = cls.offset_for(tz_name, at)
+            changed += cls.objects.filter(timezone=tz_name).exclude(utc_offset_minutes=offset).update(
+                utc_offset_minutes=offset
+            )
+        return changed
+
+    def save(self, *args, **kwargs):
+        self.utc_offset_minutes = self.offset_for(self.timezone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'timezone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'utc_offset_minutes'}
+        super().save(*args, **kwargs)
+
 class AuditLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE, related_name='audit_logs')
     action = models.CharField(max_length=100)
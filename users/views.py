@@ -510,6 +510,7 @@ def account_settings(request):
             # Update profile fields
             profile.notification_email = form.cleaned_data.get('notification_email') or None
             profile.timezone = form.cleaned_data.get('timezone', 'Asia/Kolkata')
+            profile.reminder_digest = form.cleaned_data.get('reminder_digest', False)
             profile.save()
 
             # If email changed, mark as unverified so they re-verify